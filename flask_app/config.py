@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 import os
+from .services.image_keys import immutable_keys_enabled
 
 @dataclass
 class RedshiftConfig:
@@ -14,6 +15,10 @@ class AWSConfig:
     access_key_id: str = os.getenv("AWS_ACCESS_KEY_ID", "")
     secret_access_key: str = os.getenv("AWS_SECRET_ACCESS_KEY", "")
     bucket_name: str = os.getenv("S3_BUCKET_NAME", "static.wowcher.co.uk")
+    # Optional S3-compatible endpoint (e.g. a local MinIO stand-in for testing)
+    endpoint_url: str = os.getenv("S3_ENDPOINT_URL", "")
+    # Publish generated images under content-hash keys with immutable cache headers
+    immutable_keys: bool = field(default_factory=immutable_keys_enabled)
 
 @dataclass
 class OracleConfig:
@@ -25,10 +30,105 @@ class OracleConfig:
 class OpenAIConfig:
     api_key: str = os.getenv("OPEN_AI_API_KEY", "")
 
+@dataclass
+class IngestConfig:
+    # Batches at or above this size are staged to S3 and loaded with COPY;
+    # smaller ones use a multi-row INSERT via execute_values. COPY needs a private
+    # staging bucket; without one every batch uses execute_values
+    copy_threshold: int = int(os.getenv("INGEST_COPY_THRESHOLD", "500"))
+    page_size: int = int(os.getenv("INGEST_PAGE_SIZE", "500"))
+    staging_bucket: str = os.getenv("INGEST_STAGING_BUCKET", "")
+    staging_prefix: str = os.getenv("INGEST_STAGING_PREFIX", "temp/image_to_approve")
+
+@dataclass
+class ThumbnailConfig:
+    cache_dir: str = os.getenv("THUMBNAIL_CACHE_DIR", os.path.join("cache", "thumbnails"))
+    max_cache_bytes: int = int(os.getenv("THUMBNAIL_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    default_width: int = int(os.getenv("THUMBNAIL_WIDTH", "480"))
+    max_width: int = int(os.getenv("THUMBNAIL_MAX_WIDTH", "1024"))
+    quality: int = int(os.getenv("THUMBNAIL_QUALITY", "78"))
+    # Comma-separated hosts the proxy may fetch from (the S3 bucket host is always allowed)
+    allowed_hosts: str = os.getenv("THUMBNAIL_ALLOWED_HOSTS", "static.wowcher.co.uk")
+
+@dataclass
+class DashboardConfig:
+    cache_ttl_seconds: int = int(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+
+@dataclass
+class CDNConfig:
+    # Cloudflare purge-by-URL; purging is skipped unless zone and token are set
+    zone_id: str = os.getenv("CLOUDFLARE_ZONE_ID", "")
+    api_token: str = os.getenv("CLOUDFLARE_API_TOKEN", "")
+    api_base: str = os.getenv("CLOUDFLARE_API_BASE", "https://api.cloudflare.com/client/v4")
+    max_workers: int = int(os.getenv("CLOUDFLARE_PURGE_WORKERS", "4"))
+    requests_per_second: float = float(os.getenv("CLOUDFLARE_PURGE_RPS", "4"))
+    max_retries: int = int(os.getenv("CLOUDFLARE_PURGE_RETRIES", "5"))
+
+@dataclass
+class CostConfig:
+    # gpt-image-1 prices in USD per million tokens
+    input_text_usd_per_m: float = float(os.getenv("OPENAI_PRICE_INPUT_TEXT", "5"))
+    input_image_usd_per_m: float = float(os.getenv("OPENAI_PRICE_INPUT_IMAGE", "10"))
+    output_usd_per_m: float = float(os.getenv("OPENAI_PRICE_OUTPUT", "40"))
+    # Reserved per call before the first real usage comes back (high, 1536x1024)
+    estimated_call_usd: float = float(os.getenv("OPENAI_ESTIMATED_CALL_USD", "0.25"))
+    # Default spend cap per generation batch; 0 means no cap
+    batch_budget_usd: float = float(os.getenv("GENERATION_BATCH_BUDGET_USD", "0"))
+
+@dataclass
+class GenerationConfig:
+    max_workers: int = int(os.getenv("GENERATION_MAX_WORKERS", "25"))
+    # Stop dispatching new deals this many seconds into a batch; 0 means no deadline
+    deadline_seconds: float = float(os.getenv("GENERATION_DEADLINE_SECONDS", "0"))
+    # Deals whose current image has a pending/approved variant newer than this are skipped
+    skip_cooldown_days: int = int(os.getenv("GENERATION_SKIP_COOLDOWN_DAYS", "30"))
+    # Generated rows are written to the approval queue in micro-batches of this size or age
+    flush_rows: int = int(os.getenv("GENERATION_FLUSH_ROWS", "20"))
+    flush_seconds: float = float(os.getenv("GENERATION_FLUSH_SECONDS", "10"))
+    # Images requested per API call; extras are ranked and kept as alternates for "Regenerate"
+    candidates: int = int(os.getenv("GENERATION_CANDIDATES", "1"))
+    # Two-phase generation: batches render at this quality ("low"/"medium") for review and
+    # approved previews are re-run at high quality; empty renders high quality directly
+    preview_quality: str = os.getenv("GENERATION_PREVIEW_QUALITY", "")
+    # Failed final runs after which an approved preview is marked 'final_failed' and not retried
+    final_max_attempts: int = int(os.getenv("GENERATION_FINAL_MAX_ATTEMPTS", "3"))
+
+@dataclass
+class PrescreenConfig:
+    # CPU checks run on every generated candidate before it reaches a reviewer
+    enabled: bool = os.getenv("PRESCREEN_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+    # Greyscale std (0-1) below which an image counts as blank/near-uniform
+    min_std: float = float(os.getenv("PRESCREEN_MIN_STD", "0.04"))
+    # dHash bits (of 64) that must differ from the original image
+    min_hash_distance: int = int(os.getenv("PRESCREEN_MIN_HASH_DISTANCE", "6"))
+    # Expected width/height (1536x1024) and allowed relative deviation
+    aspect_ratio: float = float(os.getenv("PRESCREEN_ASPECT_RATIO", "1.5"))
+    aspect_tolerance: float = float(os.getenv("PRESCREEN_ASPECT_TOLERANCE", "0.03"))
+    # Bottom-right corner (this fraction of width and height) the prompts keep free of text
+    clear_zone_fraction: float = float(os.getenv("PRESCREEN_CLEAR_ZONE_FRACTION", "0.2"))
+    # Share of strong-edge pixels in the clear zone above which the image is flagged
+    clear_zone_edge_density: float = float(os.getenv("PRESCREEN_CLEAR_ZONE_EDGE_DENSITY", "0.03"))
+
+@dataclass
+class TranscodeConfig:
+    # images.edit returns PNG; generated images are re-encoded before upload
+    jpeg_quality: int = int(os.getenv("TRANSCODE_JPEG_QUALITY", "88"))
+    # Also publish a WebP copy next to each JPEG variant
+    webp: bool = os.getenv("TRANSCODE_WEBP", "false").strip().lower() in ("1", "true", "yes")
+    webp_quality: int = int(os.getenv("TRANSCODE_WEBP_QUALITY", "82"))
+
 @dataclass
 class AppConfig:
     redshift: RedshiftConfig = field(default_factory=RedshiftConfig)
     aws: AWSConfig = field(default_factory=AWSConfig)
     oracle: OracleConfig = field(default_factory=OracleConfig)
     openai: OpenAIConfig = field(default_factory=OpenAIConfig)
+    ingest: IngestConfig = field(default_factory=IngestConfig)
+    thumbnails: ThumbnailConfig = field(default_factory=ThumbnailConfig)
+    dashboard: DashboardConfig = field(default_factory=DashboardConfig)
+    cdn: CDNConfig = field(default_factory=CDNConfig)
+    costs: CostConfig = field(default_factory=CostConfig)
+    generation: GenerationConfig = field(default_factory=GenerationConfig)
+    prescreen: PrescreenConfig = field(default_factory=PrescreenConfig)
+    transcode: TranscodeConfig = field(default_factory=TranscodeConfig)
     batch_name: str = os.getenv("BATCH_NAME", "OPEN AI Images")
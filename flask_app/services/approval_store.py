@@ -1,6 +1,20 @@
+import io
+import csv
+import uuid
+import json
+import time
+from datetime import datetime, date, timezone
+from collections import defaultdict
+import boto3
+import psycopg2
+from psycopg2.extras import execute_values
+from ..config import AppConfig
 from ..db.redshift import redshift_conn
+from .prompt_manager import PromptManager
 from typing import List, Dict, Any
 
+CFG = AppConfig()
+
 CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS temp.image_to_approve (
   id BIGINT IDENTITY(1,1),
@@ -18,10 +32,67 @@ CREATE TABLE IF NOT EXISTS temp.image_to_approve (
   reviewer VARCHAR(128),
   review_notes VARCHAR(2048),
   created_ts TIMESTAMP DEFAULT GETDATE(),
-  reviewed_ts TIMESTAMP
+  reviewed_ts TIMESTAMP,
+  prompt_hash VARCHAR(64),
+  prompt_vars VARCHAR(4096),
+  lease_owner VARCHAR(128),
+  lease_expires_ts TIMESTAMP,
+  compare_url VARCHAR(1024),
+  cost_usd DECIMAL(10,6),
+  alternate_urls VARCHAR(8192),
+  quality VARCHAR(16),
+  phase VARCHAR(16),
+  parent_id BIGINT,
+  prescreen_flags VARCHAR(256)
+);
+"""
+
+# One row per images.edit call, including calls whose image was never queued
+CREATE_COST_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS temp.image_generation_cost (
+  batch_id VARCHAR(32) NOT NULL,
+  deal_voucher_id BIGINT,
+  model VARCHAR(64),
+  quality VARCHAR(16),
+  size VARCHAR(16),
+  input_text_tokens INTEGER,
+  input_image_tokens INTEGER,
+  output_tokens INTEGER,
+  cost_usd DECIMAL(10,6),
+  created_ts TIMESTAMP DEFAULT GETDATE(),
+  prompt_source VARCHAR(256)
 );
 """
 
+# Prompt templates stored once; rows reference them by prompt_hash plus the
+# substitution values in prompt_vars instead of carrying the rendered text
+CREATE_PROMPT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS temp.image_prompt_template (
+  prompt_hash VARCHAR(64) NOT NULL,
+  prompt_source VARCHAR(256),
+  template VARCHAR(65535),
+  created_ts TIMESTAMP DEFAULT GETDATE()
+);
+"""
+
+# Pre-aggregated dashboard counters, bumped incrementally on insert/review so
+# the dashboard never scans temp.image_to_approve. Dimensions use '' for NULL.
+CREATE_COUNTERS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS temp.image_approval_counters (
+  metric_date DATE NOT NULL,
+  vertical VARCHAR(64) NOT NULL,
+  category_name VARCHAR(256) NOT NULL,
+  prompt_source VARCHAR(256) NOT NULL,
+  generated_count BIGINT DEFAULT 0,
+  approved_count BIGINT DEFAULT 0,
+  rejected_count BIGINT DEFAULT 0,
+  pending_count BIGINT DEFAULT 0,
+  cost_usd DECIMAL(14,6) DEFAULT 0
+);
+"""
+
+COUNTER_COLUMNS = ("generated_count", "approved_count", "rejected_count", "pending_count", "cost_usd")
+
 MIGRATIONS = [
     "ALTER TABLE temp.image_to_approve ALTER COLUMN original_url TYPE VARCHAR(1024)",
     "ALTER TABLE temp.image_to_approve ALTER COLUMN variant_s3_url TYPE VARCHAR(1024)",
@@ -30,64 +101,340 @@ MIGRATIONS = [
     "ALTER TABLE temp.image_to_approve ALTER COLUMN token_info TYPE VARCHAR(65535)",
     "ALTER TABLE temp.image_to_approve ALTER COLUMN category_name TYPE VARCHAR(256)",
     "ALTER TABLE temp.image_to_approve ALTER COLUMN sub_category_name TYPE VARCHAR(256)",
-    "ALTER TABLE temp.image_to_approve ALTER COLUMN review_notes TYPE VARCHAR(2048)"
+    "ALTER TABLE temp.image_to_approve ALTER COLUMN review_notes TYPE VARCHAR(2048)",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN prompt_hash VARCHAR(64)",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN prompt_vars VARCHAR(4096)",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN lease_owner VARCHAR(128)",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN lease_expires_ts TIMESTAMP",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN compare_url VARCHAR(1024)",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN cost_usd DECIMAL(10,6)",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN alternate_urls VARCHAR(8192)",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN quality VARCHAR(16)",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN phase VARCHAR(16)",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN parent_id BIGINT",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN prescreen_flags VARCHAR(256)",
+    "ALTER TABLE temp.image_generation_cost ADD COLUMN prompt_source VARCHAR(256)",
+    "ALTER TABLE temp.image_to_approve ADD COLUMN final_attempts INTEGER",
 ]
 
+# Template hashes already known to exist in temp.image_prompt_template
+_KNOWN_PROMPT_HASHES = set()
+# Logged once per process when large batches cannot use COPY
+_WARNED_NO_STAGING = False
+
 def ensure_schema() -> None:
     with redshift_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(CREATE_TABLE_SQL)
-            # Best-effort widen columns to prevent truncation errors
+            cur.execute(CREATE_PROMPT_TABLE_SQL)
+            cur.execute(CREATE_COUNTERS_TABLE_SQL)
+            cur.execute(CREATE_COST_TABLE_SQL)
+            conn.commit()
+            # Best-effort widen/add columns; each runs on its own so one
+            # failure doesn't abort the rest of the transaction
             for stmt in MIGRATIONS:
                 try:
                     cur.execute(stmt)
+                    conn.commit()
                 except Exception:
-                    pass
-            conn.commit()
+                    conn.rollback()
 
 
-def insert_generation_rows(rows: List[Dict[str, Any]]) -> None:
-    if not rows:
-        return
-    def _s(val, maxlen: int):
-        if val is None:
-            return None
-        text = str(val)
-        return text[:maxlen]
-    sql = """
-    INSERT INTO temp.image_to_approve (
-      deal_voucher_id, image_id_pos_0, original_url, variant_s3_url,
-      prompt_source, prompt, token_info, vertical, category_name, sub_category_name
-    ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+INSERT_COLUMNS = (
+    "deal_voucher_id", "image_id_pos_0", "original_url", "variant_s3_url",
+    "prompt_source", "prompt", "token_info", "vertical", "category_name", "sub_category_name",
+    "prompt_hash", "prompt_vars", "compare_url", "cost_usd", "alternate_urls",
+    "quality", "phase", "parent_id", "prescreen_flags",
+)
+
+
+def _s(val, maxlen: int):
+    if val is None:
+        return None
+    text = str(val)
+    return text[:maxlen]
+
+
+def _row_values(r: Dict[str, Any]) -> tuple:
+    # Rows with a template reference don't need the rendered prompt stored
+    prompt = None if r.get("prompt_hash") else r.get("prompt")
+    return (
+        r.get("id"),
+        r.get("image_id_pos_0"),
+        _s(r.get("image_url_pos_0"), 1024),
+        _s(r.get("s3_url"), 1024),
+        _s(r.get("prompt_source"), 256),
+        _s(prompt, 65535),
+        _s(r.get("token_info"), 65535),
+        _s(r.get("vertical"), 64),
+        _s(r.get("category_name"), 256),
+        _s(r.get("sub_category_name"), 256),
+        _s(r.get("prompt_hash"), 64),
+        _s(r.get("prompt_vars"), 4096),
+        _s(r.get("compare_url"), 1024),
+        _row_cost(r) if r.get("cost_usd") is not None else None,
+        _s(r.get("alternate_urls"), 8192),
+        _s(r.get("quality"), 16),
+        _s(r.get("phase"), 16),
+        r.get("parent_id"),
+        _s(r.get("prescreen_flags"), 256),
+    )
+
+
+def _store_prompt_templates(cur, rows: List[Dict[str, Any]]) -> None:
+    templates = {}
+    for r in rows:
+        h = r.get("prompt_hash")
+        if h and h not in _KNOWN_PROMPT_HASHES and r.get("prompt_template") is not None:
+            templates[h] = (r.get("prompt_source"), r["prompt_template"])
+    for h, (source, template) in templates.items():
+        cur.execute(
+            """
+            INSERT INTO temp.image_prompt_template (prompt_hash, prompt_source, template)
+            SELECT %s, %s, %s
+            WHERE NOT EXISTS (SELECT 1 FROM temp.image_prompt_template WHERE prompt_hash = %s)
+            """,
+            (h, _s(source, 256), _s(template, 65535), h),
+        )
+
+
+def _counter_key(metric_date, r: Dict[str, Any]) -> tuple:
+    return (
+        metric_date,
+        _s(r.get("vertical"), 64) or "",
+        _s(r.get("category_name"), 256) or "",
+        _s(r.get("prompt_source"), 256) or "",
+    )
+
+
+def _row_cost(r: Dict[str, Any]) -> float:
+    try:
+        return float(r.get("cost_usd") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _db_today(cur) -> date:
+    """
+    Redshift's current (UTC) date at the start of the caller's transaction.
+
+    Counters are bucketed on this rather than the app server's local date so
+    they land on the same day as created_ts / reviewed_ts and as
+    rebuild_counters, whatever timezone the host runs in. Decisions set
+    reviewed_ts = SYSDATE, the same transaction clock.
     """
-    values = []
+    cur.execute("SELECT TRUNC(SYSDATE)")
+    return cur.fetchone()[0]
+
+
+def _generation_deltas(rows: List[Dict[str, Any]], today: date) -> Dict[tuple, Dict[str, float]]:
+    deltas = defaultdict(lambda: defaultdict(float))
     for r in rows:
-        values.append(
-            (
-                r.get("id"),
-                r.get("image_id_pos_0"),
-                _s(r.get("image_url_pos_0"), 1024),
-                _s(r.get("s3_url"), 1024),
-                _s(r.get("prompt_source"), 256),
-                _s(r.get("prompt"), 65535),
-                _s(r.get("token_info"), 65535),
-                _s(r.get("vertical"), 64),
-                _s(r.get("category_name"), 256),
-                _s(r.get("sub_category_name"), 256),
+        d = deltas[_counter_key(today, r)]
+        d["generated_count"] += 1
+        d["pending_count"] += 1
+        d["cost_usd"] += _row_cost(r)
+    return deltas
+
+
+# Columns read before a status change so its counter deltas land on the right days
+_TRANSITION_COLUMNS = "status, vertical, category_name, prompt_source, TRUNC(created_ts), TRUNC(reviewed_ts)"
+
+
+def _add_transition(deltas, before: tuple, status: str, today: date) -> None:
+    """
+    Counter deltas for one row moving from its current status to status.
+
+    generated/pending (and cost) belong to the day the row was created;
+    approved/rejected to the day it was decided. rebuild_counters uses the
+    same semantics, so incremental counts and a rebuild agree.
+    """
+    old_status, vertical, category_name, prompt_source, created_day, reviewed_day = before
+    if old_status == status:
+        return
+    dims = {"vertical": vertical, "category_name": category_name, "prompt_source": prompt_source}
+    created_day = created_day or today
+    if old_status == "pending":
+        deltas[_counter_key(created_day, dims)]["pending_count"] -= 1
+    elif old_status in ("approved", "rejected"):
+        deltas[_counter_key(reviewed_day or created_day, dims)][f"{old_status}_count"] -= 1
+    if status == "pending":
+        deltas[_counter_key(created_day, dims)]["pending_count"] += 1
+    elif status in ("approved", "rejected"):
+        deltas[_counter_key(today, dims)][f"{status}_count"] += 1
+
+
+def _bump_counters(cur, deltas: Dict[tuple, Dict[str, float]]) -> None:
+    """Apply counter deltas; the caller commits alongside the change they describe."""
+    for key, delta in deltas.items():
+        params = tuple(delta.get(c, 0) for c in COUNTER_COLUMNS)
+        cur.execute(
+            f"""
+            UPDATE temp.image_approval_counters
+            SET {', '.join(f'{c} = {c} + %s' for c in COUNTER_COLUMNS)}
+            WHERE metric_date = %s AND vertical = %s AND category_name = %s AND prompt_source = %s
+            """,
+            params + key,
+        )
+        if cur.rowcount == 0:
+            cur.execute(
+                f"""
+                INSERT INTO temp.image_approval_counters
+                  (metric_date, vertical, category_name, prompt_source, {', '.join(COUNTER_COLUMNS)})
+                VALUES (%s, %s, %s, %s, {', '.join(['%s'] * len(COUNTER_COLUMNS))})
+                """,
+                key + params,
+            )
+
+
+def rebuild_counters() -> None:
+    """Recompute all counters from temp.image_to_approve (one-off backfill or repair)."""
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM temp.image_approval_counters")
+            cur.execute(
+                """
+                INSERT INTO temp.image_approval_counters
+                  (metric_date, vertical, category_name, prompt_source,
+                   generated_count, approved_count, rejected_count, pending_count, cost_usd)
+                SELECT metric_date, vertical, category_name, prompt_source,
+                       SUM(generated), SUM(approved), SUM(rejected), SUM(pending), SUM(cost)
+                FROM (
+                  -- generated/pending/cost on the day the row was created
+                  SELECT TRUNC(created_ts) AS metric_date, COALESCE(vertical, '') AS vertical,
+                         COALESCE(category_name, '') AS category_name,
+                         COALESCE(prompt_source, '') AS prompt_source,
+                         1 AS generated, 0 AS approved, 0 AS rejected,
+                         CASE WHEN status = 'pending' THEN 1 ELSE 0 END AS pending,
+                         COALESCE(cost_usd, 0) AS cost
+                  FROM temp.image_to_approve
+                  UNION ALL
+                  -- outcomes on the day they were decided
+                  SELECT TRUNC(COALESCE(reviewed_ts, created_ts)), COALESCE(vertical, ''),
+                         COALESCE(category_name, ''), COALESCE(prompt_source, ''),
+                         0, CASE WHEN status = 'approved' THEN 1 ELSE 0 END,
+                         CASE WHEN status = 'rejected' THEN 1 ELSE 0 END, 0, 0
+                  FROM temp.image_to_approve
+                  WHERE status IN ('approved', 'rejected')
+                ) t
+                GROUP BY 1, 2, 3, 4
+                """
+            )
+            conn.commit()
+
+
+def insert_cost_entries(entries: List[Dict[str, Any]]) -> None:
+    """Persist cost ledger entries to temp.image_generation_cost (the source of spend on the dashboard)."""
+    if not entries:
+        return
+    # Naive UTC, like GETDATE(), so spend lands on the same day as the counters
+    values = [
+        (
+            _s(e.get("batch_id"), 32), e.get("deal_voucher_id"), _s(e.get("model"), 64),
+            _s(e.get("quality"), 16), _s(e.get("size"), 16), e.get("input_text_tokens"),
+            e.get("input_image_tokens"), e.get("output_tokens"), e.get("cost_usd"),
+            datetime.fromtimestamp(e.get("created_ts") or time.time(), timezone.utc).replace(tzinfo=None),
+            _s(e.get("prompt_source"), 256),
+        )
+        for e in entries
+    ]
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                INSERT INTO temp.image_generation_cost
+                  (batch_id, deal_voucher_id, model, quality, size, input_text_tokens,
+                   input_image_tokens, output_tokens, cost_usd, created_ts, prompt_source)
+                VALUES %s
+                """,
+                values,
+                page_size=CFG.ingest.page_size,
             )
+            conn.commit()
+
+
+def _s3_client():
+    return boto3.client(
+        's3',
+        aws_access_key_id=CFG.aws.access_key_id,
+        aws_secret_access_key=CFG.aws.secret_access_key,
+        endpoint_url=CFG.aws.endpoint_url or None,
+    )
+
+
+def _insert_values(cur, values: List[tuple]) -> None:
+    sql = f"INSERT INTO temp.image_to_approve ({', '.join(INSERT_COLUMNS)}) VALUES %s"
+    execute_values(cur, sql, values, page_size=CFG.ingest.page_size)
+
+
+def _copy_values(cur, values: List[tuple]) -> None:
+    """Stage rows as a CSV object in the private staging bucket and load them with a single COPY."""
+    buf = io.StringIO()
+    csv.writer(buf).writerows(values)
+    bucket = CFG.ingest.staging_bucket
+    key = f"{CFG.ingest.staging_prefix}/{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}.csv"
+    s3 = _s3_client()
+    s3.put_object(Body=buf.getvalue().encode('utf-8'), Bucket=bucket, Key=key, ContentType='text/csv')
+    try:
+        cur.execute(
+            f"""
+            COPY temp.image_to_approve ({', '.join(INSERT_COLUMNS)})
+            FROM %s
+            ACCESS_KEY_ID %s
+            SECRET_ACCESS_KEY %s
+            CSV
+            EMPTYASNULL
+            ACCEPTINVCHARS AS '^'
+            """,
+            (f"s3://{bucket}/{key}", CFG.aws.access_key_id, CFG.aws.secret_access_key),
         )
+    finally:
+        try:
+            s3.delete_object(Bucket=bucket, Key=key)
+        except Exception as e:
+            print(f"[approval_store] failed to delete staging object {key}: {e}")
+
+
+def _copy_available() -> bool:
+    """COPY needs a private staging bucket; the public image bucket is served through the CDN."""
+    global _WARNED_NO_STAGING
+    if CFG.ingest.staging_bucket:
+        return True
+    if not _WARNED_NO_STAGING:
+        print("[approval_store] INGEST_STAGING_BUCKET not set; large batches use execute_values instead of COPY")
+        _WARNED_NO_STAGING = True
+    return False
+
+
+def insert_generation_rows(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    values = [_row_values(r) for r in rows]
+    use_copy = len(values) >= CFG.ingest.copy_threshold and _copy_available()
     with redshift_conn() as conn:
         with conn.cursor() as cur:
+            # Templates must land even if the bulk insert falls back to per-row
+            _store_prompt_templates(cur, rows)
+            conn.commit()
+            _KNOWN_PROMPT_HASHES.update(r["prompt_hash"] for r in rows if r.get("prompt_hash"))
             try:
-                cur.executemany(sql, values)
+                if use_copy:
+                    _copy_values(cur, values)
+                else:
+                    _insert_values(cur, values)
+                _bump_counters(cur, _generation_deltas(rows, _db_today(cur)))
                 conn.commit()
+                print(f"[approval_store] inserted {len(values)} rows via {'COPY' if use_copy else 'execute_values'}")
             except Exception as e:
                 conn.rollback()
                 # Fallback to per-row to locate offending data and still insert others
+                sql = f"INSERT INTO temp.image_to_approve ({', '.join(INSERT_COLUMNS)}) VALUES ({','.join(['%s'] * len(INSERT_COLUMNS))})"
                 inserted = 0
-                for v in values:
+                for r, v in zip(rows, values):
                     try:
                         cur.execute(sql, v)
+                        _bump_counters(cur, _generation_deltas([r], _db_today(cur)))
                         inserted += 1
                         conn.commit()
                     except Exception as inner:
@@ -99,9 +446,9 @@ def insert_generation_rows(rows: List[Dict[str, Any]]) -> None:
 
 def list_pending(limit: int = 100, offset: int = 0):
     sql = """
-    SELECT id, deal_voucher_id, image_id_pos_0, original_url, variant_s3_url,
-           prompt_source, prompt, vertical, category_name, sub_category_name,
-           created_ts
+    SELECT id, deal_voucher_id, image_id_pos_0, original_url, variant_s3_url, compare_url,
+           prompt_source, prompt_hash, vertical, category_name, sub_category_name,
+           created_ts, alternate_urls, quality, phase, prescreen_flags
     FROM temp.image_to_approve
     WHERE status = 'pending'
     ORDER BY created_ts DESC
@@ -114,13 +461,303 @@ def list_pending(limit: int = 100, offset: int = 0):
             return [dict(zip(cols, row)) for row in cur.fetchall()]
 
 
-def update_review(item_id: int, status: str, reviewer: str, notes: str) -> None:
+# Concurrent batches can both pass _store_prompt_templates' NOT EXISTS check and
+# store the same hash twice; joins take the oldest row so each hash matches once
+_PROMPT_TEMPLATES = """
+    (SELECT prompt_hash, template
+     FROM (SELECT prompt_hash, template,
+                  ROW_NUMBER() OVER (PARTITION BY prompt_hash ORDER BY created_ts) AS rn
+           FROM temp.image_prompt_template) ranked
+     WHERE rn = 1)"""
+
+
+def get_prompt_text(item_id: int):
+    """Render the prompt for one row on demand from its template and substitution values."""
+    sql = f"""
+    SELECT a.prompt, t.template, a.prompt_vars
+    FROM temp.image_to_approve a
+    LEFT JOIN {_PROMPT_TEMPLATES} t ON t.prompt_hash = a.prompt_hash
+    WHERE a.id = %s
+    LIMIT 1
+    """
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (item_id,))
+            row = cur.fetchone()
+    if row is None:
+        return None
+    prompt, template, prompt_vars = row
+    if prompt is not None or template is None:
+        return prompt
+    return PromptManager.render(template, json.loads(prompt_vars or "{}"))
+
+
+# A pending row the reviewer (bound to %s) may change: unleased, leased by them, or the lease expired
+_DECIDABLE = """
+    status = 'pending'
+      AND (lease_owner IS NULL OR lease_owner = %s OR lease_expires_ts < GETDATE())
+"""
+
+
+def _apply_review(cur, item_id: int, status: str, reviewer: str, notes: str, lease_owner: str = None) -> bool:
+    """Record a decision and bump counters; with lease_owner, only if the caller may decide the row."""
     sql = """
     UPDATE temp.image_to_approve
-    SET status = %s, reviewer = %s, review_notes = %s, reviewed_ts = GETDATE()
+    SET status = %s, reviewer = %s, review_notes = %s, reviewed_ts = SYSDATE,
+        lease_owner = NULL, lease_expires_ts = NULL
     WHERE id = %s
     """
+    params = (status, reviewer, notes, item_id)
+    if lease_owner is not None:
+        sql += f" AND {_DECIDABLE}"
+        params += (lease_owner,)
+    cur.execute(f"SELECT {_TRANSITION_COLUMNS} FROM temp.image_to_approve WHERE id = %s", (item_id,))
+    before = cur.fetchone()
+    cur.execute(sql, params)
+    if cur.rowcount == 0:
+        return False
+    if before is not None:
+        deltas = defaultdict(lambda: defaultdict(float))
+        _add_transition(deltas, before, status, _db_today(cur))
+        _bump_counters(cur, deltas)
+    return True
+
+
+def update_review(item_id: int, status: str, reviewer: str, notes: str) -> None:
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            _apply_review(cur, item_id, status, reviewer, notes)
+            conn.commit()
+
+
+def list_approved_previews(limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Approved previews that don't have a final yet, shaped as deals for the
+    generation service (prompt template and values included).
+    """
+    sql = f"""
+    SELECT a.id AS preview_id, a.deal_voucher_id AS id, a.image_id_pos_0,
+           a.original_url AS image_url_pos_0, a.variant_s3_url AS preview_url,
+           a.vertical, a.category_name, a.sub_category_name, a.prompt_source,
+           COALESCE(t.template, a.prompt) AS prompt_template, a.prompt_hash, a.prompt_vars
+    FROM temp.image_to_approve a
+    LEFT JOIN {_PROMPT_TEMPLATES} t ON t.prompt_hash = a.prompt_hash
+    WHERE a.phase = 'preview' AND a.status = 'approved'
+      AND NOT EXISTS (SELECT 1 FROM temp.image_to_approve f WHERE f.parent_id = a.id)
+    ORDER BY a.reviewed_ts
+    LIMIT %s
+    """
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (limit,))
+            cols = [c[0] for c in cur.description]
+            rows = [dict(zip(cols, row)) for row in cur.fetchall()]
+    # Rows stored before templates were split out keep the rendered prompt and no vars
+    for r in rows:
+        if not r["prompt_hash"]:
+            r["prompt_vars"] = None
+    return rows
+
+
+def retire_finalized_previews() -> int:
+    """Mark approved previews whose final is queued as 'finalized' so approved counts only cover finals."""
+    finalized = """
+    phase = 'preview' AND status = 'approved'
+      AND id IN (SELECT parent_id FROM temp.image_to_approve WHERE parent_id IS NOT NULL)
+    """
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {_TRANSITION_COLUMNS} FROM temp.image_to_approve WHERE {finalized}")
+            deltas = defaultdict(lambda: defaultdict(float))
+            rows = cur.fetchall()
+            today = _db_today(cur)
+            for before in rows:
+                _add_transition(deltas, before, "finalized", today)
+            # Reviewer and notes are kept: they record who approved the preview
+            cur.execute(f"UPDATE temp.image_to_approve SET status = 'finalized' WHERE {finalized}")
+            _bump_counters(cur, deltas)
+            conn.commit()
+    return len(rows)
+
+
+def record_final_failures(preview_ids: List[int], max_attempts: int) -> int:
+    """
+    Count a failed final run against each approved preview; previews that reach
+    max_attempts are marked 'final_failed' so finalize runs stop paying for them.
+    Returns the number given up on.
+    """
+    ids = tuple(int(i) for i in preview_ids)
+    if not ids:
+        return 0
+    exhausted = "id IN %s AND phase = 'preview' AND status = 'approved' AND final_attempts >= %s"
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE temp.image_to_approve SET final_attempts = COALESCE(final_attempts, 0) + 1 "
+                "WHERE id IN %s AND phase = 'preview' AND status = 'approved'",
+                (ids,),
+            )
+            cur.execute(f"SELECT {_TRANSITION_COLUMNS} FROM temp.image_to_approve WHERE {exhausted}", (ids, max_attempts))
+            rows = cur.fetchall()
+            deltas = defaultdict(lambda: defaultdict(float))
+            today = _db_today(cur)
+            for before in rows:
+                _add_transition(deltas, before, "final_failed", today)
+            cur.execute(f"UPDATE temp.image_to_approve SET status = 'final_failed' WHERE {exhausted}", (ids, max_attempts))
+            _bump_counters(cur, deltas)
+            conn.commit()
+    return len(rows)
+
+
+def promote_alternate(item_id: int, reviewer: str, notes: str = "") -> bool:
+    """
+    Serve "Regenerate" from a stored alternate candidate: swap the next one in
+    as the variant and keep the item pending.
+
+    Like a decision, only allowed while the row is pending and not leased to
+    another reviewer. False if none are left or the row can't be changed.
+    """
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SELECT alternate_urls FROM temp.image_to_approve WHERE id = %s AND {_DECIDABLE}",
+                (item_id, reviewer),
+            )
+            row = cur.fetchone()
+            if row is None:
+                print(f"[approval_store] item {item_id} not promoted: already decided or leased by another reviewer")
+                return False
+            alternates = json.loads(row[0]) if row[0] else []
+            if not alternates:
+                return False
+            cur.execute(
+                f"""
+                UPDATE temp.image_to_approve
+                SET variant_s3_url = %s, alternate_urls = %s, compare_url = NULL,
+                    reviewer = %s, review_notes = %s, lease_owner = NULL, lease_expires_ts = NULL
+                WHERE id = %s AND {_DECIDABLE}
+                """,
+                (alternates[0], json.dumps(alternates[1:]) if alternates[1:] else None, reviewer, notes,
+                 item_id, reviewer),
+            )
+            promoted = cur.rowcount == 1
+            conn.commit()
+    if not promoted:
+        print(f"[approval_store] item {item_id} not promoted: changed by another reviewer")
+    return promoted
+
+
+def update_reviews_batch(item_ids: List[int], status: str, reviewer: str, notes: str = "") -> int:
+    """Apply one decision to many pending items in a single UPDATE and transaction; returns rows updated.
+
+    Rows already decided, or leased to another reviewer, are left alone, so a
+    stale grid page can't overwrite them.
+    """
+    ids = tuple(int(i) for i in item_ids)
+    if not ids:
+        return 0
+    decidable = f"id IN %s AND {_DECIDABLE}"
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            # Same predicate as the UPDATE inside one serialisable transaction,
+            # so the counters move for exactly the rows that change
+            cur.execute(
+                f"SELECT {_TRANSITION_COLUMNS} FROM temp.image_to_approve WHERE {decidable}",
+                (ids, reviewer),
+            )
+            before = cur.fetchall()
+            cur.execute(
+                f"""
+                UPDATE temp.image_to_approve
+                SET status = %s, reviewer = %s, review_notes = %s, reviewed_ts = SYSDATE,
+                    lease_owner = NULL, lease_expires_ts = NULL
+                WHERE {decidable}
+                """,
+                (status, reviewer, notes, ids, reviewer),
+            )
+            updated = cur.rowcount
+            deltas = defaultdict(lambda: defaultdict(float))
+            today = _db_today(cur)
+            for row in before:
+                _add_transition(deltas, row, status, today)
+            _bump_counters(cur, deltas)
+            conn.commit()
+    return updated
+
+
+def lease_pending(reviewer: str, batch_size: int = 20, lease_seconds: int = 600) -> List[Dict[str, Any]]:
+    """Lease up to batch_size pending rows to reviewer and return every row they currently hold.
+
+    Redshift runs concurrent writers serialisably, so two reviewers leasing at
+    once cannot both claim a row; the loser gets a serialization error and retries.
+    """
+    claim_sql = """
+    UPDATE temp.image_to_approve
+    SET lease_owner = %s, lease_expires_ts = DATEADD(second, %s, GETDATE())
+    WHERE id IN (
+      SELECT id FROM temp.image_to_approve
+      WHERE status = 'pending'
+        AND (lease_owner IS NULL OR lease_expires_ts < GETDATE())
+      ORDER BY created_ts
+      LIMIT %s
+    )
+    """
+    held_sql = """
+    SELECT id, deal_voucher_id, image_id_pos_0, original_url, variant_s3_url, compare_url,
+           prompt_source, vertical, category_name, sub_category_name, created_ts, lease_expires_ts,
+           prescreen_flags
+    FROM temp.image_to_approve
+    WHERE status = 'pending' AND lease_owner = %s AND lease_expires_ts >= GETDATE()
+    ORDER BY created_ts
+    """
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            for attempt in range(3):
+                try:
+                    cur.execute(
+                        "SELECT COUNT(*) FROM temp.image_to_approve "
+                        "WHERE status = 'pending' AND lease_owner = %s AND lease_expires_ts >= GETDATE()",
+                        (reviewer,),
+                    )
+                    wanted = batch_size - cur.fetchone()[0]
+                    if wanted > 0:
+                        cur.execute(claim_sql, (reviewer, lease_seconds, wanted))
+                    conn.commit()
+                    break
+                except psycopg2.Error as e:
+                    conn.rollback()
+                    # Redshift reports these as error 1023 rather than SQLSTATE 40001
+                    retryable = e.pgcode == "40001" or "Serializable isolation violation" in str(e)
+                    if not retryable or attempt == 2:
+                        raise
+            cur.execute(held_sql, (reviewer,))
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+
+def decide_leased(item_id: int, reviewer: str, status: str, notes: str = "") -> bool:
+    """Record a decision for a leased row; False if another reviewer holds or already decided it."""
     with redshift_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, (status, reviewer, notes, item_id))
+            ok = _apply_review(cur, item_id, status, reviewer, notes, lease_owner=reviewer)
+            conn.commit()
+            return ok
+
+
+def status_counts() -> Dict[str, int]:
+    """Number of rows per review status (the shared-queue progress summary)."""
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT status, COUNT(*) FROM temp.image_to_approve GROUP BY status")
+            return {status: int(count) for status, count in cur.fetchall()}
+
+
+def release_leases(reviewer: str) -> None:
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE temp.image_to_approve SET lease_owner = NULL, lease_expires_ts = NULL "
+                "WHERE lease_owner = %s AND status = 'pending'",
+                (reviewer,),
+            )
             conn.commit()
@@ -0,0 +1,48 @@
+import io
+from typing import List, Tuple
+import numpy as np
+from PIL import Image
+
+# Candidates are scored on a small thumbnail; the heuristics don't need full resolution
+RANK_SIZE = 256
+
+
+def _thumbnail(data: bytes) -> np.ndarray:
+    img = Image.open(io.BytesIO(data))
+    img.draft("RGB", (RANK_SIZE * 2, RANK_SIZE * 2))
+    img = img.convert("RGB")
+    img.thumbnail((RANK_SIZE, RANK_SIZE))
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def score_image(data: bytes) -> float:
+    """
+    Cheap CPU quality score in [0, 1]; higher is better.
+
+    Rewards sharpness (variance of the Laplacian), contrast and colourfulness,
+    and penalises clipped shadows/highlights. Only meant to order candidates
+    of the same prompt, not to compare unrelated images.
+    """
+    rgb = _thumbnail(data)
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    lap = 4 * gray[1:-1, 1:-1] - gray[:-2, 1:-1] - gray[2:, 1:-1] - gray[1:-1, :-2] - gray[1:-1, 2:]
+    sharpness = min(1.0, float(lap.var()) / 0.01)
+    contrast = min(1.0, float(gray.std()) / 0.25)
+    rg = rgb[..., 0] - rgb[..., 1]
+    yb = 0.5 * (rgb[..., 0] + rgb[..., 1]) - rgb[..., 2]
+    colourfulness = min(1.0, float(np.hypot(rg.std(), yb.std()) + 0.3 * np.hypot(rg.mean(), yb.mean())) / 0.4)
+    clipped = float(((gray < 0.02) | (gray > 0.98)).mean())
+    score = 0.45 * sharpness + 0.3 * contrast + 0.25 * colourfulness - 0.5 * clipped
+    return round(max(0.0, min(1.0, score)), 4)
+
+
+def rank_candidates(candidates: List[bytes]) -> List[Tuple[int, float]]:
+    """(index, score) for each candidate, best first; unreadable images rank last."""
+    scored = []
+    for i, data in enumerate(candidates):
+        try:
+            scored.append((i, score_image(data)))
+        except Exception as e:
+            print(f"[ranking] Could not score candidate {i}: {e}")
+            scored.append((i, -1.0))
+    return sorted(scored, key=lambda s: s[1], reverse=True)
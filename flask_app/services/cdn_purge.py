@@ -0,0 +1,193 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+import requests
+
+# Cloudflare accepts at most 30 URLs per purge-by-URL request
+PURGE_BATCH_SIZE = 30
+DEFAULT_API_BASE = "https://api.cloudflare.com/client/v4"
+
+
+class RateLimiter:
+    """Token bucket shared by the purge workers."""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class PurgeQueue:
+    """
+    Background Cloudflare purge-by-URL queue.
+
+    Upload paths call enqueue() and move on. A collector thread coalesces
+    URLs (deduplicated) into batches of 30, flushing a partial batch after
+    linger_seconds, and a small pool sends the batches concurrently under a
+    shared rate limit, retrying 429/5xx responses with backoff. Latency is
+    measured from enqueue to a successful purge.
+    """
+
+    def __init__(self, zone_id: str, api_token: str, api_base: str = DEFAULT_API_BASE,
+                 batch_size: int = PURGE_BATCH_SIZE, max_workers: int = 4,
+                 requests_per_second: float = 4.0, max_retries: int = 5,
+                 linger_seconds: float = 1.0, timeout: float = 30.0):
+        self.api_url = f"{api_base.rstrip('/')}/zones/{zone_id}/purge_cache"
+        self.headers = {"Authorization": f"Bearer {api_token}", "Content-Type": "application/json"}
+        self.batch_size = min(batch_size, PURGE_BATCH_SIZE)
+        self.max_retries = max_retries
+        self.linger_seconds = linger_seconds
+        self.timeout = timeout
+        self.limiter = RateLimiter(requests_per_second, burst=max_workers)
+        self.session = requests.Session()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cdn-purge")
+        self.cond = threading.Condition()
+        self.waiting = OrderedDict()  # url -> enqueue time
+        self.in_flight = 0
+        self.closed = False
+        self.stats_lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.purged = 0
+        self.failed: List[str] = []
+        self.requests_sent = 0
+        self.retries = 0
+        self.collector = threading.Thread(target=self._collect, name="cdn-purge-collector", daemon=True)
+        self.collector.start()
+
+    def enqueue(self, urls: Iterable[Optional[str]]) -> None:
+        if isinstance(urls, str):
+            urls = [urls]
+        now = time.monotonic()
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("purge queue is closed")
+            for url in urls:
+                if url and url not in self.waiting:
+                    self.waiting[url] = now
+            self.cond.notify_all()
+
+    def _collect(self) -> None:
+        while True:
+            with self.cond:
+                while not self.waiting and not self.closed:
+                    self.cond.wait()
+                if not self.waiting and self.closed:
+                    return
+                # Give a partial batch a moment to fill up before sending it
+                oldest = next(iter(self.waiting.values()))
+                while (len(self.waiting) < self.batch_size and not self.closed
+                       and time.monotonic() - oldest < self.linger_seconds):
+                    self.cond.wait(self.linger_seconds - (time.monotonic() - oldest))
+                batch = []
+                while self.waiting and len(batch) < self.batch_size:
+                    batch.append(self.waiting.popitem(last=False))
+                self.in_flight += 1
+            self.pool.submit(self._send, batch)
+
+    def _send(self, batch) -> None:
+        urls = [url for url, _ in batch]
+        ok = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                self.limiter.acquire()
+                delay = min(30.0, 2 ** attempt)
+                try:
+                    with self.stats_lock:
+                        self.requests_sent += 1
+                    resp = self.session.post(self.api_url, json={"files": urls}, headers=self.headers, timeout=self.timeout)
+                    if resp.status_code == 429 or resp.status_code >= 500:
+                        delay = float(resp.headers.get("Retry-After") or delay)
+                        raise RuntimeError(f"HTTP {resp.status_code}")
+                    if not resp.ok:
+                        # 4xx other than 429 won't succeed on retry, and the body may not be JSON
+                        print(f"[cdn_purge] Purge rejected ({resp.status_code}): {resp.text[:200]}")
+                        break
+                    try:
+                        body = resp.json()
+                    except ValueError:
+                        body = {}
+                    if not body.get("success", False):
+                        print(f"[cdn_purge] Purge rejected ({resp.status_code}): {body.get('errors') or resp.text[:200]}")
+                        break
+                    ok = True
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        print(f"[cdn_purge] Purge of {len(urls)} URLs failed after {attempt + 1} attempts: {e}")
+                        break
+                    with self.stats_lock:
+                        self.retries += 1
+                    time.sleep(delay)
+        finally:
+            done = time.monotonic()
+            with self.stats_lock:
+                if ok:
+                    self.purged += len(urls)
+                    self.latencies.extend(done - queued for _, queued in batch)
+                else:
+                    self.failed.extend(urls)
+            with self.cond:
+                self.in_flight -= 1
+                self.cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send anything waiting without lingering and block until all purges finish."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            self.linger_seconds, linger = 0, self.linger_seconds
+            self.cond.notify_all()
+            try:
+                while self.waiting or self.in_flight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self.cond.wait(remaining)
+                return True
+            finally:
+                self.linger_seconds = linger
+
+    def close(self, timeout: Optional[float] = None) -> dict:
+        self.flush(timeout)
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.collector.join(timeout)
+        self.pool.shutdown(wait=True)
+        return self.stats()
+
+    def stats(self) -> dict:
+        with self.stats_lock:
+            latencies = sorted(self.latencies)
+            pct = lambda p: round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+            return {
+                'purged': self.purged,
+                'failed': len(self.failed),
+                'requests': self.requests_sent,
+                'retries': self.retries,
+                'latency_p50_s': pct(0.5),
+                'latency_p95_s': pct(0.95),
+                'latency_max_s': round(latencies[-1], 3) if latencies else None,
+            }
+
+
+def purge_urls(urls: Iterable[str], zone_id: str, api_token: str, **kwargs) -> dict:
+    """Purge a list of URLs and wait for completion; returns the queue stats."""
+    queue = PurgeQueue(zone_id, api_token, **kwargs)
+    queue.enqueue(urls)
+    return queue.close()
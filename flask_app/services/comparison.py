@@ -0,0 +1,38 @@
+import io
+import re
+from PIL import Image
+
+# Height of each half of the comparison image; widths follow the source aspect ratios
+COMPARE_HEIGHT = 420
+COMPARE_GAP = 8
+COMPARE_QUALITY = 80
+
+
+def _fit_height(data: bytes, height: int) -> Image.Image:
+    img = Image.open(io.BytesIO(data))
+    width = max(1, round(img.width * height / img.height))
+    # draft() lets the JPEG decoder skip straight to a reduced scale before loading
+    img.draft("RGB", (width, height))
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img.resize((width, height), Image.LANCZOS)
+
+
+def render_comparison(original: bytes, variant: bytes, height: int = COMPARE_HEIGHT, quality: int = COMPARE_QUALITY) -> bytes:
+    """Render original and variant side by side as one compact JPEG for review."""
+    left = _fit_height(original, height)
+    right = _fit_height(variant, height)
+    canvas = Image.new("RGB", (left.width + COMPARE_GAP + right.width, height), (255, 255, 255))
+    canvas.paste(left, (0, 0))
+    canvas.paste(right, (left.width + COMPARE_GAP, 0))
+    out = io.BytesIO()
+    canvas.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def comparison_key(variant_key: str) -> str:
+    """S3 key of the comparison image stored next to a variant key."""
+    stem = variant_key.rsplit(".", 1)[0]
+    # Also accept content-addressed variant keys (<image>_variant.<hash>.jpg)
+    stem = re.sub(r"_variant(\.[0-9a-f]{16})?$", "", stem)
+    return f"{stem}_compare.jpg"
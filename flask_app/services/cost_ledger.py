@@ -0,0 +1,125 @@
+import time
+import uuid
+import threading
+from typing import Any, Dict, List, Optional
+from ..config import AppConfig
+
+CFG = AppConfig()
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised instead of starting an OpenAI call once the batch budget is spent."""
+
+
+def _get(obj, name: str, default=0):
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def usage_cost(usage) -> Dict[str, Any]:
+    """Token counts and USD cost of one images.edit call from its result.usage."""
+    details = _get(usage, "input_tokens_details", None)
+    text_tokens = int(_get(details, "text_tokens") or 0)
+    image_tokens = int(_get(details, "image_tokens") or 0)
+    output_tokens = int(_get(usage, "output_tokens") or 0)
+    cost = (
+        text_tokens * CFG.costs.input_text_usd_per_m
+        + image_tokens * CFG.costs.input_image_usd_per_m
+        + output_tokens * CFG.costs.output_usd_per_m
+    ) / 1_000_000
+    return {
+        "input_text_tokens": text_tokens,
+        "input_image_tokens": image_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": int(_get(usage, "total_tokens") or text_tokens + image_tokens + output_tokens),
+        "cost_usd": round(cost, 6),
+    }
+
+
+class CostLedger:
+    """
+    Per-batch record of every images.edit call and what it cost.
+
+    With a budget, each call reserves an estimate (the running average cost,
+    seeded from config) before it starts and settles it when usage comes back,
+    so concurrent workers stop picking up new work before the cap is crossed
+    rather than after.
+    """
+
+    def __init__(self, budget_usd: Optional[float] = None, batch_id: Optional[str] = None):
+        self.batch_id = batch_id or uuid.uuid4().hex[:16]
+        self.budget_usd = budget_usd if budget_usd and budget_usd > 0 else None
+        self.lock = threading.Lock()
+        self.entries: List[Dict[str, Any]] = []
+        self.spent_usd = 0.0
+        self.reserved_usd = 0.0
+        self.skipped = 0
+        # entries[:persisted] have been written to temp.image_generation_cost
+        self.persisted = 0
+
+    def estimate(self) -> float:
+        if self.entries:
+            return self.spent_usd / len(self.entries)
+        # The configured estimate is for one image; a call asking for n candidates outputs n
+        return CFG.costs.estimated_call_usd * max(1, CFG.generation.candidates)
+
+    def reserve(self) -> float:
+        """Claim budget for one call; raises BudgetExceeded when it would overrun."""
+        with self.lock:
+            estimate = self.estimate()
+            if self.budget_usd is not None and self.spent_usd + self.reserved_usd + estimate > self.budget_usd:
+                self.skipped += 1
+                raise BudgetExceeded(
+                    f"batch budget ${self.budget_usd:.2f} reached (spent ${self.spent_usd:.4f})"
+                )
+            self.reserved_usd += estimate
+            return estimate
+
+    def release(self, reservation: float) -> None:
+        with self.lock:
+            self.reserved_usd = max(0.0, self.reserved_usd - reservation)
+
+    def record(self, deal_id, usage, reservation: float = 0.0, model: str = "", quality: str = "", size: str = "",
+               prompt_source: str = None) -> Dict[str, Any]:
+        entry = {
+            "batch_id": self.batch_id,
+            "deal_voucher_id": deal_id,
+            "model": model,
+            "quality": quality,
+            "size": size,
+            "prompt_source": prompt_source,
+            **usage_cost(usage),
+            "created_ts": time.time(),
+        }
+        with self.lock:
+            self.reserved_usd = max(0.0, self.reserved_usd - reservation)
+            self.spent_usd += entry["cost_usd"]
+            self.entries.append(entry)
+        return entry
+
+    def unpersisted(self) -> List[Dict[str, Any]]:
+        """Entries not yet written out; pass their count to mark_persisted once stored."""
+        with self.lock:
+            return self.entries[self.persisted:]
+
+    def mark_persisted(self, count: int) -> None:
+        with self.lock:
+            self.persisted += count
+
+    @property
+    def exhausted(self) -> bool:
+        with self.lock:
+            return self.budget_usd is not None and self.spent_usd + self.reserved_usd + self.estimate() > self.budget_usd
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "batch_id": self.batch_id,
+                "calls": len(self.entries),
+                "spent_usd": round(self.spent_usd, 6),
+                "budget_usd": self.budget_usd,
+                "skipped_for_budget": self.skipped,
+            }
@@ -0,0 +1,126 @@
+import time
+import threading
+from typing import Dict, Any
+from ..config import AppConfig
+from ..db.redshift import redshift_conn
+
+CFG = AppConfig()
+
+# Windows the dashboard offers; requests snap to one of these so the cache stays bounded
+ALLOWED_DAYS = (7, 14, 30, 90)
+
+_CACHE: Dict[int, tuple] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def clamp_days(days) -> int:
+    """Smallest allowed window covering days (the largest one beyond that)."""
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        return 14
+    return next((d for d in ALLOWED_DAYS if days <= d), ALLOWED_DAYS[-1])
+
+
+def _fetch(cur, sql: str, params: tuple = ()):
+    cur.execute(sql, params)
+    cols = [c[0] for c in cur.description]
+    return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+
+# Spend comes from the per-call ledger rather than the counters: calls whose
+# image never reached the queue (every candidate pre-screen rejected, or a
+# failure after the call) are paid for but have no temp.image_to_approve row.
+def _query_summary(days: int) -> Dict[str, Any]:
+    with redshift_conn() as conn:
+        with conn.cursor() as cur:
+            throughput = _fetch(cur, """
+                SELECT COALESCE(c.metric_date, s.metric_date) AS metric_date,
+                       COALESCE(c.generated, 0) AS generated,
+                       COALESCE(c.approved, 0) AS approved,
+                       COALESCE(c.rejected, 0) AS rejected,
+                       COALESCE(s.cost_usd, 0) AS cost_usd,
+                       s.cost_usd / NULLIF(c.approved, 0) AS cost_per_approved
+                FROM (
+                    SELECT metric_date,
+                           SUM(generated_count) AS generated,
+                           SUM(approved_count) AS approved,
+                           SUM(rejected_count) AS rejected
+                    FROM temp.image_approval_counters
+                    WHERE metric_date >= TRUNC(GETDATE()) - %s
+                    GROUP BY metric_date
+                ) c
+                FULL OUTER JOIN (
+                    SELECT TRUNC(created_ts) AS metric_date, CAST(SUM(cost_usd) AS FLOAT) AS cost_usd
+                    FROM temp.image_generation_cost
+                    WHERE created_ts >= TRUNC(GETDATE()) - %s
+                    GROUP BY 1
+                ) s ON s.metric_date = c.metric_date
+                ORDER BY 1 DESC
+            """, (days, days))
+            backlog = _fetch(cur, """
+                SELECT vertical, category_name, SUM(pending_count) AS pending
+                FROM temp.image_approval_counters
+                GROUP BY vertical, category_name
+                HAVING SUM(pending_count) > 0
+                ORDER BY pending DESC
+            """)
+            approval_rate = _fetch(cur, """
+                SELECT c.prompt_source, c.approved, c.rejected,
+                       CASE WHEN c.approved + c.rejected > 0
+                            THEN CAST(c.approved AS FLOAT) / (c.approved + c.rejected)
+                       END AS approval_rate,
+                       s.cost_usd / NULLIF(c.approved, 0) AS cost_per_approved
+                FROM (
+                    SELECT prompt_source,
+                           SUM(approved_count) AS approved,
+                           SUM(rejected_count) AS rejected
+                    FROM temp.image_approval_counters
+                    GROUP BY prompt_source
+                ) c
+                LEFT JOIN (
+                    SELECT COALESCE(prompt_source, '') AS prompt_source, CAST(SUM(cost_usd) AS FLOAT) AS cost_usd
+                    FROM temp.image_generation_cost
+                    GROUP BY 1
+                ) s ON s.prompt_source = c.prompt_source
+                ORDER BY c.approved DESC
+            """)
+            totals = _fetch(cur, """
+                SELECT c.generated, c.approved, c.rejected, c.pending,
+                       COALESCE(s.cost_usd, 0) AS cost_usd,
+                       s.cost_usd / NULLIF(c.approved, 0) AS cost_per_approved
+                FROM (
+                    SELECT SUM(generated_count) AS generated,
+                           SUM(approved_count) AS approved,
+                           SUM(rejected_count) AS rejected,
+                           SUM(pending_count) AS pending
+                    FROM temp.image_approval_counters
+                ) c
+                CROSS JOIN (
+                    SELECT CAST(SUM(cost_usd) AS FLOAT) AS cost_usd FROM temp.image_generation_cost
+                ) s
+            """)[0]
+    for row in throughput:
+        row["metric_date"] = row["metric_date"].isoformat()
+    return {
+        "days": days,
+        "totals": totals,
+        "throughput": throughput,
+        "backlog": backlog,
+        "approval_rate": approval_rate,
+        "generated_at": time.time(),
+    }
+
+
+def get_summary(days: int = 14) -> Dict[str, Any]:
+    """Dashboard aggregates from temp.image_approval_counters, cached for a short TTL."""
+    days = clamp_days(days)
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        hit = _CACHE.get(days)
+        if hit and now - hit[0] < CFG.dashboard.cache_ttl_seconds:
+            return hit[1]
+    summary = _query_summary(days)
+    with _CACHE_LOCK:
+        _CACHE[days] = (now, summary)
+    return summary
@@ -1,26 +1,67 @@
 import os
 import io
+import time
+import heapq
 import base64
+import json
 import tempfile
+import threading
 import requests
 import boto3
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import List, Dict, Any
 from openai import OpenAI
 from ..config import AppConfig
 from .prompt_manager import PromptManager
 from ..db.redshift import redshift_conn
-from .approval_store import insert_generation_rows
+from .approval_store import (
+    insert_generation_rows, insert_cost_entries, list_approved_previews, retire_finalized_previews,
+    record_final_failures,
+)
+from .comparison import render_comparison, comparison_key
+from .cdn_purge import PurgeQueue
+from .image_keys import publish_key
+from .cost_ledger import CostLedger, BudgetExceeded
+from .candidate_ranking import rank_candidates
+from .prescreen import screen_candidates, describe
+from .transcode import transcode_output, with_extension, content_type, TranscodeStats
 
 CFG = AppConfig()
 S3 = boto3.client('s3', aws_access_key_id=CFG.aws.access_key_id, aws_secret_access_key=CFG.aws.secret_access_key)
 OPENAI = OpenAI(api_key=CFG.openai.api_key)
 PROMPTS = PromptManager(prompts_folder='prompts')
+_PURGE_QUEUE = None
+_PURGE_LOCK = threading.Lock()
 
 
-def query_deals(category: str, limit: int = 10) -> pd.DataFrame:
-    sql = f"""
+def get_purge_queue():
+    """Process-wide CDN purge queue, or None when Cloudflare isn't configured."""
+    global _PURGE_QUEUE
+    if not (CFG.cdn.zone_id and CFG.cdn.api_token):
+        return None
+    with _PURGE_LOCK:
+        if _PURGE_QUEUE is None:
+            _PURGE_QUEUE = PurgeQueue(
+                CFG.cdn.zone_id, CFG.cdn.api_token, api_base=CFG.cdn.api_base,
+                max_workers=CFG.cdn.max_workers, requests_per_second=CFG.cdn.requests_per_second,
+                max_retries=CFG.cdn.max_retries,
+            )
+    return _PURGE_QUEUE
+
+
+def query_deals(category: str, limit: int = 10, skip_processed: bool = True, cooldown_days: int = None) -> pd.DataFrame:
+    """
+    Top deals by recent revenue for a category.
+
+    With skip_processed, deals are excluded in SQL when their current position-0
+    image already has a pending or approved variant created within the cooldown,
+    or a variant of that image is in test (temp.opt_image_variants status 1). The
+    number of top-`limit` deals excluded this way is logged and returned in
+    df.attrs['skipped_deals'].
+    """
+    cooldown_days = CFG.generation.skip_cooldown_days if cooldown_days is None else cooldown_days
+    sql = """
     WITH deal_revenue AS (
         SELECT t.deal_id, SUM(t.net) AS total_revenue
         FROM real.transactions t
@@ -30,33 +71,67 @@ def query_deals(category: str, limit: int = 10) -> pd.DataFrame:
           AND t.brand_id = 1
           AND t.domain = 'WOWCHER'
         GROUP BY t.deal_id
+    ),
+    queued_variants AS (
+        SELECT DISTINCT image_id_pos_0
+        FROM temp.image_to_approve
+        WHERE status IN ('pending', 'approved')
+          AND created_ts >= DATEADD(day, -%s, GETDATE())
+    ),
+    in_test AS (
+        SELECT DISTINCT original_image_id
+        FROM temp.opt_image_variants
+        WHERE status = 1
+    ),
+    candidates AS (
+        SELECT CAST(dv.id AS INTEGER) AS id,
+               dv.email_subject AS email_subject,
+               dvc.name AS category_name,
+               dvc.canonical_path_type as vertical,
+               dvsc.name AS sub_category_name,
+               CAST(COALESCE(dr.total_revenue, 0) AS DECIMAL(10,2)) AS revenue_last_7_days,
+               CAST(rank() OVER (ORDER BY COALESCE(dr.total_revenue, 0) DESC) AS INTEGER) AS revenue_rank,
+               dvi.id AS image_id_pos_0,
+               'https://static.wowcher.co.uk/images/deal/' || dvi.deal_voucher_id || '/' || dvi.id || '.' || dvi.extension AS image_url_pos_0,
+               dvi.extension,
+               CASE WHEN %s AND (qv.image_id_pos_0 IS NOT NULL OR it.original_image_id IS NOT NULL)
+                    THEN 1 ELSE 0 END AS already_processed
+        FROM real.deal_voucher dv
+        LEFT JOIN deal_revenue dr ON dr.deal_id = dv.id
+        LEFT JOIN real.deal_voucher_image dvi ON dvi.deal_voucher_id = dv.id AND dvi.position = 0
+        LEFT JOIN real.deal_voucher_category dvc ON dvc.id = dv.category_id
+        LEFT JOIN real.deal_voucher_sub_category dvsc ON dvsc.id = dv.sub_category_id
+        LEFT JOIN queued_variants qv ON qv.image_id_pos_0 = dvi.id
+        LEFT JOIN in_test it ON it.original_image_id = dvi.id
+        WHERE trunc(dv.closing_date) >= trunc(sysdate) + 21
+          AND dvi.id IS NOT NULL
+          AND dv.currency = 'GBP'
+          AND dvc.name = %s
     )
-    SELECT CAST(dv.id AS INTEGER) AS id,
-           dv.email_subject AS email_subject,
-           dvc.name AS category_name,
-           dvc.canonical_path_type as vertical,
-           dvsc.name AS sub_category_name,
-           CAST(COALESCE(dr.total_revenue, 0) AS DECIMAL(10,2)) AS revenue_last_7_days,
-           CAST(rank() OVER (ORDER BY COALESCE(dr.total_revenue, 0) DESC) AS INTEGER) AS revenue_rank,
-           dvi.id AS image_id_pos_0,
-           'https://static.wowcher.co.uk/images/deal/' || dvi.deal_voucher_id || '/' || dvi.id || '.' || dvi.extension AS image_url_pos_0,
-           dvi.extension
-    FROM real.deal_voucher dv
-    LEFT JOIN deal_revenue dr ON dr.deal_id = dv.id
-    LEFT JOIN real.deal_voucher_image dvi ON dvi.deal_voucher_id = dv.id AND dvi.position = 0
-    LEFT JOIN real.deal_voucher_category dvc ON dvc.id = dv.category_id
-    LEFT JOIN real.deal_voucher_sub_category dvsc ON dvsc.id = dv.sub_category_id
-    WHERE trunc(dv.closing_date) >= trunc(sysdate) + 21
-      AND dvi.id IS NOT NULL
-      AND dv.currency = 'GBP'
-      AND dvc.name = %s
-    ORDER BY COALESCE(dr.total_revenue, 0) DESC
+    SELECT id, email_subject, category_name, vertical, sub_category_name, revenue_last_7_days,
+           revenue_rank, image_id_pos_0, image_url_pos_0, extension,
+           (SELECT COUNT(*) FROM (
+                SELECT already_processed FROM candidates ORDER BY revenue_last_7_days DESC LIMIT %s
+            ) top_deals WHERE top_deals.already_processed = 1) AS skipped_in_top
+    FROM candidates
+    WHERE already_processed = 0
+    ORDER BY revenue_last_7_days DESC
     LIMIT %s
     """
     with redshift_conn() as conn:
-        df = pd.read_sql(sql, conn, params=(category, limit))
-        print(f"[generation] query_deals: category='{category}', limit={limit}, rows={len(df)}")
-        return df
+        df = pd.read_sql(sql, conn, params=(cooldown_days, bool(skip_processed), category, limit, limit))
+    skipped = int(df['skipped_in_top'].iloc[0]) if not df.empty else 0
+    df = df.drop(columns=['skipped_in_top'])
+    df.attrs['skipped_deals'] = skipped
+    print(
+        f"[generation] query_deals: category='{category}', limit={limit}, rows={len(df)}, "
+        f"skipped_already_processed={skipped} (~${skipped * CFG.costs.estimated_call_usd:.2f} avoided)"
+    )
+    return df
+
+
+class PrescreenRejected(RuntimeError):
+    """Every candidate of a deal failed the pre-screen, so nothing is queued for review."""
 
 
 def download(url: str) -> bytes:
@@ -65,91 +140,420 @@ def download(url: str) -> bytes:
     return r.content
 
 
-def generate_one(deal: Dict[str, Any]) -> Dict[str, Any]:
-    prompt, prompt_source = PROMPTS.get_prompt(
-        vertical=deal.get('vertical'),
-        category_name=deal.get('category_name'),
-        sub_category_name=deal.get('sub_category_name'),
-        email_subject=deal.get('email_subject'),
-        formatted_highlights="",
-    )
+def generate_one(deal: Dict[str, Any], ledger: CostLedger = None) -> Dict[str, Any]:
+    """
+    Generate, upload and describe one variant for a deal.
 
-    # prepare original images (use up to 8 first deal images)
-    image_urls = [deal.get('image_url_pos_0')]
-    image_files = []
-    with tempfile.TemporaryDirectory() as td:
-        for idx, u in enumerate(image_urls):
-            try:
-                p = os.path.join(td, f"img_{idx}.png")
-                with open(p, 'wb') as f:
-                    f.write(download(u))
-                image_files.append(open(p, 'rb'))
-            except Exception:
-                continue
-
-        # OpenAI image edit
-        try:
-            print(f"[generation] OpenAI edit start: deal={deal.get('id')}")
-            result = OPENAI.images.edit(
-                model="gpt-image-1",
-                image=image_files,
-                prompt=prompt,
-                size="1536x1024",
-                quality="high",
-                background="auto",
-                n=1
+    A deal carrying 'preview_url' (from an approved preview) is a final run:
+    it reuses the preview's prompt, passes the preview as a reference image
+    and always renders at high quality. Otherwise the deal is rendered at the
+    configured preview quality when two-phase generation is on, else high.
+    """
+    ledger = ledger or CostLedger()
+    # Claim budget before any work so a spent batch stops scheduling new calls
+    reservation = ledger.reserve()
+    # Anything failing before the call is recorded hands the reservation back,
+    # otherwise the ledger would count it against the budget for good
+    try:
+        final = bool(deal.get('preview_url'))
+        preview_quality = CFG.generation.preview_quality
+        phase = 'final' if final else ('preview' if preview_quality else None)
+        quality = preview_quality if phase == 'preview' else 'high'
+        if final:
+            template, prompt_source = deal['prompt_template'], deal.get('prompt_source')
+            prompt_vars = json.loads(deal.get('prompt_vars') or '{}')
+        else:
+            template, prompt_source, prompt_vars = PROMPTS.resolve_prompt(
+                vertical=deal.get('vertical'),
+                category_name=deal.get('category_name'),
+                sub_category_name=deal.get('sub_category_name'),
+                email_subject=deal.get('email_subject'),
+                formatted_highlights="",
             )
-        except Exception as e:
-            raise RuntimeError(f"OpenAI image edit failed for deal {deal.get('id')}: {e}")
-        for f in image_files:
-            try:
-                f.close()
-            except Exception:
-                pass
+        prompt = PROMPTS.render(template, prompt_vars)
 
-        image_base64 = result.data[0].b64_json
-        image_bytes = base64.b64decode(image_base64)
+        # prepare original images (use up to 8 first deal images)
+        image_urls = [deal.get('image_url_pos_0')]
+        if final:
+            image_urls.append(deal['preview_url'])
+        image_files = []
+        original_bytes = None
+        with tempfile.TemporaryDirectory() as td:
+            try:
+                for idx, u in enumerate(image_urls):
+                    try:
+                        p = os.path.join(td, f"img_{idx}.png")
+                        data = download(u)
+                        # Only image 0 is the deal's original; in a final run image 1 is the preview
+                        if idx == 0:
+                            original_bytes = data
+                        with open(p, 'wb') as f:
+                            f.write(data)
+                        image_files.append(open(p, 'rb'))
+                    except Exception:
+                        continue
 
-    # Upload to S3
-    key = f"images/deal/{deal['id']}/{deal['image_id_pos_0']}_variant.jpg"
-    S3.put_object(
-        Body=image_bytes,
-        Bucket=CFG.aws.bucket_name,
-        Key=key,
-        ContentType='image/jpeg',
-        CacheControl='no-cache, no-store, must-revalidate'
+                # OpenAI image edit
+                try:
+                    print(f"[generation] OpenAI edit start: deal={deal.get('id')}")
+                    result = OPENAI.images.edit(
+                        model="gpt-image-1",
+                        image=image_files,
+                        prompt=prompt,
+                        size="1536x1024",
+                        quality=quality,
+                        background="auto",
+                        # Extra candidates share the input image tokens of a single call
+                        n=max(1, CFG.generation.candidates)
+                    )
+                except Exception as e:
+                    raise RuntimeError(f"OpenAI image edit failed for deal {deal.get('id')}: {e}")
+            finally:
+                for f in image_files:
+                    try:
+                        f.close()
+                    except Exception:
+                        pass
+    except BaseException:
+        ledger.release(reservation)
+        raise
+    cost = ledger.record(
+        deal.get('id'), getattr(result, 'usage', None), reservation,
+        model="gpt-image-1", quality=quality, size="1536x1024", prompt_source=prompt_source,
     )
-    s3_url = f"https://{CFG.aws.bucket_name}/{key}"
-    print(f"[generation] Uploaded variant to {s3_url}")
+
+    candidates = [base64.b64decode(d.b64_json) for d in result.data]
+
+    # Obvious failures never reach a reviewer; the call's cost is already in the ledger.
+    # Without the original there is nothing to screen or compare against.
+    if original_bytes is None:
+        print(f"[generation] Original image unavailable for deal {deal.get('id')}; skipping pre-screen and comparison")
+    screened = screen_candidates(original_bytes, candidates) if CFG.prescreen.enabled and original_bytes else None
+    if screened is not None:
+        keep = [i for i, r in enumerate(screened) if r['passed']]
+        if not keep:
+            raise PrescreenRejected(
+                f"deal {deal.get('id')}: all {len(candidates)} candidates rejected "
+                f"({'; '.join(describe(r) for r in screened)})"
+            )
+        candidates, screened = [candidates[i] for i in keep], [screened[i] for i in keep]
+
+    # Best-scoring candidate is reviewed first; the rest are kept as alternates.
+    # Candidates that couldn't be decoded for scoring (-1) are never uploaded.
+    ranked = [(i, score) for i, score in rank_candidates(candidates) if score >= 0]
+    if not ranked:
+        raise RuntimeError(f"No readable image returned for deal {deal.get('id')}")
+    image_bytes = candidates[ranked[0][0]]
+    flags = screened[ranked[0][0]]['flags'] if screened else []
+
+    # images.edit returns PNG; upload real JPEGs (plus WebP copies when configured)
+    sizes = {'images': 0, 'raw': 0}
+    webp_urls = []
+
+    def publish(key, data):
+        body, extras = transcode_output(data)
+        url = upload_image(key, body)
+        for fmt, extra in extras.items():
+            webp_urls.append(upload_image(with_extension(key, fmt), extra, content_type(fmt)))
+            sizes[fmt] = sizes.get(fmt, 0) + len(extra)
+        sizes['images'] += 1
+        sizes['raw'] += len(data)
+        sizes['jpeg'] = sizes.get('jpeg', 0) + len(body)
+        return url, body
+
+    # Upload to S3; previews get their own keys so a final never collides with them
+    name = 'preview' if phase == 'preview' else 'variant'
+    base_key = f"images/deal/{deal['id']}/{deal['image_id_pos_0']}_{name}.jpg"
+    s3_url, variant_jpeg = publish(base_key, image_bytes)
+    print(f"[generation] Uploaded {name} ({quality}, {len(image_bytes) // 1024} KB -> {len(variant_jpeg) // 1024} KB) to {s3_url}")
+    alternate_urls = [
+        publish(f"images/deal/{deal['id']}/{deal['image_id_pos_0']}_{name}_alt{pos}.jpg", candidates[i])[0]
+        for pos, (i, _) in enumerate(ranked[1:], start=1)
+    ]
+
+    compare_url = publish_comparison(original_bytes, variant_jpeg, base_key)
+
+    # A regenerated variant overwrites the same key, so drop any edge-cached copy;
+    # content-addressed keys are never overwritten and need no purge
+    purge = get_purge_queue()
+    if purge is not None and not CFG.aws.immutable_keys:
+        purge.enqueue([s3_url, compare_url] + alternate_urls + webp_urls)
 
     return {
         **deal,
         's3_url': s3_url,
+        'compare_url': compare_url,
         'prompt': prompt,
         'prompt_source': prompt_source,
-        'token_info': {},
+        'prompt_template': template,
+        'prompt_hash': PROMPTS.template_hash(template),
+        'prompt_vars': json.dumps(prompt_vars),
+        'token_info': json.dumps({
+            **cost,
+            'candidate_scores': [score for _, score in ranked],
+            'prescreen': [screened[i]['metrics'] for i, _ in ranked] if screened else None,
+            'transcode': sizes,
+            'webp_url': webp_urls[0] if webp_urls else None,
+        }),
+        'transcode': sizes,
+        'prescreen_flags': ','.join(flags) or None,
+        'cost_usd': cost['cost_usd'],
+        'alternate_urls': json.dumps(alternate_urls) if alternate_urls else None,
+        'quality': quality,
+        'phase': phase,
+        'parent_id': deal.get('preview_id'),
     }
 
 
-def run_batch(category: str, limit: int = 5) -> int:
-    df = query_deals(category=category, limit=limit)
-    if df is None or df.empty:
-        raise ValueError(f"No deals found for category '{category}'.")
-    deals = df.to_dict(orient='records')
-    results: List[Dict[str, Any]] = []
-    print(f"[generation] Starting batch: {len(deals)} deals")
-    # Reduce parallelism to avoid rate limits/timeouts
-    with ThreadPoolExecutor(max_workers=25) as ex:
-        futures = [ex.submit(generate_one, d) for d in deals]
-        for fut in as_completed(futures):
+def upload_image(base_key: str, image_bytes: bytes, mime_type: str = 'image/jpeg') -> str:
+    """Upload an encoded image under base_key (or its content-hash form) and return its URL."""
+    key, cache_control = publish_key(base_key, image_bytes, CFG.aws.immutable_keys)
+    S3.put_object(
+        Body=image_bytes,
+        Bucket=CFG.aws.bucket_name,
+        Key=key,
+        ContentType=mime_type,
+        CacheControl=cache_control
+    )
+    return f"https://{CFG.aws.bucket_name}/{key}"
+
+
+def publish_comparison(original_bytes, variant_bytes, variant_key: str):
+    """Upload a side-by-side review image next to the variant; best-effort, returns its URL or None."""
+    if not original_bytes:
+        return None
+    try:
+        body = render_comparison(original_bytes, variant_bytes)
+        key, cache_control = publish_key(comparison_key(variant_key), body, CFG.aws.immutable_keys)
+        S3.put_object(
+            Body=body,
+            Bucket=CFG.aws.bucket_name,
+            Key=key,
+            ContentType='image/jpeg',
+            CacheControl=cache_control
+        )
+        return f"https://{CFG.aws.bucket_name}/{key}"
+    except Exception as e:
+        print(f"[generation] Comparison image failed for {variant_key}: {e}")
+        return None
+
+
+def deal_priority(deal: Dict[str, Any]) -> tuple:
+    """Sort key, highest first: recent revenue, then the better (lower) revenue rank."""
+    def num(val, default=0.0):
+        try:
+            return float(val) if val is not None and not pd.isna(val) else default
+        except (TypeError, ValueError):
+            return default
+    return (num(deal.get('revenue_last_7_days')), -num(deal.get('revenue_rank'), float('inf')))
+
+
+def generate_prioritised(deals: List[Dict[str, Any]], ledger: CostLedger, max_workers: int = None,
+                         deadline: float = None, failed: List[Dict[str, Any]] = None):
+    """
+    Generate deals highest-value first and yield each result as it finishes.
+
+    Only max_workers deals are in flight at once; the next most valuable deal
+    is dispatched when a slot frees up. Dispatching stops once the ledger's
+    budget is spent or the deadline (a time.monotonic() value) passes, and the
+    deals already running are allowed to finish. Deals whose generation
+    raised (other than for budget) are appended to failed when it is given.
+    """
+    max_workers = max_workers or CFG.generation.max_workers
+    queue = [(tuple(-k for k in deal_priority(d)), i, d) for i, d in enumerate(deals)]
+    heapq.heapify(queue)
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        running = {}
+        while queue or running:
+            while queue and len(running) < max_workers:
+                if ledger.exhausted:
+                    print(f"[generation] Budget reached; {len(queue)} deals not dispatched")
+                    queue.clear()
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    print(f"[generation] Deadline reached; {len(queue)} deals not dispatched")
+                    queue.clear()
+                    break
+                _, _, deal = heapq.heappop(queue)
+                running[ex.submit(generate_one, deal, ledger)] = deal
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                deal = running.pop(fut)
+                try:
+                    yield fut.result()
+                except BudgetExceeded:
+                    continue
+                except PrescreenRejected as e:
+                    print(f"[generation] Pre-screen rejected {e}")
+                    if failed is not None:
+                        failed.append(deal)
+                except Exception as e:
+                    # Skip failed item; continue with others
+                    print(f"[generation] Item failed: {e}")
+                    if failed is not None:
+                        failed.append(deal)
+
+
+class ResultFlusher:
+    """
+    Buffers generated rows and writes them to the approval store in micro-batches.
+
+    A batch is written once flush_rows results are waiting or the oldest has
+    waited flush_seconds (checked by a background timer, so slow batches still
+    surface promptly). Writes happen on that background thread only: add()
+    just buffers and wakes it, so a slow Redshift insert never holds up the
+    caller draining finished deals. Rows from a failed write stay buffered and
+    are retried on the next flush, so a crash mid-batch loses at most one
+    micro-batch.
+
+    With a ledger, its new cost entries are written on the same schedule
+    (and at least every flush_seconds even when nothing reaches the queue),
+    so calls already paid for are on record if the batch dies part-way.
+    """
+
+    def __init__(self, flush_rows: int = None, flush_seconds: float = None, ledger: CostLedger = None):
+        self.flush_rows = flush_rows or CFG.generation.flush_rows
+        self.flush_seconds = flush_seconds if flush_seconds is not None else CFG.generation.flush_seconds
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.buffer: List[Dict[str, Any]] = []
+        self.oldest = None
+        self.ledger = ledger
+        self.last_flush = time.monotonic()
+        self.inserted = 0
+        self.flushes = 0
+        self.stop = threading.Event()
+        self.wake = threading.Event()
+        self.timer = threading.Thread(target=self._run, name="result-flusher", daemon=True)
+        self.timer.start()
+
+    def add(self, row: Dict[str, Any]) -> None:
+        with self.lock:
+            if not self.buffer:
+                self.oldest = time.monotonic()
+            self.buffer.append(row)
+            full = len(self.buffer) >= self.flush_rows
+        if full:
+            self.wake.set()
+
+    def _run(self) -> None:
+        while not self.stop.is_set():
+            self.wake.wait(min(1.0, self.flush_seconds or 1.0))
+            self.wake.clear()
+            now = time.monotonic()
+            with self.lock:
+                due = self.buffer and (len(self.buffer) >= self.flush_rows
+                                       or now - self.oldest >= self.flush_seconds)
+            if not due and self.ledger is not None and now - self.last_flush >= self.flush_seconds:
+                due = bool(self.ledger.unpersisted())
+            if due:
+                self.flush()
+
+    def flush(self) -> None:
+        # One writer at a time keeps rows in completion order and avoids racing inserts
+        with self.write_lock:
+            self.last_flush = time.monotonic()
+            self._flush_costs()
+            with self.lock:
+                rows, self.buffer = self.buffer, []
+                self.oldest = None
+            if not rows:
+                return
             try:
-                res = fut.result()
-                results.append(res)
-                print(f"[generation] Generated deal={res.get('id')}")
+                insert_generation_rows(rows)
             except Exception as e:
-                # Skip failed item; continue with others
-                print(f"[generation] Item failed: {e}")
-    if results:
-        insert_generation_rows(results)
-        print(f"[generation] Inserted {len(results)} rows into temp.image_to_approve")
-    return len(results)
+                print(f"[generation] Flush of {len(rows)} rows failed, will retry: {e}")
+                with self.lock:
+                    self.buffer = rows + self.buffer
+                    self.oldest = time.monotonic()
+                return
+            self.inserted += len(rows)
+            self.flushes += 1
+            print(f"[generation] Flushed {len(rows)} rows to temp.image_to_approve ({self.inserted} so far)")
+
+    def _flush_costs(self) -> None:
+        # Written before the rows so spend is never missing for a queued variant
+        entries = self.ledger.unpersisted() if self.ledger is not None else []
+        if not entries:
+            return
+        try:
+            insert_cost_entries(entries)
+        except Exception as e:
+            print(f"[generation] Failed to store {len(entries)} cost entries, will retry: {e}")
+            return
+        self.ledger.mark_persisted(len(entries))
+
+    def close(self) -> int:
+        self.stop.set()
+        self.wake.set()
+        self.timer.join()
+        self.flush()
+        if self.buffer:
+            print(f"[generation] {len(self.buffer)} generated rows could not be queued: "
+                  f"{[r.get('s3_url') for r in self.buffer]}")
+        unstored = self.ledger.unpersisted() if self.ledger is not None else []
+        if unstored:
+            print(f"[generation] {len(unstored)} cost entries could not be stored for deals "
+                  f"{[e.get('deal_voucher_id') for e in unstored]}")
+        return self.inserted
+
+
+def run_batch(category: str, limit: int = 5, budget_usd: float = None, deadline_seconds: float = None,
+              skip_processed: bool = True) -> int:
+    df = query_deals(category=category, limit=limit, skip_processed=skip_processed)
+    if df is None or df.empty:
+        raise ValueError(f"No deals found for category '{category}' that haven't already been processed.")
+    deals = df.to_dict(orient='records')
+    ledger = CostLedger(budget_usd if budget_usd is not None else CFG.costs.batch_budget_usd)
+    deadline_seconds = deadline_seconds if deadline_seconds is not None else CFG.generation.deadline_seconds
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+    print(f"[generation] Starting batch {ledger.batch_id}: {len(deals)} deals, budget={ledger.budget_usd}, deadline={deadline_seconds or None}s")
+    # Variants reach the approval queue in micro-batches as they finish, most valuable first
+    flusher = ResultFlusher(ledger=ledger)
+    transcoded = TranscodeStats()
+    try:
+        for res in generate_prioritised(deals, ledger, deadline=deadline):
+            print(f"[generation] Generated deal={res.get('id')} cost=${res.get('cost_usd', 0):.4f}")
+            transcoded.add(res['transcode'])
+            flusher.add(res)
+    finally:
+        inserted = flusher.close()
+    print(f"[generation] Inserted {inserted} rows into temp.image_to_approve in {flusher.flushes} flushes")
+    print(f"[generation] Batch cost: {ledger.summary()}")
+    print(f"[generation] Transcoding: {transcoded.summary()}")
+    purge = get_purge_queue()
+    if purge is not None:
+        purge.flush(timeout=60)
+        print(f"[generation] CDN purge: {purge.stats()}")
+    return inserted
+
+
+def finalize_previews(limit: int = 50, budget_usd: float = None) -> int:
+    """
+    Second phase of two-phase generation: re-run approved previews at high
+    quality and queue the finals for a confirming review.
+    """
+    deals = list_approved_previews(limit)
+    if not deals:
+        return 0
+    ledger = CostLedger(budget_usd if budget_usd is not None else CFG.costs.batch_budget_usd)
+    print(f"[generation] Finalizing {len(deals)} approved previews (batch {ledger.batch_id})")
+    flusher = ResultFlusher(ledger=ledger)
+    transcoded = TranscodeStats()
+    failed = []
+    try:
+        for res in generate_prioritised(deals, ledger, failed=failed):
+            transcoded.add(res['transcode'])
+            flusher.add(res)
+    finally:
+        inserted = flusher.close()
+        # Only previews whose finals actually reached the queue are retired
+        retire_finalized_previews()
+        # A preview whose final keeps failing would otherwise be paid for on every run
+        if failed:
+            given_up = record_final_failures([d['preview_id'] for d in failed], CFG.generation.final_max_attempts)
+            print(f"[generation] {len(failed)} finals failed; {given_up} previews marked final_failed")
+    print(f"[generation] Finals queued: {inserted}; cost {ledger.summary()}; transcoding {transcoded.summary()}")
+    return inserted
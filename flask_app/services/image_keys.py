@@ -0,0 +1,33 @@
+import os
+import hashlib
+
+# Objects whose key changes whenever their bytes do can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Objects rewritten in place must be revalidated on every view
+NO_CACHE_CONTROL = "no-cache, no-store, must-revalidate"
+
+
+def immutable_keys_enabled() -> bool:
+    """Opt-in switch shared by the app and the standalone scripts (S3_IMMUTABLE_KEYS=true)."""
+    return os.getenv("S3_IMMUTABLE_KEYS", "false").strip().lower() in ("1", "true", "yes")
+
+
+def content_hash(data: bytes, length: int = 16) -> str:
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def content_key(key: str, data: bytes) -> str:
+    """
+    Content-addressed form of key: images/deal/1/2_variant.jpg ->
+    images/deal/1/2_variant.<sha256[:16]>.jpg. New bytes always get a new key,
+    so nothing is overwritten and nothing needs purging from the CDN.
+    """
+    stem, ext = os.path.splitext(key)
+    return f"{stem}.{content_hash(data)}{ext}"
+
+
+def publish_key(key: str, data: bytes, immutable: bool):
+    """(key, Cache-Control) to upload data under, depending on the publishing mode."""
+    if immutable:
+        return content_key(key, data), IMMUTABLE_CACHE_CONTROL
+    return key, NO_CACHE_CONTROL
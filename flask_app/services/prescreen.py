@@ -0,0 +1,120 @@
+import io
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from PIL import Image
+from ..config import AppConfig
+
+CFG = AppConfig()
+
+# Every image is reduced to this (width, height) greyscale grid so a whole
+# batch can be screened as one (N, H, W) array; 3:2 matches the 1536x1024 output
+SCREEN_SIZE = (192, 128)
+# dHash grid: 9x8 pixels give 8x8 = 64 horizontal-gradient bits
+HASH_SIZE = (9, 8)
+# The clear zone is cropped before downscaling so small overlay text keeps its edges
+ZONE_SIZE = (150, 100)
+# Greyscale step (0-1) between neighbouring pixels that counts as a strong edge
+EDGE_THRESHOLD = 0.12
+
+
+def _load(data: Optional[bytes], fraction: float = 0.2):
+    """(screen grid, hash grid, clear-zone grid, (width, height)) for one image, or None if unreadable."""
+    if not data:
+        return None
+    try:
+        img = Image.open(io.BytesIO(data))
+        size = img.size
+        img.draft("L", (int(ZONE_SIZE[0] * 2 / fraction), int(ZONE_SIZE[1] * 2 / fraction)))
+        gray = img.convert("L")
+    except Exception as e:
+        print(f"[prescreen] Could not read image: {e}")
+        return None
+    screen = np.asarray(gray.resize(SCREEN_SIZE, Image.BILINEAR), dtype=np.float32) / 255.0
+    hashed = np.asarray(gray.resize(HASH_SIZE, Image.BILINEAR), dtype=np.float32)
+    w, h = gray.size
+    corner = gray.crop((int(w * (1 - fraction)), int(h * (1 - fraction)), w, h))
+    zone = np.asarray(corner.resize(ZONE_SIZE, Image.BILINEAR), dtype=np.float32) / 255.0
+    return screen, hashed, zone, size
+
+
+def _dhash_bits(grids: np.ndarray) -> np.ndarray:
+    """(N, 8, 9) hash grids -> (N, 64) booleans: is each pixel brighter than its right neighbour."""
+    return (grids[:, :, :-1] > grids[:, :, 1:]).reshape(len(grids), -1)
+
+
+def screen_batch(candidates: Sequence[bytes], originals: Sequence[Optional[bytes]]) -> List[Dict[str, Any]]:
+    """
+    Screen candidates[i] against originals[i] in one vectorised pass.
+
+    Each result has 'passed' (False if any reject reason applies), 'reasons'
+    (rejections: unreadable, blank, near_original, aspect_ratio), 'flags'
+    (shown to the reviewer but not rejected: clear_zone) and the raw metrics.
+    Candidates of the same deal can share one originals entry; each distinct
+    original is decoded once.
+    """
+    cfg = CFG.prescreen
+    results = [{"passed": False, "reasons": ["unreadable"], "flags": [], "metrics": {}} for _ in candidates]
+    loaded = [_load(data, cfg.clear_zone_fraction) for data in candidates]
+    ok = [i for i, item in enumerate(loaded) if item is not None]
+    if not ok:
+        return results
+
+    screens = np.stack([loaded[i][0] for i in ok])
+    sizes = np.array([loaded[i][3] for i in ok], dtype=np.float32)
+
+    # Blank / near-uniform: almost no tonal variation anywhere
+    stds = screens.reshape(len(ok), -1).std(axis=1)
+
+    # Wrong aspect ratio, relative to the expected output shape
+    aspect = sizes[:, 0] / sizes[:, 1]
+    aspect_err = np.abs(aspect - cfg.aspect_ratio) / cfg.aspect_ratio
+
+    # Text or detail in the bottom-right clear zone shows up as a dense patch of strong edges
+    zone = np.stack([loaded[i][2] for i in ok])
+    edges = (np.abs(np.diff(zone, axis=2))[:, 1:, :] > EDGE_THRESHOLD) | (np.abs(np.diff(zone, axis=1))[:, :, 1:] > EDGE_THRESHOLD)
+    zone_density = edges.reshape(len(ok), -1).mean(axis=1)
+
+    # Perceptual-hash distance to the deal's original (identity-deduplicated)
+    distances = np.full(len(ok), -1, dtype=np.int64)
+    original_hashes = {}
+    for data in {id(originals[i]): originals[i] for i in ok}.values():
+        item = _load(data)
+        if item is not None:
+            original_hashes[id(data)] = _dhash_bits(item[1][None])[0]
+    paired = [j for j, i in enumerate(ok) if id(originals[i]) in original_hashes]
+    if paired:
+        cand_bits = _dhash_bits(np.stack([loaded[ok[j]][1] for j in paired]))
+        orig_bits = np.stack([original_hashes[id(originals[ok[j]])] for j in paired])
+        distances[paired] = np.count_nonzero(cand_bits != orig_bits, axis=1)
+
+    for j, i in enumerate(ok):
+        reasons = []
+        if stds[j] < cfg.min_std:
+            reasons.append("blank")
+        if 0 <= distances[j] < cfg.min_hash_distance:
+            reasons.append("near_original")
+        if aspect_err[j] > cfg.aspect_tolerance:
+            reasons.append("aspect_ratio")
+        flags = ["clear_zone"] if zone_density[j] > cfg.clear_zone_edge_density else []
+        results[i] = {
+            "passed": not reasons,
+            "reasons": reasons,
+            "flags": flags,
+            "metrics": {
+                "std": round(float(stds[j]), 4),
+                "hash_distance": int(distances[j]) if distances[j] >= 0 else None,
+                "aspect_ratio": round(float(aspect[j]), 4),
+                "clear_zone_edge_density": round(float(zone_density[j]), 4),
+            },
+        }
+    return results
+
+
+def screen_candidates(original: Optional[bytes], candidates: Sequence[bytes]) -> List[Dict[str, Any]]:
+    """Screen every candidate of one deal against its original image."""
+    return screen_batch(candidates, [original] * len(candidates))
+
+
+def describe(result: Dict[str, Any]) -> str:
+    """Short 'prescreen: ...' note for review_notes / logs."""
+    return "prescreen: " + ", ".join(result["reasons"] + result["flags"])
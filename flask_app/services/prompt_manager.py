@@ -1,6 +1,11 @@
 import os
 import glob
+import re
+import time
 import random
+import hashlib
+import threading
+from functools import lru_cache
 
 subjects = [
     # solo_female
@@ -28,28 +33,104 @@ subjects = [
 
 ]
 
+PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> tuple:
+    """
+    Split a template into (segments, placeholder names).
+
+    Segments alternate literal text and placeholder names (odd positions), so
+    rendering is a single join instead of one replace pass per variable.
+    """
+    parts = PLACEHOLDER_RE.split(template)
+    return tuple(parts), frozenset(parts[1::2])
+
+
+@lru_cache(maxsize=1024)
+def _template_hash(template: str) -> str:
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()
+
 
 class PromptManager:
-    def __init__(self, prompts_folder: str = "prompts"):
+    """
+    Prompt templates from prompts/*.txt, loaded lazily and hot-reloaded.
+
+    The folder is re-scanned at most every reload_seconds; a file is read on
+    first use and again only when its mtime changes, so editing a prompt takes
+    effect without restarting the app.
+    """
+
+    def __init__(self, prompts_folder: str = "prompts", reload_seconds: float = 5.0):
         self.prompts_folder = prompts_folder
+        self.reload_seconds = reload_seconds
         self.prompts_cache = {}
+        self.prompt_files = {}
+        self.resolution_cache = {}
         self.subjects = subjects
-        self.load_all_prompts()
+        self.lock = threading.RLock()
+        self.last_scan = 0.0
 
-    def load_all_prompts(self) -> None:
-        if not os.path.exists(self.prompts_folder):
-            os.makedirs(self.prompts_folder, exist_ok=True)
+    @staticmethod
+    def file_key(file_path: str) -> str:
+        filename = os.path.basename(file_path)
+        return filename.replace('.txt', '').lower().replace(' ', '_').replace('-', '_')
+
+    def refresh(self, force: bool = False) -> None:
+        """Pick up added, removed and edited prompt files; cheap when nothing changed."""
+        now = time.monotonic()
+        if not force and now - self.last_scan < self.reload_seconds:
             return
-        prompt_files = glob.glob(os.path.join(self.prompts_folder, "*.txt"))
-        for file_path in prompt_files:
-            filename = os.path.basename(file_path)
-            key = filename.replace('.txt', '').lower().replace(' ', '_').replace('-', '_')
+        with self.lock:
+            if not force and now - self.last_scan < self.reload_seconds:
+                return
+            self.last_scan = now
+            if not os.path.exists(self.prompts_folder):
+                os.makedirs(self.prompts_folder, exist_ok=True)
+            files = {}
+            for file_path in glob.glob(os.path.join(self.prompts_folder, "*.txt")):
+                try:
+                    files[self.file_key(file_path)] = (file_path, os.path.getmtime(file_path))
+                except OSError:
+                    continue
+            if files.keys() != self.prompt_files.keys():
+                self.resolution_cache.clear()
+            for key, (_, mtime) in self.prompt_files.items():
+                if key not in files or files[key][1] != mtime:
+                    # Re-read on next use
+                    self.prompts_cache.pop(key, None)
+            self.prompt_files = files
+
+    def load_all_prompts(self) -> None:
+        """Eagerly read every template (e.g. to warm a worker); normally they load on first use."""
+        self.refresh(force=True)
+        for key in list(self.prompt_files):
+            self.get_template(key)
+
+    def get_template(self, key: str):
+        """Template text for key, reading the file if it isn't loaded; None if missing or unreadable."""
+        template = self.prompts_cache.get(key)
+        if template is not None:
+            return template
+        with self.lock:
+            entry = self.prompt_files.get(key)
+            if entry is None:
+                return None
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    self.prompts_cache[key] = content
+                with open(entry[0], 'r', encoding='utf-8') as f:
+                    template = f.read().strip()
             except Exception:
-                continue
+                return None
+            compile_template(template)
+            self.prompts_cache[key] = template
+            print(f"[prompts] Loaded {key} ({self.template_hash(template)[:12]})")
+            return template
+
+    def versions(self) -> dict:
+        """Current revision hash of every prompt file, as recorded in prompt_hash on generated rows."""
+        self.refresh()
+        return {key: self.template_hash(self.get_template(key) or '') for key in sorted(self.prompt_files)}
 
     def normalize_key(self, text: str) -> str:
         if not text:
@@ -67,7 +148,26 @@ class PromptManager:
             parts.append(f"Hair: {subject['hair']}")
         return "\n".join(parts)
 
-    def get_prompt(self, vertical=None, category_name=None, sub_category_name=None, email_subject: str = "", formatted_highlights: str = ""):
+    @staticmethod
+    def template_hash(template: str) -> str:
+        return _template_hash(template)
+
+    @staticmethod
+    def render(template: str, values: dict) -> str:
+        segments, _ = compile_template(template)
+        out = list(segments)
+        for i in range(1, len(out), 2):
+            name = out[i]
+            # Unknown placeholders are left as written
+            out[i] = (values[name] or '') if name in values else '{' + name + '}'
+        return ''.join(out)
+
+    def resolve_key(self, vertical=None, category_name=None, sub_category_name=None):
+        """Most specific prompt key for a deal, or None for the fallback; cached per combination."""
+        self.refresh()
+        combo = (vertical, category_name, sub_category_name)
+        if combo in self.resolution_cache:
+            return self.resolution_cache[combo]
         candidates = []
         if sub_category_name:
             candidates.append(self.normalize_key(sub_category_name))
@@ -76,13 +176,24 @@ class PromptManager:
         if vertical:
             candidates.append(self.normalize_key(vertical))
         candidates.append('default')
+        key = next((c for c in candidates if c in self.prompt_files), None)
+        self.resolution_cache[combo] = key
+        return key
 
-        for candidate in candidates:
-            if candidate in self.prompts_cache:
-                prompt = self.prompts_cache[candidate]
-                prompt = prompt.replace('{email_subject}', email_subject or '')
-                prompt = prompt.replace('{formatted_highlights}', formatted_highlights or '')
-                if '{subject}' in prompt:
-                    prompt = prompt.replace('{subject}', self.get_random_subject_description())
-                return prompt, candidate
-        return f"Create a high-quality promotional image for: {email_subject}", "fallback"
+    def resolve_prompt(self, vertical=None, category_name=None, sub_category_name=None, email_subject: str = "", formatted_highlights: str = ""):
+        """Return (template, prompt_source, substitution values) without rendering."""
+        key = self.resolve_key(vertical, category_name, sub_category_name)
+        template = self.get_template(key) if key is not None else None
+        if template is not None:
+            values = {
+                'email_subject': email_subject or '',
+                'formatted_highlights': formatted_highlights or '',
+            }
+            if 'subject' in compile_template(template)[1]:
+                values['subject'] = self.get_random_subject_description()
+            return template, key, values
+        return "Create a high-quality promotional image for: {email_subject}", "fallback", {'email_subject': email_subject or ''}
+
+    def get_prompt(self, vertical=None, category_name=None, sub_category_name=None, email_subject: str = "", formatted_highlights: str = ""):
+        template, source, values = self.resolve_prompt(vertical, category_name, sub_category_name, email_subject, formatted_highlights)
+        return self.render(template, values), source
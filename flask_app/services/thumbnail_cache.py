@@ -0,0 +1,134 @@
+import os
+import io
+import hashlib
+import threading
+import requests
+from typing import Tuple
+from urllib.parse import urlparse
+from PIL import Image
+from ..config import AppConfig
+
+CFG = AppConfig()
+
+_LOCKS: dict = {}
+_LOCKS_GUARD = threading.Lock()
+_WRITES_SINCE_EVICT = 0
+# Walking the cache directory is not free, so only check the size cap every N writes
+EVICT_EVERY = 50
+
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+MIN_WIDTH = 32
+MAX_VERSION_LENGTH = 64
+
+
+def _allowed(url: str) -> bool:
+    host = urlparse(url).hostname or ""
+    allowed = {h.strip() for h in CFG.thumbnails.allowed_hosts.split(",") if h.strip()}
+    allowed.add(CFG.aws.bucket_name)
+    return host in allowed
+
+
+def _acquire_lock(key: str) -> threading.Lock:
+    """Per-path lock, reference-counted so the entry is dropped once no request holds it."""
+    with _LOCKS_GUARD:
+        entry = _LOCKS.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+        return entry[0]
+
+
+def _release_lock(key: str) -> None:
+    with _LOCKS_GUARD:
+        entry = _LOCKS.get(key)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del _LOCKS[key]
+
+
+def thumbnail_version(row) -> str:
+    """
+    Version token for a review row's thumbnails, passed as ?v= and part of the cache key.
+
+    In the default (mutable) key mode a regenerated variant is written over the
+    same S3 key, so the URL alone can't tell a new image from the cached one;
+    the row id and creation time change whenever a new variant is queued.
+    """
+    return hashlib.sha1(f"{row.get('id')}|{row.get('created_ts')}".encode("utf-8")).hexdigest()[:12]
+
+
+def _cache_path(url: str, width: int, fmt: str, version: str = "") -> str:
+    digest = hashlib.sha1(f"{url}|{width}|{fmt}|{version}".encode("utf-8")).hexdigest()
+    return os.path.join(os.path.abspath(CFG.thumbnails.cache_dir), digest[:2], f"{digest}.{fmt}")
+
+
+def _render(data: bytes, width: int, fmt: str) -> bytes:
+    img = Image.open(io.BytesIO(data))
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    img.thumbnail((width, width), Image.LANCZOS)
+    out = io.BytesIO()
+    if fmt == "webp":
+        img.save(out, "WEBP", quality=CFG.thumbnails.quality, method=4)
+    else:
+        img.save(out, "JPEG", quality=CFG.thumbnails.quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _evict() -> None:
+    """Drop least-recently-used thumbnails until the cache is under its size cap."""
+    entries = []
+    total = 0
+    for root, _, files in os.walk(CFG.thumbnails.cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+    if total <= CFG.thumbnails.max_cache_bytes:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            continue
+        if total <= CFG.thumbnails.max_cache_bytes:
+            break
+
+
+def get_thumbnail(url: str, width: int, fmt: str = "webp", version: str = "") -> Tuple[str, str]:
+    """Return (path, content_type) of a cached preview for url at version, generating it once on miss."""
+    if not _allowed(url):
+        raise ValueError(f"Host not allowed for thumbnails: {url}")
+    fmt = fmt if fmt in CONTENT_TYPES else "jpeg"
+    width = max(MIN_WIDTH, min(width, CFG.thumbnails.max_width))
+    path = _cache_path(url, width, fmt, version)
+    try:
+        with _acquire_lock(path):
+            if os.path.exists(path):
+                # mtime doubles as last-access time for LRU eviction
+                os.utime(path, None)
+                return path, CONTENT_TYPES[fmt]
+            r = requests.get(url, timeout=30)
+            r.raise_for_status()
+            body = _render(r.content, width, fmt)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+    finally:
+        _release_lock(path)
+    global _WRITES_SINCE_EVICT
+    with _LOCKS_GUARD:
+        _WRITES_SINCE_EVICT += 1
+        run_evict = _WRITES_SINCE_EVICT >= EVICT_EVERY
+        if run_evict:
+            _WRITES_SINCE_EVICT = 0
+    if run_evict:
+        _evict()
+    return path, CONTENT_TYPES[fmt]
@@ -0,0 +1,94 @@
+import io
+import threading
+from typing import Dict, Tuple
+from PIL import Image
+from ..config import AppConfig
+
+CFG = AppConfig()
+
+# Output format -> (file extension, Content-Type)
+FORMATS = {
+    "jpeg": (".jpg", "image/jpeg"),
+    "webp": (".webp", "image/webp"),
+}
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """RGB copy of img; transparency (background="auto" can return RGBA) goes onto white."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        canvas = Image.new("RGB", rgba.size, (255, 255, 255))
+        canvas.paste(rgba, mask=rgba.getchannel("A"))
+        return canvas
+    return img.convert("RGB") if img.mode != "RGB" else img
+
+
+def transcode(data: bytes, fmt: str = "jpeg", quality: int = None) -> bytes:
+    """
+    Re-encode generated image bytes (PNG from images.edit) as a real JPEG or WebP.
+
+    Bytes already in the requested format are returned unchanged so a JPEG
+    is never re-compressed.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    img = Image.open(io.BytesIO(data))
+    if (img.format or "").lower() == fmt:
+        return data
+    rgb = _flatten(img)
+    out = io.BytesIO()
+    if fmt == "jpeg":
+        rgb.save(out, "JPEG", quality=quality or CFG.transcode.jpeg_quality,
+                 optimize=True, progressive=True, subsampling="4:2:0")
+    else:
+        rgb.save(out, "WEBP", quality=quality or CFG.transcode.webp_quality, method=6)
+    return out.getvalue()
+
+
+def with_extension(key: str, fmt: str) -> str:
+    """key with its extension replaced by the one for fmt."""
+    stem = key.rsplit(".", 1)[0] if "." in key.rsplit("/", 1)[-1] else key
+    return f"{stem}{FORMATS[fmt][0]}"
+
+
+def content_type(fmt: str) -> str:
+    return FORMATS[fmt][1]
+
+
+class TranscodeStats:
+    """Running byte totals for a batch: what the API returned vs what was uploaded, per format."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.images = 0
+        self.raw_bytes = 0
+        self.encoded_bytes: Dict[str, int] = {}
+
+    def add(self, sizes: Dict[str, int]) -> None:
+        """sizes as returned in a row's 'transcode' entry: images, raw and per-format byte counts."""
+        with self.lock:
+            self.images += sizes.get("images", 0)
+            self.raw_bytes += sizes.get("raw", 0)
+            for fmt in FORMATS:
+                if fmt in sizes:
+                    self.encoded_bytes[fmt] = self.encoded_bytes.get(fmt, 0) + sizes[fmt]
+
+    def summary(self) -> Dict[str, float]:
+        with self.lock:
+            out = {"images": self.images, "raw_mb": round(self.raw_bytes / 1e6, 2)}
+            for fmt, size in self.encoded_bytes.items():
+                out[f"{fmt}_mb"] = round(size / 1e6, 2)
+                out[f"{fmt}_saved_pct"] = round(100.0 * (1 - size / self.raw_bytes), 1) if self.raw_bytes else 0.0
+            return out
+
+
+def transcode_output(data: bytes) -> Tuple[bytes, Dict[str, bytes]]:
+    """
+    JPEG body to upload plus any configured extra encodings ({"webp": ...}).
+
+    The JPEG stays the canonical variant because approved variants are
+    copied verbatim to .jpg keys for the live site.
+    """
+    body = transcode(data, "jpeg")
+    extras = {"webp": transcode(data, "webp")} if CFG.transcode.webp else {}
+    return body, extras
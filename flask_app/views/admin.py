@@ -1,6 +1,6 @@
-from flask import Blueprint, request, render_template, redirect, url_for, flash
-from ..services.approval_store import ensure_schema
-from ..services.generation_service import run_batch
+from flask import Blueprint, request, render_template, redirect, url_for, flash, jsonify
+from ..services.approval_store import ensure_schema, rebuild_counters
+from ..services.generation_service import run_batch, finalize_previews, PROMPTS
 
 admin_bp = Blueprint("admin", __name__, template_folder="../templates")
 
@@ -10,9 +10,16 @@ def generate():
     if request.method == "POST":
         category = request.form.get("category", "Beach Holidays")
         limit = int(request.form.get("limit", 5))
+        budget = request.form.get("budget")
+        deadline = request.form.get("deadline")
         try:
             ensure_schema()
-            count = run_batch(category, limit)
+            count = run_batch(
+                category, limit,
+                budget_usd=float(budget) if budget else None,
+                deadline_seconds=float(deadline) if deadline else None,
+                skip_processed=not request.form.get("include_processed"),
+            )
             flash(f"Queued {count} images to pending for category '{category}'")
             return redirect(url_for("approval.pending"))
         except Exception as e:
@@ -20,3 +27,28 @@ def generate():
             return render_template("admin_generate.html"), 500
     return render_template("admin_generate.html")
 
+
+@admin_bp.post("/admin/finalize-previews")
+def finalize_approved_previews():
+    limit = int(request.form.get("limit", 50))
+    try:
+        ensure_schema()
+        count = finalize_previews(limit)
+        flash(f"Queued {count} high-quality finals for approved previews")
+    except Exception as e:
+        flash(f"Finalizing previews failed: {e}")
+    return redirect(url_for("approval.pending"))
+
+
+@admin_bp.post("/admin/rebuild-counters")
+def rebuild_dashboard_counters():
+    ensure_schema()
+    rebuild_counters()
+    flash("Dashboard counters rebuilt")
+    return redirect(url_for("dashboard.dashboard"))
+
+
+@admin_bp.route("/admin/prompts")
+def prompt_versions():
+    # Which revision of each template is live; matches prompt_hash on generated rows
+    return jsonify(PROMPTS.versions())
@@ -1,27 +1,110 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from ..services.approval_store import ensure_schema, list_pending, update_review
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, abort, Response
+from ..services.approval_store import (
+    ensure_schema, list_pending, update_review, get_prompt_text,
+    update_reviews_batch, promote_alternate,
+)
+from ..services.thumbnail_cache import get_thumbnail, thumbnail_version, MIN_WIDTH, MAX_VERSION_LENGTH
+from ..config import AppConfig
 
 approval_bp = Blueprint("approval", __name__, template_folder="../templates")
 
+CFG = AppConfig()
+_schema_ready = False
+
 @approval_bp.before_app_request
 def _ensure_schema():
-    ensure_schema()
+    # Once per process: thumbnail requests would otherwise each hit Redshift
+    global _schema_ready
+    if not _schema_ready:
+        ensure_schema()
+        _schema_ready = True
+
+def _with_thumb_versions(rows):
+    for r in rows:
+        r["thumb_version"] = thumbnail_version(r)
+    return rows
 
 @approval_bp.route("/pending")
 def pending():
     page = int(request.args.get("page", 1))
     limit = 50
     offset = (page - 1) * limit
-    rows = list_pending(limit=limit, offset=offset)
+    rows = _with_thumb_versions(list_pending(limit=limit, offset=offset))
     return render_template("pending.html", rows=rows, page=page)
 
+@approval_bp.route("/grid")
+def grid():
+    page = int(request.args.get("page", 1))
+    limit = min(max(int(request.args.get("limit", 40)), 20), 50)
+    offset = (page - 1) * limit
+    # Fetch the next page too so its images can be prefetched while this one is reviewed
+    rows = _with_thumb_versions(list_pending(limit=limit * 2, offset=offset))
+    return render_template("grid.html", rows=rows[:limit], next_rows=rows[limit:], page=page, limit=limit)
+
+@approval_bp.route("/prompt/<int:item_id>")
+def prompt(item_id: int):
+    text = get_prompt_text(item_id)
+    if text is None:
+        abort(404)
+    return Response(text, mimetype="text/plain")
+
+@approval_bp.route("/thumb")
+def thumbnail():
+    url = request.args.get("url", "")
+    width = CFG.thumbnails.default_width
+    if "w" in request.args:
+        width = request.args.get("w", type=int)
+        if width is None or width <= 0:
+            abort(400)
+    width = max(MIN_WIDTH, min(width, CFG.thumbnails.max_width))
+    # Without a version the image behind url may change, so it is only cached briefly
+    version = request.args.get("v", "")
+    if len(version) > MAX_VERSION_LENGTH or not all(c.isalnum() or c in "._-" for c in version):
+        abort(400)
+    fmt = "webp" if "image/webp" in request.headers.get("Accept", "") else "jpeg"
+    try:
+        path, content_type = get_thumbnail(url, width, fmt, version)
+    except ValueError:
+        abort(400)
+    except Exception as e:
+        print(f"[approval] thumbnail failed for {url}: {e}")
+        abort(502)
+    resp = send_file(path, mimetype=content_type, max_age=86400 if version else 300)
+    resp.headers["Vary"] = "Accept"
+    return resp
+
 @approval_bp.post("/decision")
 def decision():
     item_id = int(request.form["id"])
     action = request.form["action"]
     notes = request.form.get("notes", "")
     reviewer = request.form.get("reviewer", "")
-    status = "approved" if action == "approve" else "rejected"
+    if action == "regenerate":
+        # Served from a pre-generated alternate when there is one; no new API call
+        if promote_alternate(item_id, reviewer, notes):
+            flash(f"Item {item_id}: showing next alternate candidate")
+            return redirect(url_for("approval.pending"))
+        status = "regenerate"
+    else:
+        status = "approved" if action == "approve" else "rejected"
     update_review(item_id, status, reviewer, notes)
     flash(f"Updated item {item_id} -> {status}")
     return redirect(url_for("approval.pending"))
+
+@approval_bp.post("/batch-decision")
+def batch_decision():
+    ids = [int(i) for i in request.form.getlist("ids")]
+    action = request.form["action"]
+    notes = request.form.get("notes", "")
+    reviewer = request.form.get("reviewer", "")
+    page = request.form.get("page", 1)
+    limit = request.form.get("limit", 40)
+    if not ids:
+        flash("No items selected")
+        return redirect(url_for("approval.grid", page=page, limit=limit))
+    status = "approved" if action == "approve" else "rejected"
+    updated = update_reviews_batch(ids, status, reviewer, notes)
+    skipped = len(ids) - updated
+    flash(f"Updated {updated} items -> {status}"
+          + (f"; {skipped} skipped (already decided or leased by another reviewer)" if skipped else ""))
+    return redirect(url_for("approval.grid", page=page, limit=limit))
@@ -1,7 +1,14 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request, jsonify
+from ..services.dashboard_service import get_summary
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
 @dashboard_bp.route("/dashboard")
 def dashboard():
-    return render_template("dashboard.html")
+    days = request.args.get("days", 14, type=int)
+    return render_template("dashboard.html", summary=get_summary(days))
+
+@dashboard_bp.route("/dashboard/api/summary")
+def summary():
+    days = request.args.get("days", 14, type=int)
+    return jsonify(get_summary(days))
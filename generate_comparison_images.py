@@ -0,0 +1,146 @@
+import pandas as pd
+import boto3
+import requests
+from dotenv import load_dotenv
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+from urllib.parse import urlparse
+
+from flask_app.services.comparison import render_comparison, comparison_key
+from flask_app.services.image_keys import publish_key, immutable_keys_enabled
+from flask_app.services.cdn_purge import purge_urls, DEFAULT_API_BASE
+
+# Load environment variables
+load_dotenv()
+
+# Configuration settings
+AWS_CONFIG = {
+    'aws_access_key_id': os.getenv('AWS_ACCESS_KEY_ID'),
+    'aws_secret_access_key': os.getenv('AWS_SECRET_ACCESS_KEY')
+}
+
+S3_CONFIG = {
+    'bucket_name': os.getenv('S3_BUCKET_NAME', 'static.wowcher.co.uk'),
+    # Content-hash keys with a one-year immutable Cache-Control instead of overwriting in place
+    'immutable_keys': immutable_keys_enabled()
+}
+
+# Cloudflare purge for comparison images rewritten in place; skipped unless zone and token are set
+CDN_CONFIG = {
+    'zone_id': os.getenv('CLOUDFLARE_ZONE_ID'),
+    'api_token': os.getenv('CLOUDFLARE_API_TOKEN'),
+    'api_base': os.getenv('CLOUDFLARE_API_BASE', DEFAULT_API_BASE)
+}
+
+def purge_uploaded(urls):
+    """Purge overwritten URLs from the CDN; content-hash keys are new URLs and need no purge."""
+    if not urls or S3_CONFIG['immutable_keys'] or not (CDN_CONFIG['zone_id'] and CDN_CONFIG['api_token']):
+        return None
+    stats = purge_urls(urls, CDN_CONFIG['zone_id'], CDN_CONFIG['api_token'], api_base=CDN_CONFIG['api_base'])
+    print(f"CDN purge: {stats}")
+    return stats
+
+def download_bytes(url):
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    return response.content
+
+def process_single_row(s3_client, original_url, variant_url):
+    """
+    Render and upload the side-by-side comparison image for one original/variant pair
+    """
+    try:
+        original = download_bytes(original_url)
+        variant = download_bytes(variant_url)
+        
+        # Store next to the variant: images/deal/<deal>/<image>_compare.jpg
+        body = render_comparison(original, variant)
+        key, cache_control = publish_key(
+            comparison_key(urlparse(variant_url).path.lstrip('/')), body, S3_CONFIG['immutable_keys']
+        )
+        s3_client.put_object(
+            Body=body,
+            Bucket=S3_CONFIG['bucket_name'],
+            Key=key,
+            ContentType='image/jpeg',
+            CacheControl=cache_control
+        )
+        return {'success': True, 'compare_url': f"https://{S3_CONFIG['bucket_name']}/{key}"}
+    
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+def process_csv_batch(csv_file_path, max_workers=10, output_file=None):
+    """
+    Add a compare_url column to a review CSV (id, image_url_pos_0, s3_url) by pre-rendering
+    one comparison image per row
+    """
+    df = pd.read_csv(csv_file_path)
+    
+    required_cols = ['image_url_pos_0', 's3_url']
+    missing_cols = [col for col in required_cols if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"CSV missing required columns: {missing_cols}")
+    
+    if 'compare_url' not in df.columns:
+        df['compare_url'] = None
+    
+    todo = df[df['compare_url'].isna() & df['image_url_pos_0'].notna() & df['s3_url'].notna()]
+    print(f"Rendering {len(todo)} comparison images...")
+    
+    s3_client = boto3.client('s3', **AWS_CONFIG)
+    success_count = 0
+    failed_count = 0
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_index = {
+            executor.submit(process_single_row, s3_client, row['image_url_pos_0'], row['s3_url']): idx
+            for idx, row in todo.iterrows()
+        }
+        
+        with tqdm(total=len(todo), desc="Rendering Comparisons") as pbar:
+            for future in as_completed(future_to_index):
+                idx = future_to_index[future]
+                result = future.result()
+                if result['success']:
+                    df.loc[idx, 'compare_url'] = result['compare_url']
+                    success_count += 1
+                else:
+                    failed_count += 1
+                    print(f"Row {idx} failed: {result['error']}")
+                pbar.set_postfix({"Success": success_count, "Failed": failed_count})
+                pbar.update(1)
+    
+    output_file = output_file or csv_file_path
+    df.to_csv(output_file, index=False)
+    print(f"Saved {success_count} comparison URLs to {output_file} ({failed_count} failed)")
+
+    purge_uploaded(df.loc[todo.index, 'compare_url'].dropna().tolist())
+    
+    return {
+        'success_count': success_count,
+        'failed_count': failed_count
+    }
+
+def main():
+    """
+    Main function for command line usage
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Pre-render side-by-side comparison images for a review CSV')
+    parser.add_argument('csv_file', help='Path to review CSV with image_url_pos_0 and s3_url columns')
+    parser.add_argument('--workers', type=int, default=10, help='Number of parallel workers (default: 10)')
+    parser.add_argument('--output', help='Output CSV path (default: update the input file)')
+    
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.csv_file):
+        print(f"Error: CSV file not found: {args.csv_file}")
+        return
+    
+    process_csv_batch(args.csv_file, max_workers=args.workers, output_file=args.output)
+
+if __name__ == "__main__":
+    main()
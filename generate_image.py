@@ -11,6 +11,9 @@ import argparse
 # Load environment variables
 load_dotenv()
 
+# Imported after load_dotenv so price overrides in .env apply
+from flask_app.services.cost_ledger import usage_cost
+
 # Initialize OpenAI client
 client = OpenAI(api_key=os.getenv('OPEN_AI_API_KEY'))
 
@@ -166,12 +169,9 @@ def generate_image(deal_id, output_filename=None):
     print(f"Input tokens: {result.usage.input_tokens}")
     print(f"Output tokens: {result.usage.output_tokens}")
     print(f"Input tokens details: {result.usage.input_tokens_details}")
-    # Calculate cost based on pricing
-    input_text_tokens = result.usage.input_tokens_details.text_tokens
-    input_image_tokens = result.usage.input_tokens_details.image_tokens
-    output_tokens = result.usage.output_tokens
-    cost = (input_text_tokens * 5 + input_image_tokens * 10 + output_tokens * 40) / 1000000
-    print(f"Cost: ${cost:.6f}")
+    # Same pricing as the generation service's cost ledger
+    cost = usage_cost(result.usage)
+    print(f"Cost: ${cost['cost_usd']:.6f}")
     
     return output_filename, result
 
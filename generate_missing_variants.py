@@ -10,6 +10,8 @@ from tqdm import tqdm
 from PIL import Image, ImageOps
 import io
 
+from flask_app.services.cdn_purge import purge_urls, DEFAULT_API_BASE
+
 # Load environment variables
 load_dotenv()
 
@@ -23,6 +25,13 @@ S3_CONFIG = {
     'bucket_name': os.getenv('S3_BUCKET_NAME', 'static.wowcher.co.uk')
 }
 
+# Cloudflare purge for the fixed keys written here; skipped unless zone and token are set
+CDN_CONFIG = {
+    'zone_id': os.getenv('CLOUDFLARE_ZONE_ID'),
+    'api_token': os.getenv('CLOUDFLARE_API_TOKEN'),
+    'api_base': os.getenv('CLOUDFLARE_API_BASE', DEFAULT_API_BASE)
+}
+
 # Target sizes for image variants
 TARGET_SIZES = {
     "": (777, 520),
@@ -175,7 +184,7 @@ def upload_missing_variants_to_s3(variant_files, deal_id, image_id, missing_suff
                     new_key,
                     ExtraArgs={
                         'ContentType': 'image/jpeg',
-                        'CacheControl': 'no-cache'
+                        'CacheControl': 'no-cache, no-store, must-revalidate'
                     }
                 )
             
@@ -329,6 +338,12 @@ def process_csv_batch(csv_file_path, max_workers=10):
     print(f"Failed: {failed_count}")
     print(f"Total variant images generated: {total_variants_generated}")
     
+    # Drop any edge-cached copy (including cached 404s) of the keys just written
+    uploaded = [url for r in results if r['success'] for url in r.get('uploaded_urls', {}).values()]
+    if uploaded and CDN_CONFIG['zone_id'] and CDN_CONFIG['api_token']:
+        purge_stats = purge_urls(uploaded, CDN_CONFIG['zone_id'], CDN_CONFIG['api_token'], api_base=CDN_CONFIG['api_base'])
+        print(f"CDN purge: {purge_stats}")
+
     # Show failed items if any
     failed_results = [r for r in results if not r['success']]
     if failed_results:
@@ -3,6 +3,8 @@ import os
 import time
 from PIL import Image
 
+from flask_app.services.image_keys import IMMUTABLE_CACHE_CONTROL, immutable_keys_enabled
+
 def processImage(source, dealId, n, folder, chatGPTFolder, is_url=True):
     if n > 10:
         return
@@ -317,7 +319,8 @@ def insert_variant_image_oracle(deal_id, new_image_id, variant_s3_url, s3_client
             Key=new_variant_key,
             MetadataDirective='REPLACE',
             ContentType='image/jpeg',
-            CacheControl='no-cache'
+            # new_image_id is freshly allocated, so this key is write-once
+            CacheControl=IMMUTABLE_CACHE_CONTROL if immutable_keys_enabled() else 'no-cache'
         )
         
         # Create filename for Oracle record
@@ -0,0 +1,114 @@
+import pandas as pd
+import requests
+from dotenv import load_dotenv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+
+# Load environment variables before the flask_app config reads them
+load_dotenv()
+
+from flask_app.services.prescreen import screen_batch, describe
+
+# Configuration settings
+PRESCREEN_CONFIG = {
+    # Rows downloaded and screened together as one NumPy batch
+    'batch_size': 64,
+    'max_workers': 16
+}
+
+def download_bytes(url):
+    if not isinstance(url, str) or not url:
+        return None
+    try:
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        return response.content
+    except Exception as e:
+        print(f"Download failed for {url}: {e}")
+        return None
+
+def prescreen_csv(csv_file_path, output_file=None, batch_size=None, max_workers=None):
+    """
+    Pre-screen the variants in a review/winners CSV (image_url_pos_0, s3_url) before manual review.
+
+    Undecided rows that fail a hard check are marked rejected with a
+    'prescreen: ...' note, so the review app skips them; soft failures are
+    written to prescreen_flags and shown to the reviewer. Rows whose variant
+    could not be downloaded stay undecided and are counted separately; only
+    bytes that were fetched but don't decode are rejected as unreadable.
+    """
+    batch_size = batch_size or PRESCREEN_CONFIG['batch_size']
+    max_workers = max_workers or PRESCREEN_CONFIG['max_workers']
+    df = pd.read_csv(csv_file_path)
+
+    required_cols = ['image_url_pos_0', 's3_url']
+    missing_cols = [col for col in required_cols if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"CSV missing required columns: {missing_cols}")
+
+    for col in ('review_result', 'review_notes', 'prescreen_flags'):
+        if col not in df.columns:
+            df[col] = ""
+        df[col] = df[col].fillna("").astype(str)
+
+    todo = df.index[(df['review_result'] == "") & df['s3_url'].notna()].tolist()
+    print(f"Pre-screening {len(todo)} undecided variants...")
+
+    rejected = flagged = failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with tqdm(total=len(todo), desc="Pre-screening") as pbar:
+            for start in range(0, len(todo), batch_size):
+                chunk = todo[start:start + batch_size]
+                variants = list(executor.map(download_bytes, df.loc[chunk, 's3_url']))
+                originals = list(executor.map(download_bytes, df.loc[chunk, 'image_url_pos_0']))
+                # A failed download says nothing about the image: leave the row for a later run.
+                # Without the original only the near-original check is skipped.
+                fetched = [pos for pos, data in enumerate(variants) if data is not None]
+                failed += len(chunk) - len(fetched)
+                results = screen_batch([variants[pos] for pos in fetched], [originals[pos] for pos in fetched])
+                for idx, result in zip([chunk[pos] for pos in fetched], results):
+                    df.at[idx, 'prescreen_flags'] = ",".join(result['flags'])
+                    if not result['passed']:
+                        df.at[idx, 'review_result'] = 'rejected'
+                        df.at[idx, 'review_notes'] = describe(result)
+                        rejected += 1
+                    elif result['flags']:
+                        flagged += 1
+                pbar.set_postfix({"Rejected": rejected, "Flagged": flagged, "Download failed": failed})
+                pbar.update(len(chunk))
+
+    output_file = output_file or csv_file_path
+    df.to_csv(output_file, index=False)
+    print(f"Saved to {output_file}: {rejected} rejected, {flagged} flagged, "
+          f"{failed} not screened (download failed), {len(todo) - rejected} left for review")
+
+    return {
+        'screened': len(todo) - failed,
+        'rejected': rejected,
+        'flagged': flagged,
+        'download_failed': failed
+    }
+
+def main():
+    """
+    Main function for command line usage
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Reject obviously broken variants in a review CSV before manual review')
+    parser.add_argument('csv_file', help='Path to review CSV with image_url_pos_0 and s3_url columns')
+    parser.add_argument('--batch-size', type=int, default=PRESCREEN_CONFIG['batch_size'], help='Rows screened per batch (default: 64)')
+    parser.add_argument('--workers', type=int, default=PRESCREEN_CONFIG['max_workers'], help='Parallel downloads (default: 16)')
+    parser.add_argument('--output', help='Output CSV path (default: update the input file)')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.csv_file):
+        print(f"Error: CSV file not found: {args.csv_file}")
+        return
+
+    prescreen_csv(args.csv_file, output_file=args.output, batch_size=args.batch_size, max_workers=args.workers)
+
+if __name__ == "__main__":
+    main()
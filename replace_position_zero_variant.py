@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 import os
 import oracledb
 import psycopg2
+from psycopg2.extras import execute_values
 from datetime import datetime
 import time
 from urllib.parse import urlparse
@@ -15,6 +16,8 @@ from tqdm import tqdm
 from PIL import Image, ImageOps
 import io
 
+from flask_app.services.image_keys import IMMUTABLE_CACHE_CONTROL, immutable_keys_enabled
+
 # Load environment variables
 load_dotenv()
 
@@ -25,7 +28,10 @@ AWS_CONFIG = {
 }
 
 S3_CONFIG = {
-    'bucket_name': os.getenv('S3_BUCKET_NAME', 'static.wowcher.co.uk')
+    'bucket_name': os.getenv('S3_BUCKET_NAME', 'static.wowcher.co.uk'),
+    # Keys here embed a freshly allocated image ID and are never rewritten,
+    # so they can be cached as immutable when opted in
+    'cache_control': IMMUTABLE_CACHE_CONTROL if immutable_keys_enabled() else 'no-cache'
 }
 
 REDSHIFT_CONFIG = {
@@ -43,6 +49,9 @@ ORACLE_CONFIG = {
     'dsn': os.getenv("ORACLE_DSN")
 }
 
+# Rows per multi-row INSERT when staging Redshift batch updates
+REDSHIFT_STAGING_PAGE_SIZE = 1000
+
 # Target sizes for image variants
 TARGET_SIZES = {
     "": (777, 520),
@@ -225,7 +234,7 @@ def upload_variants_to_s3(variant_files, deal_id, new_image_id):
                     new_key,
                     ExtraArgs={
                         'ContentType': 'image/jpeg',
-                        'CacheControl': 'no-cache'
+                        'CacheControl': S3_CONFIG['cache_control']
                     }
                 )
             
@@ -513,18 +522,14 @@ def update_redshift_status_batch(image_mapping):
             )
         """)
         
-        # Insert data into temp table using VALUES
-        values_list = []
-        for original_id, new_variant_id in image_mapping.items():
-            values_list.append(f"({original_id}, {new_variant_id})")
-        
-        values_clause = ",".join(values_list)
-        insert_query = f"""
-            INSERT INTO temp_image_updates (original_image_id, new_variant_image_id)
-            VALUES {values_clause}
-        """
-        
-        cursor.execute(insert_query)
+        # Stage id pairs into the temp table in parameterised, fixed-size pages
+        # so statement size and memory stay bounded regardless of batch size
+        execute_values(
+            cursor,
+            "INSERT INTO temp_image_updates (original_image_id, new_variant_image_id) VALUES %s",
+            ((int(original_id), int(new_variant_id)) for original_id, new_variant_id in image_mapping.items()),
+            page_size=REDSHIFT_STAGING_PAGE_SIZE
+        )
         
         # Single UPDATE with JOIN
         update_query = """
@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import pandas as pd
+
+# Default number of rows handed to a reviewer at a time, and how long they hold them
+LEASE_BATCH_SIZE = 20
+LEASE_SECONDS = 600
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS review_items (
+    row_index INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    review_result TEXT NOT NULL DEFAULT '',
+    review_notes TEXT,
+    reviewer TEXT,
+    reviewed_ts REAL,
+    lease_owner TEXT,
+    lease_expires REAL
+);
+CREATE INDEX IF NOT EXISTS idx_review_items_queue ON review_items (review_result, lease_expires);
+"""
+
+# Columns copied into each queued row; enough to render a review without the source file
+PAYLOAD_COLUMNS = [
+    'id', 'email_subject', 'image_url_pos_0', 's3_url', 'compare_url', 'image_id_pos_0',
+    'category_name', 'visitors_last_7_days', 'revenue_last_14_days', 'prescreen_flags',
+]
+
+
+class SQLiteReviewBackend:
+    """
+    Shared review queue in a SQLite file so several reviewers can work one review file.
+
+    Rows are leased to a reviewer in batches with an expiry; a decision is only
+    accepted while the row is undecided and not actively leased by someone else,
+    so nothing is reviewed twice and an abandoned lease returns to the queue.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA_SQL)
+
+    def import_frame(self, df):
+        """Queue every row of df; rows already in the queue keep their decisions."""
+        cols = [c for c in PAYLOAD_COLUMNS if c in df.columns]
+        records = df[cols].astype(object).where(df[cols].notna(), None).to_dict(orient='records')
+        existing = df['review_result'] if 'review_result' in df.columns else pd.Series("", index=df.index)
+        rows = []
+        for pos, record in enumerate(records):
+            result = existing.iloc[pos]
+            rows.append((pos, json.dumps(record, default=str), "" if pd.isna(result) else str(result)))
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO review_items (row_index, payload, review_result) VALUES (?, ?, ?)",
+                rows
+            )
+            self.conn.execute("COMMIT")
+        return len(rows)
+
+    def lease(self, reviewer, batch_size=LEASE_BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+        """Top the reviewer up to batch_size undecided rows and return everything they hold."""
+        now = time.time()
+        with self.lock:
+            # BEGIN IMMEDIATE takes the write lock, so concurrent leasers queue up
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                held = self.conn.execute(
+                    "SELECT COUNT(*) FROM review_items WHERE review_result = '' AND lease_owner = ? AND lease_expires >= ?",
+                    (reviewer, now)
+                ).fetchone()[0]
+                wanted = batch_size - held
+                if wanted > 0:
+                    self.conn.execute(
+                        """
+                        UPDATE review_items SET lease_owner = ?, lease_expires = ?
+                        WHERE row_index IN (
+                            SELECT row_index FROM review_items
+                            WHERE review_result = ''
+                              AND (lease_owner IS NULL OR lease_expires < ?)
+                            ORDER BY row_index
+                            LIMIT ?
+                        )
+                        """,
+                        (reviewer, now + lease_seconds, now, wanted)
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            cur = self.conn.execute(
+                """
+                SELECT row_index, payload, lease_expires FROM review_items
+                WHERE review_result = '' AND lease_owner = ? AND lease_expires >= ?
+                ORDER BY row_index
+                """,
+                (reviewer, now)
+            )
+            return [
+                {**json.loads(payload), 'row_index': row_index, 'lease_expires': expires}
+                for row_index, payload, expires in cur.fetchall()
+            ]
+
+    def decide(self, row_index, reviewer, result, notes=None):
+        """Record a decision; False if the row is already decided or leased to another reviewer."""
+        now = time.time()
+        with self.lock:
+            cur = self.conn.execute(
+                """
+                UPDATE review_items
+                SET review_result = ?, review_notes = COALESCE(?, review_notes), reviewer = ?,
+                    reviewed_ts = ?, lease_owner = NULL, lease_expires = NULL
+                WHERE row_index = ? AND review_result = ''
+                  AND (lease_owner = ? OR lease_owner IS NULL OR lease_expires < ?)
+                """,
+                (result, notes, reviewer, now, int(row_index), reviewer, now)
+            )
+            return cur.rowcount == 1
+
+    def release(self, reviewer):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE review_items SET lease_owner = NULL, lease_expires = NULL WHERE lease_owner = ? AND review_result = ''",
+                (reviewer,)
+            )
+
+    def counts(self):
+        with self.lock:
+            cur = self.conn.execute("SELECT review_result, COUNT(*) FROM review_items GROUP BY review_result")
+            return {result: count for result, count in cur.fetchall()}
+
+    def apply_to_frame(self, df):
+        """Copy queued decisions onto df (by row position) for export."""
+        with self.lock:
+            decided = self.conn.execute(
+                "SELECT row_index, review_result, review_notes FROM review_items WHERE review_result != ''"
+            ).fetchall()
+        for col in ('review_result', 'review_notes'):
+            if col not in df.columns:
+                df[col] = ""
+            elif df[col].dtype != object:
+                df[col] = df[col].astype(object)
+        for row_index, result, notes in decided:
+            df.iloc[row_index, df.columns.get_loc('review_result')] = result
+            if notes is not None:
+                df.iloc[row_index, df.columns.get_loc('review_notes')] = notes
+        return df
+
+
+class RedshiftReviewBackend:
+    """
+    Shared review queue over temp.image_to_approve, leasing through the approval store.
+    """
+
+    def __init__(self, env=None):
+        # flask_app.config reads REDSHIFT_* when first imported, so the settings have to be
+        # in the environment before the import: from .env, then any explicit values (secrets)
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass
+        for key, value in (env or {}).items():
+            os.environ.setdefault(key, str(value))
+        # Imported lazily: the Streamlit deployment doesn't ship the Flask/Redshift dependencies
+        from flask_app.services import approval_store
+        self.store = approval_store
+
+    def lease(self, reviewer, batch_size=LEASE_BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+        rows = self.store.lease_pending(reviewer, batch_size, lease_seconds)
+        return [
+            {
+                'row_index': r['id'],
+                'id': r['deal_voucher_id'],
+                'image_id_pos_0': r['image_id_pos_0'],
+                'image_url_pos_0': r['original_url'],
+                's3_url': r['variant_s3_url'],
+                'compare_url': r['compare_url'],
+                'category_name': r['category_name'],
+                'prompt_source': r['prompt_source'],
+                'prescreen_flags': r['prescreen_flags'],
+                'lease_expires': r['lease_expires_ts'],
+            }
+            for r in rows
+        ]
+
+    def decide(self, row_index, reviewer, result, notes=None):
+        # A stored alternate candidate answers "Regenerate" and the row goes back to the queue
+        if result == 'regenerate' and self.store.promote_alternate(row_index, reviewer, notes or ""):
+            return True
+        return self.store.decide_leased(row_index, reviewer, result, notes or "")
+
+    def release(self, reviewer):
+        self.store.release_leases(reviewer)
+
+    def counts(self):
+        # Same shape as the SQLite queue: undecided rows are counted under ''
+        return {
+            ('' if status == 'pending' else status): count
+            for status, count in self.store.status_counts().items()
+        }
+
+
+def default_queue_path(file_path):
+    return f"{os.path.splitext(file_path)[0]}.review.sqlite"
@@ -5,10 +5,20 @@ import requests
 from io import BytesIO
 from PIL import Image
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from bisect import bisect_right
+from review_backend import SQLiteReviewBackend, RedshiftReviewBackend, default_queue_path
 import tempfile
 import gc
 import time
-from functools import lru_cache
+import json
+import atexit
+import threading
+import queue
+import streamlit.components.v1 as components
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Set page config
 st.set_page_config(layout="wide", page_title="Image Variant Review Tool")
@@ -22,229 +32,555 @@ if 'temp_file_path' not in st.session_state:
     st.session_state.temp_file_path = None
 if 'current_df' not in st.session_state:
     st.session_state.current_df = None
-if 'results_count' not in st.session_state:
-    st.session_state.results_count = {'approved': 0, 'rejected': 0, 'regenerate': 0, 'pending': 0}
-if 'preloaded_images' not in st.session_state:
-    st.session_state.preloaded_images = {}
-if 'next_item_preloaded' not in st.session_state:
-    st.session_state.next_item_preloaded = False
+if 'review_index' not in st.session_state:
+    st.session_state.review_index = None
 if 'last_action_time' not in st.session_state:
     st.session_state.last_action_time = time.time()
+if 'journal_entries' not in st.session_state:
+    st.session_state.journal_entries = 0
+if 'shared_batch' not in st.session_state:
+    st.session_state.shared_batch = []
+if 'fast_mode' not in st.session_state:
+    st.session_state.fast_mode = False
 
-# Number of images to preload
+# Number of items ahead to prefetch
 PRELOAD_COUNT = 5
+# Decoded images kept in the process-wide cache
+IMAGE_CACHE_SIZE = 64
+PREFETCH_WORKERS = 4
+
+# Fold the decisions journal back into the CSV after this many entries
+JOURNAL_COMPACT_EVERY = 500
+# Fast review mode: buffered decisions are written at least this often, in batches
+JOURNAL_FLUSH_SECONDS = 0.5
+JOURNAL_FLUSH_BATCH = 50
+
+def fetch_image(url):
+    response = requests.get(url, timeout=10)
+    response.raise_for_status()
+    img = Image.open(BytesIO(response.content))
+    # Reduce memory by converting to RGB if RGBA and resize if too large
+    if img.mode == 'RGBA':
+        img = img.convert('RGB')
+    # Limit image size to reduce memory usage
+    if max(img.size) > 1200:
+        img.thumbnail((1200, 1200), Image.LANCZOS)
+    else:
+        img.load()
+    return img
+
+class ImagePrefetcher:
+    """Background thread pool that downloads and decodes images into a bounded LRU keyed by URL."""
+
+    def __init__(self, max_entries=IMAGE_CACHE_SIZE, workers=PREFETCH_WORKERS):
+        self.max_entries = max_entries
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self.lock = threading.Lock()
+        self.images = OrderedDict()
+        self.in_flight = {}
+
+    def _store(self, url, img):
+        with self.lock:
+            self.in_flight.pop(url, None)
+            if img is None:
+                return
+            self.images[url] = img
+            self.images.move_to_end(url)
+            while len(self.images) > self.max_entries:
+                self.images.popitem(last=False)
+
+    def _fetch(self, url):
+        img = None
+        try:
+            img = fetch_image(url)
+            return img
+        finally:
+            self._store(url, img)
+
+    def prefetch(self, urls):
+        submitted = 0
+        with self.lock:
+            for url in urls:
+                if url and url not in self.images and url not in self.in_flight:
+                    self.in_flight[url] = self.executor.submit(self._fetch, url)
+                    submitted += 1
+        return submitted
+
+    def get(self, url):
+        with self.lock:
+            if url in self.images:
+                self.images.move_to_end(url)
+                return self.images[url]
+            future = self.in_flight.get(url)
+            if future is None:
+                future = self.in_flight[url] = self.executor.submit(self._fetch, url)
+        return future.result()
+
+    def __len__(self):
+        return len(self.images)
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+
+@st.cache_resource
+def get_prefetcher():
+    # One prefetcher per process, shared by all sessions and reruns
+    return ImagePrefetcher()
 
-# Function to load an image from URL with memory optimization
-@st.cache_data(ttl=300, max_entries=50)
 def load_image_from_url(url):
     try:
-        # Add cache-busting parameter to get the most recent image
-        cache_buster = f"?t={int(time.time())}"
-        url_with_cache_buster = url + cache_buster
-        
-        response = requests.get(url_with_cache_buster, timeout=10)
-        if response.status_code == 200:
-            img = Image.open(BytesIO(response.content))
-            # Reduce memory by converting to RGB if RGBA and resize if too large
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-            # Limit image size to reduce memory usage
-            if max(img.size) > 1200:
-                img.thumbnail((1200, 1200), Image.LANCZOS)
-            return img
-        else:
-            st.error(f"Failed to load image: {response.status_code}")
-            return None
+        return get_prefetcher().get(url)
     except Exception as e:
         st.error(f"Error loading image: {str(e)}")
         return None
 
-# Version of load_image that doesn't use streamlit cache for prefetching
-@lru_cache(maxsize=20)
-def prefetch_image(url):
-    try:
-        # Add cache-busting parameter to get the most recent image
-        cache_buster = f"?t={int(time.time())}"
-        url_with_cache_buster = url + cache_buster
-        
-        response = requests.get(url_with_cache_buster, timeout=10)
-        if response.status_code == 200:
-            img = Image.open(BytesIO(response.content))
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-            if max(img.size) > 1200:
-                img.thumbnail((1200, 1200), Image.LANCZOS)
-            # Just return True to indicate success
-            return True
-        return False
-    except:
-        return False
-
-# Preload images without using threading to avoid session state issues
 def preload_images(df, filtered_indices, current_index, count=PRELOAD_COUNT):
+    """Queue the originals and variants of the next `count` items for background download."""
     try:
-        total = len(filtered_indices)
-        preloaded = 0
-        urls_to_preload = []
-        
-        # Collect URLs to preload
-        for i in range(current_index, min(current_index + count, total)):
-            if i >= total:
-                break
-                
-            idx = filtered_indices[i]
-            row = df.iloc[idx]
-            
-            # Check if we have the original image URL
-            if 'image_url_pos_0' in row and row['image_url_pos_0']:
-                url = row['image_url_pos_0']
-                if url not in st.session_state.preloaded_images:
-                    urls_to_preload.append(url)
-            
-            # Check if we have the variant image URL
-            if 's3_url' in row and row['s3_url']:
-                url = row['s3_url']
-                if url not in st.session_state.preloaded_images:
-                    urls_to_preload.append(url)
-        
-        # Preload the most imminent images first (next item)
-        if current_index < total:
-            next_idx = filtered_indices[current_index]
-            next_row = df.iloc[next_idx]
-            
-            if 'image_url_pos_0' in next_row and next_row['image_url_pos_0']:
-                url = next_row['image_url_pos_0']
-                # Use the streamlit cache version for immediate next
-                img = load_image_from_url(url)
-                if img is not None:
-                    st.session_state.preloaded_images[url] = "loaded"
-                    preloaded += 1
-            
-            if 's3_url' in next_row and next_row['s3_url']:
-                url = next_row['s3_url']
-                # Use the streamlit cache version for immediate next
-                img = load_image_from_url(url)
-                if img is not None:
-                    st.session_state.preloaded_images[url] = "loaded"
-                    preloaded += 1
-            
-            # Mark that we've preloaded the next item
-            st.session_state.next_item_preloaded = True
-            
-        # For the rest, use prefetch which won't block or cause session issues
-        for url in urls_to_preload:
-            if url not in st.session_state.preloaded_images:
-                # Just mark as preloaded - we've initiated the fetch
-                st.session_state.preloaded_images[url] = "prefetched"
-                # Call the prefetch function - this doesn't return the image
-                # but primes the cache
-                prefetch_image(url)
-                preloaded += 1
-                    
-        # Clean up old preloaded images to avoid memory bloat
-        if len(st.session_state.preloaded_images) > 30:
-            # Keep only the most recent
-            keys_to_keep = list(st.session_state.preloaded_images.keys())[-20:]
-            new_preloaded = {}
-            for key in keys_to_keep:
-                new_preloaded[key] = st.session_state.preloaded_images[key]
-            st.session_state.preloaded_images = new_preloaded
-            
-        return preloaded
-            
+        urls = []
+        for i in range(current_index, min(current_index + count, len(filtered_indices))):
+            urls.extend(review_image_urls(df.iloc[filtered_indices[i]]))
+        return get_prefetcher().prefetch(urls)
     except Exception as e:
         # Don't crash the app if preloading fails
         print(f"Error preloading images: {str(e)}")
         return 0
 
-# Load the data with chunking for large files
-@st.cache_data(ttl=60)
-def load_data(file_path):
-    # For very large files, consider reading in chunks
-    if file_path.endswith('.csv'):
+# Columnar review files are memory-mapped and only these columns are loaded
+# eagerly; anything else (prompt, token_info, ...) is read per row on demand
+COLUMNAR_EXTENSIONS = ('.parquet', '.arrow', '.feather')
+EAGER_COLUMNS = [
+    'id', 'email_subject', 'image_url_pos_0', 's3_url', 'compare_url', 'image_id_pos_0',
+    'category_name', 'review_result', 'review_notes', 'alternate_urls', 'prescreen_flags',
+    'visitors_last_7_days', 'revenue_last_14_days',
+]
+
+# Variant columns a review can change, by promoting a pre-generated alternate on "Regenerate"
+VARIANT_COLUMNS = ('s3_url', 'compare_url', 'alternate_urls')
+# Rows per Parquet row group / Arrow record batch when a review file is written, so
+# fetching one row's lazy columns decodes a small chunk rather than the whole file
+LAZY_CHUNK_ROWS = 1024
+# Decoded lazy-column chunks kept in memory (neighbouring rows share a chunk)
+LAZY_CHUNK_CACHE = 8
+
+def is_columnar(file_path):
+    return file_path.lower().endswith(COLUMNAR_EXTENSIONS)
+
+def open_ipc(file_path, columns=None):
+    """Arrow IPC reader that only decodes (and decompresses) the given columns."""
+    options = None
+    if columns:
+        schema = pa.ipc.open_file(pa.memory_map(file_path, 'r')).schema
+        options = pa.ipc.IpcReadOptions(included_fields=[schema.get_field_index(c) for c in columns])
+    return pa.ipc.open_file(pa.memory_map(file_path, 'r'), options=options)
+
+def read_review_table(file_path, columns=None):
+    if file_path.lower().endswith('.parquet'):
+        return pq.read_table(file_path, columns=columns, memory_map=True)
+    # Arrow IPC / Feather v2: zero-copy from the memory map when uncompressed
+    table = open_ipc(file_path, columns).read_all()
+    return table.select(columns) if columns is not None else table
+
+def review_file_columns(file_path):
+    if file_path.lower().endswith('.parquet'):
+        return pq.read_schema(file_path).names
+    return pa.ipc.open_file(pa.memory_map(file_path, 'r')).schema.names
+
+def read_review_frame(file_path):
+    if is_columnar(file_path):
+        eager = [c for c in review_file_columns(file_path) if c in EAGER_COLUMNS]
+        return read_review_table(file_path, eager).to_pandas()
+    return pd.read_csv(file_path)
+
+# Load the data, keyed on modification time so an unchanged file is parsed once
+@st.cache_data(show_spinner=False)
+def load_data(file_path, mtime=None):
+    if file_path.lower().endswith('.csv') or is_columnar(file_path):
         try:
-            return pd.read_csv(file_path)
+            return read_review_frame(file_path)
         except Exception as e:
-            st.error(f"Error loading CSV: {str(e)}")
+            st.error(f"Error loading review file: {str(e)}")
             return None
     return None
 
-# Save data function with incremental update
-def save_data(df, file_path=None, row_index=None, result=None, notes=None):
-    # Update the results count
-    if result:
-        if result == 'approved':
-            st.session_state.results_count['approved'] += 1
-        elif result == 'rejected':
-            st.session_state.results_count['rejected'] += 1
-        elif result == 'regenerate':
-            st.session_state.results_count['regenerate'] += 1
-        
-        # Update pending count
-        total = len(df)
-        reviewed = st.session_state.results_count['approved'] + st.session_state.results_count['rejected'] + st.session_state.results_count['regenerate']
-        st.session_state.results_count['pending'] = total - reviewed
-    
-    # If using a local file, save directly to it
-    if file_path:
-        # If we're just updating a single row, only write that change
-        if row_index is not None and (result or notes is not None):
-            try:
-                # Always do a full save to ensure consistency
-                df.to_csv(file_path, index=False)
-                if result:
-                    st.success(f"Updated row {row_index} in {file_path}")
-                elif notes is not None:
-                    st.success(f"Notes saved for row {row_index} in {file_path}")
-            except Exception as e:
-                # If save fails, show error
-                st.error(f"Error saving to {file_path}: {str(e)}")
+@st.cache_resource
+def open_row_chunks(file_path, mtime=None):
+    """(reader over the lazy columns, lazy column names, first row of each row group / record batch)."""
+    columns = review_file_columns(file_path)
+    lazy = [c for c in columns if c not in EAGER_COLUMNS]
+    if file_path.lower().endswith('.parquet'):
+        reader = pq.ParquetFile(file_path, memory_map=True)
+        sizes = [reader.metadata.row_group(i).num_rows for i in range(reader.metadata.num_row_groups)]
+    else:
+        reader = open_ipc(file_path, lazy)
+        # Batch lengths aren't in the IPC footer; count them by decoding one small column
+        counter = open_ipc(file_path, columns[:1])
+        sizes = [counter.get_batch(i).num_rows for i in range(counter.num_record_batches)]
+    starts = [0]
+    for size in sizes:
+        starts.append(starts[-1] + size)
+    return reader, lazy, starts
+
+@st.cache_resource(max_entries=LAZY_CHUNK_CACHE)
+def read_lazy_chunk(file_path, mtime, chunk):
+    """Decoded lazy columns of one row group / record batch, cached so each is decoded once."""
+    reader, lazy, _ = open_row_chunks(file_path, mtime)
+    if file_path.lower().endswith('.parquet'):
+        return reader.read_row_group(chunk, columns=lazy)
+    return pa.Table.from_batches([reader.get_batch(chunk)])
+
+def load_row_details(file_path, row_index):
+    """Fetch the non-eager columns of one row (by position) from a columnar review file."""
+    mtime = os.path.getmtime(file_path)
+    _, lazy, starts = open_row_chunks(file_path, mtime)
+    if not lazy:
+        return {}
+    chunk = bisect_right(starts, row_index) - 1
+    table = read_lazy_chunk(file_path, mtime, chunk)
+    return table.slice(row_index - starts[chunk], 1).to_pylist()[0]
+
+def write_review_file(df, file_path):
+    """Write df to file_path atomically, merging review columns back into columnar files."""
+    tmp_path = f"{file_path}.tmp"
+    if is_columnar(file_path):
+        table = read_review_table(file_path)
+        for col in ('review_result', 'review_notes') + VARIANT_COLUMNS:
+            if col not in df.columns:
+                continue
+            values = pa.array([None if pd.isna(v) else str(v) for v in df[col]], type=pa.string())
+            if col in table.column_names:
+                table = table.set_column(table.column_names.index(col), col, values)
+            else:
+                table = table.append_column(col, values)
+        if file_path.lower().endswith('.parquet'):
+            pq.write_table(table, tmp_path, row_group_size=LAZY_CHUNK_ROWS)
         else:
-            # Full save
-            df.to_csv(file_path, index=False)
-            st.success(f"Data saved to {file_path}")
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table, max_chunksize=LAZY_CHUNK_ROWS)
     else:
-        # If using an uploaded file, we need to save to a temporary file
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, file_path)
+
+# Review statuses as stored in the review_result column ('' means pending)
+REVIEW_STATUSES = ['', 'approved', 'rejected', 'regenerate']
+
+class ReviewIndex:
+    """Precomputed filter masks and status counters over the review DataFrame.
+
+    review_result and category_name are stored as categoricals, masks are cached
+    per filter value, and counters are adjusted per decision instead of being
+    recounted from the full DataFrame on every rerun.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        statuses = df['review_result'].fillna("").astype(str)
+        extra = sorted(set(statuses.unique()) - set(REVIEW_STATUSES))
+        df['review_result'] = pd.Categorical(statuses, categories=REVIEW_STATUSES + extra)
+        if 'category_name' in df.columns:
+            df['category_name'] = df['category_name'].astype('category')
+            self.categories = sorted(str(c) for c in df['category_name'].cat.categories)
+        else:
+            self.categories = []
+        self.counts = {k: int(v) for k, v in df['review_result'].value_counts().items()}
+        self._status_masks = {}
+        self._category_masks = {}
+        self._filtered = {}
+
+    def status_mask(self, status):
+        if status not in self._status_masks:
+            self._status_masks[status] = (self.df['review_result'] == status).to_numpy()
+        return self._status_masks[status]
+
+    def category_mask(self, category):
+        if category not in self._category_masks:
+            self._category_masks[category] = (self.df['category_name'] == category).to_numpy()
+        return self._category_masks[category]
+
+    def filtered_indices(self, status=None, category=None):
+        """Row positions matching the filters; None means no filter on that field."""
+        key = (status, category)
+        if key not in self._filtered:
+            mask = np.ones(len(self.df), dtype=bool)
+            if status is not None:
+                mask &= self.status_mask(status)
+            if category is not None:
+                mask &= self.category_mask(category)
+            self._filtered[key] = np.flatnonzero(mask)
+        return self._filtered[key]
+
+    def count(self, status):
+        return self.counts.get(status, 0)
+
+    def set_result(self, row_index, result):
+        """Record result for the row at position row_index (positions, like filtered_indices)."""
+        col = self.df.columns.get_loc('review_result')
+        old = self.df.iat[row_index, col]
+        old = "" if pd.isna(old) else old
+        if old == result:
+            return
+        if result not in self.df['review_result'].cat.categories:
+            self.df['review_result'] = self.df['review_result'].cat.add_categories([result])
+        self.df.iat[row_index, col] = result
+        self.counts[old] = self.counts.get(old, 0) - 1
+        self.counts[result] = self.counts.get(result, 0) + 1
+        # Only filters on the two statuses involved change
+        for status in (old, result):
+            self._status_masks.pop(status, None)
+        self._filtered = {k: v for k, v in self._filtered.items() if k[0] not in (old, result)}
+
+def get_review_index(df):
+    index = st.session_state.review_index
+    if index is None or index.df is not df:
+        index = ReviewIndex(df)
+        st.session_state.review_index = index
+    return index
+
+# Decisions journal: each click appends one JSON line next to the CSV instead of
+# rewriting the whole file; the CSV is rewritten only when the journal is compacted
+def journal_path(file_path):
+    return f"{file_path}.journal.jsonl"
+
+def journal_entry(row_index, updates):
+    return {"row": int(row_index), "updates": updates, "ts": time.time()}
+
+def write_journal_entries(file_path, entries):
+    with open(journal_path(file_path), 'a', encoding='utf-8') as f:
+        f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        f.flush()
+        os.fsync(f.fileno())
+
+def append_journal(file_path, row_index, updates):
+    write_journal_entries(file_path, [journal_entry(row_index, updates)])
+
+class JournalWriter:
+    """Background writer for fast review mode: decisions are queued and appended in batches.
+
+    Jobs run in submission order, so a compaction snapshot queued after some
+    entries always lands after them, and entries queued later go to the new journal.
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, file_path, row_index, updates):
+        self.jobs.put(('entry', file_path, journal_entry(row_index, updates)))
+
+    def submit_compaction(self, file_path, df_snapshot):
+        self.jobs.put(('compact', file_path, df_snapshot))
+
+    def flush(self):
+        self.jobs.join()
+
+    def _write(self, pending):
+        by_path = {}
+        for file_path, entry in pending:
+            by_path.setdefault(file_path, []).append(entry)
+        for file_path, entries in by_path.items():
+            try:
+                write_journal_entries(file_path, entries)
+            except Exception as e:
+                print(f"Error writing journal for {file_path}: {str(e)}")
+
+    def _run(self):
+        pending = []
+        while True:
+            try:
+                job = self.jobs.get(timeout=JOURNAL_FLUSH_SECONDS)
+            except queue.Empty:
+                job = None
+            if job is not None and job[0] == 'entry':
+                pending.append((job[1], job[2]))
+            if pending and (job is None or job[0] == 'compact' or len(pending) >= JOURNAL_FLUSH_BATCH):
+                self._write(pending)
+                for _ in pending:
+                    self.jobs.task_done()
+                pending = []
+            if job is not None and job[0] == 'compact':
+                try:
+                    compact_journal(job[2], job[1])
+                except Exception as e:
+                    print(f"Error compacting journal for {job[1]}: {str(e)}")
+                self.jobs.task_done()
+
+@st.cache_resource
+def get_journal_writer():
+    return JournalWriter()
+
+def replay_journal(df, file_path):
+    """Apply journaled decisions to df (crash recovery); returns the number of entries applied."""
+    path = journal_path(file_path)
+    if not os.path.exists(path):
+        return 0
+    applied = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-write
+                continue
+            set_row_values(df, entry['row'], entry['updates'])
+            applied += 1
+    return applied
+
+def set_row_values(df, row_index, updates):
+    for field, value in updates.items():
+        if field not in df.columns:
+            df[field] = ""
+        elif df[field].dtype != object and not isinstance(df[field].dtype, pd.CategoricalDtype):
+            # All-empty columns are read back as float64
+            df[field] = df[field].astype(object)
+        # Journal rows are positions; a non-RangeIndex frame must not be addressed by label
+        df.iloc[row_index, df.columns.get_loc(field)] = value
+
+def compact_journal(df, file_path):
+    # Written to a sibling file and swapped so a crash never leaves a half-written file
+    write_review_file(df, file_path)
+    if os.path.exists(journal_path(file_path)):
+        os.remove(journal_path(file_path))
+
+def compact_file(file_path):
+    if not os.path.exists(journal_path(file_path)):
+        return
+    df = read_review_frame(file_path)
+    replay_journal(df, file_path)
+    compact_journal(df, file_path)
+
+@st.cache_resource
+def exit_compaction_registry():
+    # Survives reruns, so the atexit hook is registered once per process
+    paths = set()
+    def _compact_all():
+        # Buffered fast-mode decisions must hit the journal before it is folded in
+        get_journal_writer().flush()
+        for path in list(paths):
+            try:
+                compact_file(path)
+            except Exception as e:
+                print(f"Error compacting journal for {path}: {str(e)}")
+    atexit.register(_compact_all)
+    return paths
+
+def review_file_path(df, file_path=None):
+    """The file decisions are journaled against; uploaded files get a temporary copy."""
+    if not file_path:
         if st.session_state.temp_file_path is None:
             temp_dir = tempfile.mkdtemp()
             temp_file = os.path.join(temp_dir, "reviewed_data.csv")
+            df.to_csv(temp_file, index=False)
             st.session_state.temp_file_path = temp_file
-        
-        # Save to the temporary file
-        df.to_csv(st.session_state.temp_file_path, index=False)
-        # Update the session state data
+        file_path = st.session_state.temp_file_path
         st.session_state.current_df = df
-        if result:
-            st.success("Data saved")
-        elif notes is not None:
-            st.success("Notes saved")
+    exit_compaction_registry().add(file_path)
+    return file_path
+
+def save_data_buffered(df, file_path, row_index, updates):
+    """Fast review mode: queue the journal write and return immediately (no disk I/O here)."""
+    writer = get_journal_writer()
+    writer.submit(file_path, row_index, updates)
+    st.session_state.journal_entries += 1
+    if st.session_state.journal_entries >= JOURNAL_COMPACT_EVERY:
+        writer.submit_compaction(file_path, df.copy())
+        st.session_state.journal_entries = 0
+
+# Save data function with incremental update
+def save_data(df, file_path=None, row_index=None, result=None, notes=None):
+    file_path = review_file_path(df, file_path)
     
-    # Run garbage collection to free memory
-    gc.collect()
+    if st.session_state.fast_mode and row_index is not None and (result or notes is not None):
+        updates = {'review_result': result} if result else {'review_notes': notes}
+        save_data_buffered(df, file_path, row_index, updates)
+        return df
+    
+    # Don't let a synchronous write race buffered decisions still in the queue
+    get_journal_writer().flush()
+    
+    try:
+        if row_index is not None and (result or notes is not None):
+            updates = {}
+            if result:
+                updates['review_result'] = result
+            if notes is not None:
+                updates['review_notes'] = notes
+            append_journal(file_path, row_index, updates)
+            st.session_state.journal_entries += 1
+            if st.session_state.journal_entries >= JOURNAL_COMPACT_EVERY:
+                compact_journal(df, file_path)
+                st.session_state.journal_entries = 0
+            if result:
+                st.success(f"Updated row {row_index}")
+            else:
+                st.success(f"Notes saved for row {row_index}")
+        else:
+            # Full save
+            compact_journal(df, file_path)
+            st.session_state.journal_entries = 0
+            st.success(f"Data saved to {file_path}")
+    except Exception as e:
+        st.error(f"Error saving to {file_path}: {str(e)}")
     
     return df
 
 # Navigation functions
 def go_to_next(increment=1):
     st.session_state.item_index += increment
-    st.session_state.next_item_preloaded = False  # Reset preload flag
     st.session_state.last_action_time = time.time()
     
 def go_to_previous(decrement=1):
     st.session_state.item_index -= decrement
-    st.session_state.next_item_preloaded = False  # Reset preload flag
     st.session_state.last_action_time = time.time()
 
 # Clear image cache to prevent memory issues
 def clear_image_cache():
-    # Clear the cache for the load_image_from_url function
-    load_image_from_url.clear()
+    get_prefetcher().clear()
     gc.collect()
 
+def next_alternate(row):
+    """Updates that swap in the next pre-generated candidate for a row, or None if there is none."""
+    raw = row.get('alternate_urls')
+    if not isinstance(raw, str) or not raw:
+        return None
+    try:
+        alternates = json.loads(raw)
+    except ValueError:
+        return None
+    if not alternates:
+        return None
+    return {
+        's3_url': alternates[0],
+        # The comparison image was rendered for the previous candidate
+        'compare_url': '',
+        'alternate_urls': json.dumps(alternates[1:]) if len(alternates) > 1 else '',
+    }
+
+def promote_alternate(df, row_index, updates, file_path=None):
+    """Serve "Regenerate" from a stored alternate: the row stays pending with the new variant."""
+    set_row_values(df, row_index, updates)
+    file_path = review_file_path(df, file_path)
+    if st.session_state.fast_mode:
+        save_data_buffered(df, file_path, row_index, updates)
+    else:
+        get_journal_writer().flush()
+        append_journal(file_path, row_index, updates)
+        st.session_state.journal_entries += 1
+    get_prefetcher().prefetch([updates['s3_url']])
+
 # Handle review result
 def handle_review(df, original_index, result, use_local_file, local_file_path, total_filtered):
-    # Update dataframe
-    df.loc[original_index, 'review_result'] = result
+    if result == 'regenerate':
+        updates = next_alternate(df.iloc[original_index])
+        if updates:
+            # Stay on this item so the reviewer sees the alternate next
+            promote_alternate(df, original_index, updates, local_file_path if use_local_file else None)
+            return
+    
+    # Update dataframe and counters
+    get_review_index(df).set_result(original_index, result)
     
     # Save data
     if use_local_file:
@@ -252,19 +588,252 @@ def handle_review(df, original_index, result, use_local_file, local_file_path, t
     else:
         df = save_data(df, row_index=original_index, result=result)
     
-    # Reset preload flag
-    st.session_state.next_item_preloaded = False
-    
     # Go to next item if not at the end
     if st.session_state.item_index < total_filtered:
         go_to_next()
 
+def review_image_urls(row):
+    """URLs the reviewer downloads for a row: the pre-rendered comparison if there is one."""
+    compare_url = row.get('compare_url')
+    if isinstance(compare_url, str) and compare_url:
+        return [compare_url]
+    return [row[col] for col in ('image_url_pos_0', 's3_url') if col in row and isinstance(row[col], str) and row[col]]
+
+def show_image_pair(row):
+    """Show the original and variant images of a row side by side."""
+    flags = row.get('prescreen_flags')
+    if isinstance(flags, str) and flags:
+        st.warning(f"Pre-screen flagged: {flags.replace(',', ', ')}")
+    compare_url = row.get('compare_url')
+    if isinstance(compare_url, str) and compare_url:
+        st.subheader("Current Image / Variant Image")
+        img = load_image_from_url(compare_url)
+        if img:
+            st.image(img, use_column_width=True)
+            return
+        st.warning("Could not load comparison image; loading originals")
+    
+    col1, col2 = st.columns(2)
+    
+    # Display the original image
+    with col1:
+        st.subheader("Current Image")
+        if 'image_url_pos_0' in row and row['image_url_pos_0']:
+            img = load_image_from_url(row['image_url_pos_0'])
+            if img:
+                # Use smaller image to reduce memory
+                st.image(img, use_column_width=True)
+            else:
+                st.error("Could not load original image")
+        else:
+            st.error("No original image URL available")
+    
+    # Display the variant image
+    with col2:
+        st.subheader("Variant Image")
+        if 's3_url' in row and row['s3_url']:
+            img = load_image_from_url(row['s3_url'])
+            if img:
+                # Use smaller image to reduce memory
+                st.image(img, use_column_width=True)
+            else:
+                st.error("Could not load variant image")
+        else:
+            st.error("No variant image URL available")
+
+def write_queue_decisions(backend, file_path):
+    """
+    Write the shared queue's decisions into the review file.
+
+    Decisions still in the single-reviewer journal are folded in first and the
+    journal removed; otherwise it would be replayed over the queue's decisions
+    on the next load. Where both decided a row, the queue wins.
+    """
+    get_journal_writer().flush()
+    df = read_review_frame(file_path)
+    replay_journal(df, file_path)
+    compact_journal(backend.apply_to_frame(df), file_path)
+
+@st.cache_resource
+def get_sqlite_backend(db_path):
+    # Shared by every session in this process; other processes coordinate through SQLite locks
+    return SQLiteReviewBackend(db_path)
+
+@st.cache_resource
+def get_redshift_backend():
+    # On Streamlit Cloud the Redshift credentials live in st.secrets rather than .env
+    try:
+        env = {k: v for k, v in st.secrets.items() if k.startswith('REDSHIFT_')}
+    except Exception:
+        env = {}
+    return RedshiftReviewBackend(env)
+
+def shared_queue_view(backend, reviewer):
+    """Review rows leased from a shared queue so several reviewers can work in parallel."""
+    if not reviewer:
+        st.info("Enter your name in the sidebar to start leasing items from the shared queue.")
+        return
+    
+    # Lease a fresh batch only when the current one is used up
+    batch = st.session_state.shared_batch
+    if not batch:
+        batch = backend.lease(reviewer)
+        st.session_state.shared_batch = batch
+    
+    counts = backend.counts()
+    if counts:
+        st.sidebar.header("Queue Summary")
+        for status, label in (('approved', 'Approved'), ('rejected', 'Rejected'), ('regenerate', 'Regenerate'), ('', 'Pending')):
+            st.sidebar.write(f"{label}: {counts.get(status, 0)}")
+    st.sidebar.write(f"Leased to you: {len(batch)}")
+    if st.sidebar.button("Release my items"):
+        backend.release(reviewer)
+        st.session_state.shared_batch = []
+        st.rerun()
+    
+    if not batch:
+        st.write("The shared queue is empty.")
+        return
+    
+    item = batch[0]
+    get_prefetcher().prefetch(
+        [url for other in batch[1:PRELOAD_COUNT + 1] for url in review_image_urls(other)]
+    )
+    
+    st.subheader("Item Details")
+    st.write(f"**ID:** {item.get('id')}")
+    if item.get('email_subject'):
+        st.write(f"**Product:** {item['email_subject']}")
+    if item.get('category_name'):
+        st.write(f"**Category:** {item['category_name']}")
+    st.markdown(f"**Deal Link:** [View Deal](https://www.wowcher.co.uk/deal/shop/{item.get('id')})")
+    
+    show_image_pair(item)
+    
+    notes = st.text_input("Review notes", key=f"shared_notes_{item['row_index']}")
+    btn_col1, btn_col2, btn_col3, btn_col4 = st.columns(4)
+    decision = None
+    with btn_col1:
+        if st.button("Approve", key="shared_approve", type="primary"):
+            decision = "approved"
+    with btn_col2:
+        if st.button("Reject", key="shared_reject"):
+            decision = "rejected"
+    with btn_col3:
+        if st.button("Regenerate", key="shared_regenerate"):
+            decision = "regenerate"
+    with btn_col4:
+        if st.button("Skip", key="shared_skip"):
+            st.session_state.shared_batch = batch[1:] + batch[:1]
+            st.rerun()
+    
+    if decision:
+        if not backend.decide(item['row_index'], reviewer, decision, notes or None):
+            st.warning("This item was already decided by another reviewer.")
+        st.session_state.shared_batch = batch[1:]
+        st.rerun()
+
+GRID_COLUMNS = 4
+
+def apply_batch_decision(df, row_indices, result, use_local_file, local_file_path):
+    """Apply one decision to many rows as a single journal write."""
+    if not row_indices:
+        return
+    index = get_review_index(df)
+    file_path = review_file_path(df, local_file_path if use_local_file else None)
+    entries = []
+    for row_index in row_indices:
+        updates = next_alternate(df.iloc[row_index]) if result == 'regenerate' else None
+        if updates:
+            set_row_values(df, row_index, updates)
+        else:
+            index.set_result(row_index, result)
+            updates = {'review_result': result}
+        entries.append(journal_entry(row_index, updates))
+    get_journal_writer().flush()
+    write_journal_entries(file_path, entries)
+    st.session_state.journal_entries += len(entries)
+    if st.session_state.journal_entries >= JOURNAL_COMPACT_EVERY:
+        compact_journal(df, file_path)
+        st.session_state.journal_entries = 0
+    for row_index in row_indices:
+        st.session_state.pop(f"grid_sel_{row_index}", None)
+
+def grid_selection(page_rows, select_all=False):
+    return [r for r in page_rows if select_all or st.session_state.get(f"grid_sel_{r}")]
+
+def grid_review_view(df, filtered_indices, use_local_file, local_file_path):
+    """Review a page of original/variant pairs at once and decide selected rows in one batch."""
+    page_size = st.sidebar.slider("Items per page", min_value=20, max_value=50, value=24, step=4)
+    pages = max(1, -(-len(filtered_indices) // page_size))
+    page = min(st.session_state.get('grid_page', 1), pages)
+    page = st.sidebar.number_input("Page", min_value=1, max_value=pages, value=page)
+    st.session_state.grid_page = page
+    
+    start = (page - 1) * page_size
+    page_rows = [int(i) for i in filtered_indices[start:start + page_size]]
+    
+    # Warm the cache with the next page while this one is being reviewed
+    next_rows = filtered_indices[start + page_size:start + 2 * page_size]
+    get_prefetcher().prefetch([url for r in next_rows for url in review_image_urls(df.iloc[int(r)])])
+    
+    st.write(f"Page {page} of {pages} ({len(filtered_indices)} items)")
+    decision_args = (df, use_local_file, local_file_path, page_rows)
+    btn_col1, btn_col2, btn_col3, btn_col4 = st.columns(4)
+    with btn_col1:
+        st.button("Approve selected", type="primary", on_click=grid_decide, args=decision_args + ("approved", False))
+    with btn_col2:
+        st.button("Reject selected", on_click=grid_decide, args=decision_args + ("rejected", False))
+    with btn_col3:
+        st.button("Regenerate selected", on_click=grid_decide, args=decision_args + ("regenerate", False))
+    with btn_col4:
+        st.button("Approve whole page", on_click=grid_decide, args=decision_args + ("approved", True))
+    
+    for row_start in range(0, len(page_rows), GRID_COLUMNS):
+        cols = st.columns(GRID_COLUMNS)
+        for col, row_index in zip(cols, page_rows[row_start:row_start + GRID_COLUMNS]):
+            row = df.iloc[row_index]
+            with col:
+                for url in review_image_urls(row):
+                    img = load_image_from_url(url)
+                    if img:
+                        st.image(img, use_column_width=True)
+                status = row['review_result'] if not pd.isna(row['review_result']) else ""
+                st.checkbox(f"{row['id']} {status}".strip(), key=f"grid_sel_{row_index}")
+
+def grid_decide(df, use_local_file, local_file_path, page_rows, result, select_all):
+    apply_batch_decision(df, grid_selection(page_rows, select_all), result, use_local_file, local_file_path)
+
+# Keys clicking the review buttons in fast mode (ignored while typing in a text field)
+KEYBOARD_SHORTCUTS = {'a': 'Approve', 'r': 'Reject', 'g': 'Regenerate', 'n': 'Next'}
+
+def install_keyboard_shortcuts():
+    # The component iframe is same-origin, so it can listen on the app document; the
+    # flag on the parent document keeps reruns from stacking duplicate listeners
+    components.html(f"""
+    <script>
+    const doc = window.parent.document;
+    if (!doc.reviewShortcutsInstalled) {{
+      doc.reviewShortcutsInstalled = true;
+      const labels = {json.dumps(KEYBOARD_SHORTCUTS)};
+      doc.addEventListener('keydown', function (e) {{
+        const tag = (e.target.tagName || '').toLowerCase();
+        if (tag === 'input' || tag === 'textarea' || e.ctrlKey || e.metaKey || e.altKey) return;
+        const label = labels[e.key.toLowerCase()];
+        if (!label) return;
+        const button = Array.from(doc.querySelectorAll('button')).find(b => b.innerText.trim() === label);
+        if (button) {{ e.preventDefault(); button.click(); }}
+      }});
+    }}
+    </script>
+    """, height=0)
+
 # Main function
 def main():
     st.title("Image Variant Review Tool")
     
     # File uploader for CSV
-    uploaded_file = st.sidebar.file_uploader("Choose your winners CSV file", type="csv", key="file_uploader")
+    uploaded_file = st.sidebar.file_uploader("Choose your winners CSV file", type=["csv", "parquet"], key="file_uploader")
     
     # Option to use a local file path instead
     use_local_file = st.sidebar.checkbox("Use local file instead")
@@ -272,6 +841,35 @@ def main():
     
     data_source = local_file_path if use_local_file and local_file_path else uploaded_file
     
+    st.sidebar.checkbox(
+        "Fast review mode (keys: A/R/G/N)", key="fast_mode",
+        help="Decisions are written in the background in batches; A=Approve, R=Reject, G=Regenerate, N=Next"
+    )
+    
+    # Shared queue: rows are leased to each reviewer so several people can review at once
+    shared_mode = st.sidebar.checkbox("Shared queue (multiple reviewers)")
+    if shared_mode:
+        reviewer = st.sidebar.text_input("Your name", key="reviewer_name")
+        queue_backend = st.sidebar.radio("Queue backend", ["Local SQLite", "Redshift"])
+        if queue_backend == "Redshift":
+            shared_queue_view(get_redshift_backend(), reviewer)
+            return
+        if not use_local_file or not local_file_path:
+            st.write("The local SQLite queue needs a local review file path.")
+            return
+        backend = get_sqlite_backend(default_queue_path(local_file_path))
+        if st.session_state.get('shared_queue_source') != local_file_path:
+            # INSERT OR IGNORE, so rows already queued keep their decisions
+            backend.import_frame(load_data(local_file_path, os.path.getmtime(local_file_path)))
+            st.session_state.shared_queue_source = local_file_path
+        if st.sidebar.button("Write queue decisions to file"):
+            write_queue_decisions(backend, local_file_path)
+            st.session_state.current_df = None
+            st.session_state.journal_entries = 0
+            st.sidebar.success(f"Decisions written to {local_file_path}")
+        shared_queue_view(backend, reviewer)
+        return
+    
     if data_source is not None:
         try:
             # Load the data
@@ -281,7 +879,12 @@ def main():
             else:
                 # First time loading the data
                 if use_local_file:
-                    df = load_data(local_file_path)
+                    df = load_data(local_file_path, os.path.getmtime(local_file_path))
+                    # Recover decisions journaled since the last compaction
+                    if df is not None:
+                        st.session_state.journal_entries = replay_journal(df, local_file_path)
+                elif uploaded_file.name.lower().endswith('.parquet'):
+                    df = pd.read_parquet(uploaded_file)
                 else:
                     df = pd.read_csv(uploaded_file)
                 
@@ -297,19 +900,7 @@ def main():
             # Get total number of rows
             total_rows = len(df)
             
-            # Update the initial results count if needed
-            if st.session_state.results_count['pending'] == 0:
-                approved = len(df[df['review_result'] == 'approved'])
-                rejected = len(df[df['review_result'] == 'rejected'])
-                regenerate = len(df[df['review_result'] == 'regenerate'])
-                pending = total_rows - approved - rejected - regenerate
-                
-                st.session_state.results_count = {
-                    'approved': approved,
-                    'rejected': rejected,
-                    'regenerate': regenerate,
-                    'pending': pending
-                }
+            index = get_review_index(df)
             
             # Create a navigation system
             st.sidebar.write(f"Total items: {total_rows}")
@@ -324,26 +915,35 @@ def main():
             )
             
             if review_status == "Pending":
-                df_filtered = df[df['review_result'].isna() | (df['review_result'] == "")]
+                status_filter = ""
             elif review_status != "All":
-                df_filtered = df[df['review_result'] == review_status.lower()]
+                status_filter = review_status.lower()
             else:
-                df_filtered = df
+                status_filter = None
                 
             # Filter by category
+            category_filter = None
             if 'category_name' in df.columns:
-                categories = ["All"] + sorted(df['category_name'].unique().tolist())
+                categories = ["All"] + index.categories
                 selected_category = st.sidebar.selectbox("Filter by category", categories)
                 
                 if selected_category != "All":
-                    df_filtered = df_filtered[df_filtered['category_name'] == selected_category]
+                    category_filter = selected_category
             
             # Navigation
-            filtered_indices = df_filtered.index.tolist()
+            filtered_indices = index.filtered_indices(status_filter, category_filter)
             total_filtered = len(filtered_indices)
             
             st.sidebar.write(f"Filtered items: {total_filtered}")
             
+            view_mode = st.sidebar.radio("View", ["Single item", "Grid"], horizontal=True)
+            if view_mode == "Grid" and total_filtered > 0:
+                grid_review_view(df, filtered_indices, use_local_file, local_file_path)
+                st.sidebar.header("Review Summary")
+                for status, label in (('approved', 'Approved'), ('rejected', 'Rejected'), ('regenerate', 'Regenerate'), ('', 'Pending')):
+                    st.sidebar.write(f"{label}: {index.count(status)}")
+                return
+            
             if total_filtered > 0:
                 # Ensure item_index is within valid range
                 if st.session_state.item_index > total_filtered:
@@ -362,7 +962,7 @@ def main():
                 st.session_state.item_index = item_index
                 
                 # Get the actual index in the original dataframe
-                original_index = filtered_indices[st.session_state.item_index - 1]
+                original_index = int(filtered_indices[st.session_state.item_index - 1])
                 row = df.iloc[original_index]
                 
                 # Display item info in the main area
@@ -381,52 +981,17 @@ def main():
                     # Add deal link
                     deal_url = f"https://www.wowcher.co.uk/deal/shop/{row['id']}"
                     st.markdown(f"**Deal Link:** [View Deal]({deal_url})")
+                    
+                    # Prompt/token text in columnar files is only read when asked for
+                    if use_local_file and is_columnar(local_file_path):
+                        if st.checkbox("Show prompt details", key="show_details"):
+                            for field, value in load_row_details(local_file_path, original_index).items():
+                                st.write(f"**{field}:** {value}")
                 
-                # If not already preloaded, start preloading now
-                if not st.session_state.next_item_preloaded and time.time() - st.session_state.last_action_time > 0.5:
-                    # Don't preload immediately after an action to avoid session state issues
-                    preload_count = preload_images(df, filtered_indices, st.session_state.item_index)
+                # Queue the next items in the background; this never blocks the rerun
+                preload_images(df, filtered_indices, st.session_state.item_index)
                 
-                # Create columns for images
-                col1, col2 = st.columns(2)
-                
-                # Display the original image
-                with col1:
-                    st.subheader("Current Image")
-                    if 'image_url_pos_0' in row and row['image_url_pos_0']:
-                        current_url = row['image_url_pos_0']
-                        is_preloaded = current_url in st.session_state.preloaded_images
-                        
-                        img = load_image_from_url(current_url)
-                        if not is_preloaded:
-                            st.session_state.preloaded_images[current_url] = "loaded"
-                            
-                        if img:
-                            # Use smaller image to reduce memory
-                            st.image(img, use_column_width=True)
-                        else:
-                            st.error("Could not load original image")
-                    else:
-                        st.error("No original image URL available")
-                
-                # Display the variant image
-                with col2:
-                    st.subheader("Variant Image")
-                    if 's3_url' in row and row['s3_url']:
-                        variant_url = row['s3_url']
-                        is_preloaded = variant_url in st.session_state.preloaded_images
-                        
-                        img = load_image_from_url(variant_url)
-                        if not is_preloaded:
-                            st.session_state.preloaded_images[variant_url] = "loaded"
-                            
-                        if img:
-                            # Use smaller image to reduce memory
-                            st.image(img, use_column_width=True)
-                        else:
-                            st.error("Could not load variant image")
-                    else:
-                        st.error("No variant image URL available")
+                show_image_pair(row)
                 
                 # Review section
                 st.subheader("Review")
@@ -438,26 +1003,24 @@ def main():
                 # Create columns for buttons
                 btn_col1, btn_col2, btn_col3, btn_col4 = st.columns(4)
                 
+                # Decisions run as on_click callbacks, so state is updated before the
+                # click's own rerun instead of needing a second st.rerun()
                 with btn_col1:
-                    if st.button("Approve", key="approve", type="primary"):
-                        # Use a function instead of inline code to improve transitions
-                        handle_review(df, original_index, "approved", use_local_file, local_file_path, total_filtered)
-                        st.rerun()
+                    st.button("Approve", key="approve", type="primary", on_click=handle_review,
+                              args=(df, original_index, "approved", use_local_file, local_file_path, total_filtered))
                 
                 with btn_col2:
-                    if st.button("Reject", key="reject"):
-                        handle_review(df, original_index, "rejected", use_local_file, local_file_path, total_filtered) 
-                        st.rerun()
+                    st.button("Reject", key="reject", on_click=handle_review,
+                              args=(df, original_index, "rejected", use_local_file, local_file_path, total_filtered))
                 
                 with btn_col3:
-                    if st.button("Regenerate", key="regenerate"):
-                        handle_review(df, original_index, "regenerate", use_local_file, local_file_path, total_filtered)
-                        st.rerun()
+                    st.button("Regenerate", key="regenerate", on_click=handle_review,
+                              args=(df, original_index, "regenerate", use_local_file, local_file_path, total_filtered))
                 
                 # Notes area
                 notes = st.text_area("Review notes", value=row['review_notes'] if not pd.isna(row['review_notes']) else "")
                 if st.button("Save Notes"):
-                    df.loc[original_index, 'review_notes'] = notes
+                    df.iloc[original_index, df.columns.get_loc('review_notes')] = notes
                     # Update the session state dataframe
                     st.session_state.current_df = df
                     if use_local_file:
@@ -471,15 +1034,14 @@ def main():
                 nav_col1, nav_col2 = st.columns(2)
                 with nav_col1:
                     if st.session_state.item_index > 1:
-                        if st.button("Previous"):
-                            go_to_previous()
-                            st.rerun()
+                        st.button("Previous", on_click=go_to_previous)
                 
                 with nav_col2:
                     if st.session_state.item_index < total_filtered:
-                        if st.button("Next"):
-                            go_to_next()
-                            st.rerun()
+                        st.button("Next", on_click=go_to_next)
+                
+                if st.session_state.fast_mode:
+                    install_keyboard_shortcuts()
                 
                 # Progress bar
                 progress = st.session_state.item_index / total_filtered
@@ -489,44 +1051,49 @@ def main():
                 # Summary stats - Use session state counts for consistency
                 st.sidebar.header("Review Summary")
                 
-                st.sidebar.write(f"Approved: {st.session_state.results_count['approved']}")
-                st.sidebar.write(f"Rejected: {st.session_state.results_count['rejected']}")
-                st.sidebar.write(f"Regenerate: {st.session_state.results_count['regenerate']}")
-                st.sidebar.write(f"Pending: {st.session_state.results_count['pending']}")
+                st.sidebar.write(f"Approved: {index.count('approved')}")
+                st.sidebar.write(f"Rejected: {index.count('rejected')}")
+                st.sidebar.write(f"Regenerate: {index.count('regenerate')}")
+                st.sidebar.write(f"Pending: {index.count('')}")
                 
                 # Preloading status
-                preloaded_count = len(st.session_state.preloaded_images)
+                preloaded_count = len(get_prefetcher())
                 st.sidebar.divider()
                 st.sidebar.markdown(f"### Image Preloading")
-                st.sidebar.write(f"Preloaded images: {preloaded_count}")
+                st.sidebar.write(f"Cached images: {preloaded_count}")
                 if st.sidebar.button("Force Preload"):
                     preloaded = preload_images(df, filtered_indices, st.session_state.item_index, count=10)
-                    st.sidebar.success(f"Preloaded {preloaded} new images")
-                
-                # Download the updated CSV
-                csv = df.to_csv(index=False).encode('utf-8')
+                    st.sidebar.success(f"Queued {preloaded} images for prefetch")
                 
-                # Get appropriate file name
-                if use_local_file:
-                    file_name = os.path.basename(local_file_path)
-                else:
-                    file_name = "reviewed_data.csv" if uploaded_file is None else uploaded_file.name
+                # Download the updated CSV (columnar local files are updated in place instead,
+                # and serialising 100k rows to CSV on every rerun is what they avoid)
+                if not (use_local_file and is_columnar(local_file_path)):
+                    csv = df.to_csv(index=False).encode('utf-8')
+                    
+                    # Get appropriate file name
+                    if use_local_file:
+                        file_name = os.path.basename(local_file_path)
+                    else:
+                        file_name = "reviewed_data.csv" if uploaded_file is None else uploaded_file.name
+                    file_name = os.path.splitext(file_name)[0] + ".csv"
+                    
+                    st.sidebar.download_button(
+                        "Download Updated CSV",
+                        csv,
+                        f"updated_{file_name}",
+                        "text/csv",
+                        key='download-csv'
+                    )
                 
-                st.sidebar.download_button(
-                    "Download Updated CSV",
-                    csv,
-                    f"updated_{file_name}",
-                    "text/csv",
-                    key='download-csv'
-                )
+                if st.sidebar.button("Compact journal to CSV"):
+                    save_data(df, local_file_path if use_local_file else None)
                 
                 # Memory usage info
                 st.sidebar.divider()
                 st.sidebar.markdown("### Memory Usage")
                 if st.sidebar.button("Clear Cache"):
                     st.cache_data.clear()
-                    prefetch_image.cache_clear()
-                    st.session_state.preloaded_images = {}
+                    clear_image_cache()
                     st.rerun()
                 
             else:
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Tests import flask_app from the repo root, the same way the root scripts do
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Config defaults are read from the environment when flask_app.config is first
+# imported; generation_service builds its OpenAI client at import time. No
+# request is ever made with this key.
+os.environ.setdefault("OPEN_AI_API_KEY", "test-key")
@@ -0,0 +1,24 @@
+import io
+import numpy as np
+from PIL import Image
+
+
+def encode(img: Image.Image, fmt: str = "PNG", **kwargs) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, fmt, **kwargs)
+    return buf.getvalue()
+
+
+def noise_image(size=(300, 200), seed=0, mode="RGB") -> Image.Image:
+    rng = np.random.default_rng(seed)
+    channels = {"RGB": 3, "RGBA": 4}[mode]
+    pixels = rng.integers(0, 256, (size[1], size[0], channels), dtype=np.uint8)
+    return Image.fromarray(pixels, mode)
+
+
+def gradient_image(size=(300, 200)) -> Image.Image:
+    x = np.linspace(0, 255, size[0], dtype=np.float32)
+    y = np.linspace(0, 255, size[1], dtype=np.float32)[:, None]
+    pixels = np.stack([np.broadcast_to(x, (size[1], size[0])), np.broadcast_to(y, (size[1], size[0])),
+                       np.full((size[1], size[0]), 128.0)], axis=-1)
+    return Image.fromarray(pixels.astype(np.uint8), "RGB")
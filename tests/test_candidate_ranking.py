@@ -0,0 +1,30 @@
+from PIL import Image
+
+from flask_app.services.candidate_ranking import rank_candidates, score_image
+from helpers import encode, noise_image, gradient_image
+
+
+def test_score_is_bounded():
+    for img in (noise_image(), gradient_image(), Image.new("RGB", (64, 64))):
+        assert 0.0 <= score_image(encode(img)) <= 1.0
+
+
+def test_detailed_image_outranks_flat_one():
+    flat = encode(Image.new("RGB", (300, 200), (128, 128, 128)))
+    detailed = encode(noise_image())
+    ranked = rank_candidates([flat, detailed])
+    assert [i for i, _ in ranked] == [1, 0]
+    assert ranked[0][1] > ranked[1][1]
+
+
+def test_unreadable_candidate_ranks_last():
+    ranked = rank_candidates([b"broken", encode(gradient_image())])
+    assert ranked[-1] == (0, -1.0)
+    assert ranked[0][0] == 1
+
+
+def test_every_candidate_is_ranked_once():
+    ranked = rank_candidates([encode(noise_image(seed=s)) for s in range(4)])
+    assert sorted(i for i, _ in ranked) == [0, 1, 2, 3]
+    scores = [s for _, s in ranked]
+    assert scores == sorted(scores, reverse=True)
@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from flask_app.services.cdn_purge import PurgeQueue
+
+
+class StubCloudflare:
+    """Local purge_cache endpoint answering from a script of (status, headers, body) responses."""
+
+    def __init__(self, responses=()):
+        self.responses = list(responses)
+        self.requests = []
+        self.times = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests.append({"path": self.path, "auth": self.headers["Authorization"], **payload})
+                    stub.times.append(time.monotonic())
+                    status, headers, body = stub.responses.pop(0) if stub.responses else (200, {}, {"success": True})
+                raw = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.api_base = f"http://127.0.0.1:{self.server.server_address[1]}/client/v4"
+
+    def queue(self, **kwargs):
+        options = {"requests_per_second": 100.0, "max_workers": 4, "linger_seconds": 0.05, "max_retries": 3, **kwargs}
+        return PurgeQueue("zone1", "token1", api_base=self.api_base, **options)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def cloudflare():
+    stubs = []
+
+    def start(responses=()):
+        stubs.append(StubCloudflare(responses))
+        return stubs[-1]
+
+    yield start
+    for stub in stubs:
+        stub.stop()
+
+
+def urls(n, prefix="https://static.wowcher.co.uk/images/deal"):
+    return [f"{prefix}/{i}.jpg" for i in range(n)]
+
+
+def test_urls_are_deduplicated_and_coalesced_into_batches_of_30(cloudflare):
+    stub = cloudflare()
+    queue = stub.queue()
+    queue.enqueue(urls(40))
+    queue.enqueue(urls(65)[20:] + [None, ""])
+    stats = queue.close(timeout=10)
+    sizes = sorted(len(r["files"]) for r in stub.requests)
+    assert sizes == [5, 30, 30]
+    assert sorted(u for r in stub.requests for u in r["files"]) == sorted(urls(65))
+    assert stub.requests[0]["path"] == "/client/v4/zones/zone1/purge_cache"
+    assert stub.requests[0]["auth"] == "Bearer token1"
+    assert stats["purged"] == 65 and stats["failed"] == 0 and stats["requests"] == 3
+
+
+def test_429_is_retried_after_retry_after(cloudflare):
+    stub = cloudflare([(429, {"Retry-After": "0.3"}, {"success": False}), (200, {}, {"success": True})])
+    queue = stub.queue()
+    queue.enqueue(urls(3))
+    stats = queue.close(timeout=10)
+    assert stats["requests"] == 2 and stats["retries"] == 1 and stats["purged"] == 3
+    assert stub.times[1] - stub.times[0] >= 0.3
+
+
+def test_5xx_is_retried_until_max_retries(cloudflare):
+    stub = cloudflare([(503, {"Retry-After": "0"}, b"unavailable")] * 10)
+    queue = stub.queue(max_retries=2)
+    queue.enqueue(urls(2))
+    stats = queue.close(timeout=10)
+    assert stats["requests"] == 3 and stats["retries"] == 2
+    assert stats["purged"] == 0 and stats["failed"] == 2
+
+
+def test_non_json_4xx_is_a_permanent_failure(cloudflare):
+    stub = cloudflare([(403, {"Content-Type": "text/html"}, b"<html>Forbidden</html>")])
+    queue = stub.queue()
+    queue.enqueue(urls(4))
+    stats = queue.close(timeout=10)
+    assert stats["requests"] == 1 and stats["retries"] == 0
+    assert stats["failed"] == 4 and stats["purged"] == 0
+
+
+def test_unsuccessful_json_body_is_not_retried(cloudflare):
+    stub = cloudflare([(200, {}, {"success": False, "errors": [{"code": 1012, "message": "bad url"}]})])
+    queue = stub.queue()
+    queue.enqueue(urls(1))
+    stats = queue.close(timeout=10)
+    assert stats["requests"] == 1 and stats["failed"] == 1
+
+
+def test_latency_stats_cover_every_purged_url(cloudflare):
+    stub = cloudflare()
+    queue = stub.queue(linger_seconds=0.2)
+    queue.enqueue(urls(5))
+    stats = queue.close(timeout=10)
+    assert len(queue.latencies) == 5
+    # A partial batch lingers before it is sent, and flush() cuts the linger short
+    assert 0 <= stats["latency_p50_s"] <= stats["latency_p95_s"] <= stats["latency_max_s"] < 5
+
+
+def test_empty_queue_reports_no_latency(cloudflare):
+    stats = cloudflare().queue().close(timeout=5)
+    assert stats["requests"] == 0
+    assert stats["latency_p50_s"] is None and stats["latency_max_s"] is None
@@ -0,0 +1,86 @@
+import pytest
+
+from flask_app.services import cost_ledger
+from flask_app.services.cost_ledger import CostLedger, BudgetExceeded, usage_cost
+
+USAGE = {
+    "input_tokens_details": {"text_tokens": 1_000_000, "image_tokens": 0},
+    "output_tokens": 0,
+}
+
+
+@pytest.fixture(autouse=True)
+def prices(monkeypatch):
+    costs = cost_ledger.CFG.costs
+    monkeypatch.setattr(costs, "input_text_usd_per_m", 5.0)
+    monkeypatch.setattr(costs, "input_image_usd_per_m", 10.0)
+    monkeypatch.setattr(costs, "output_usd_per_m", 40.0)
+    monkeypatch.setattr(costs, "estimated_call_usd", 1.0)
+    monkeypatch.setattr(cost_ledger.CFG.generation, "candidates", 1)
+
+
+def test_usage_cost_accepts_dicts_and_objects():
+    class Details:
+        text_tokens = 1000
+        image_tokens = 2000
+
+    class Usage:
+        input_tokens_details = Details()
+        output_tokens = 500
+        total_tokens = 3500
+
+    as_object = usage_cost(Usage())
+    as_dict = usage_cost({"input_tokens_details": {"text_tokens": 1000, "image_tokens": 2000},
+                          "output_tokens": 500, "total_tokens": 3500})
+    assert as_object == as_dict
+    assert as_object["cost_usd"] == pytest.approx((1000 * 5 + 2000 * 10 + 500 * 40) / 1e6)
+    assert usage_cost(None)["cost_usd"] == 0
+
+
+def test_reserve_stops_before_budget_is_crossed():
+    ledger = CostLedger(budget_usd=2.5)
+    assert ledger.reserve() == 1.0
+    assert ledger.reserve() == 1.0
+    with pytest.raises(BudgetExceeded):
+        ledger.reserve()
+    assert ledger.skipped == 1
+    assert ledger.exhausted
+
+
+def test_release_returns_reservation():
+    ledger = CostLedger(budget_usd=1.5)
+    reservation = ledger.reserve()
+    assert ledger.exhausted
+    ledger.release(reservation)
+    assert ledger.reserved_usd == 0
+    assert not ledger.exhausted
+    ledger.reserve()
+
+
+def test_record_settles_reservation_and_updates_estimate():
+    ledger = CostLedger(budget_usd=10.0, batch_id="batch1")
+    reservation = ledger.reserve()
+    entry = ledger.record(42, USAGE, reservation, model="gpt-image-1", quality="high")
+    assert entry["batch_id"] == "batch1"
+    assert entry["deal_voucher_id"] == 42
+    assert entry["cost_usd"] == 5.0
+    assert ledger.reserved_usd == 0
+    assert ledger.spent_usd == 5.0
+    # Once calls are recorded the estimate follows the observed average
+    assert ledger.estimate() == 5.0
+    assert ledger.summary() == {
+        "batch_id": "batch1", "calls": 1, "spent_usd": 5.0, "budget_usd": 10.0, "skipped_for_budget": 0,
+    }
+
+
+def test_seed_estimate_scales_with_candidates(monkeypatch):
+    monkeypatch.setattr(cost_ledger.CFG.generation, "candidates", 3)
+    assert CostLedger().estimate() == 3.0
+
+
+def test_no_budget_never_blocks():
+    ledger = CostLedger(budget_usd=0)
+    assert ledger.budget_usd is None
+    for _ in range(100):
+        ledger.reserve()
+    assert not ledger.exhausted
@@ -0,0 +1,99 @@
+import base64
+import types
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("psycopg2")
+pytest.importorskip("openai")
+
+from flask_app.services import generation_service
+from helpers import encode, noise_image
+
+ORIGINAL = encode(noise_image(size=(300, 200), seed=1))
+PREVIEW = encode(noise_image(size=(300, 200), seed=2))
+FINAL = encode(noise_image(size=(300, 200), seed=3))
+
+
+def final_deal(preview_id=11):
+    return {
+        "id": 1, "preview_id": preview_id, "image_id_pos_0": 100,
+        "image_url_pos_0": "https://static.wowcher.co.uk/images/deal/1/100.jpg",
+        "preview_url": "https://bucket/images/deal/1/100_preview.jpg",
+        "prompt_template": "Make it {style}", "prompt_vars": '{"style": "bright"}', "prompt_source": "travel",
+    }
+
+
+@pytest.fixture
+def generation(monkeypatch):
+    """generate_one with downloads, the OpenAI call and S3 uploads replaced by recorders."""
+    state = {"downloads": {}, "screened": [], "comparisons": []}
+
+    def fake_download(url):
+        data = state["downloads"].get(url)
+        if data is None:
+            raise IOError(f"404 for {url}")
+        return data
+
+    def fake_edit(**kwargs):
+        return types.SimpleNamespace(data=[types.SimpleNamespace(b64_json=base64.b64encode(FINAL).decode())], usage=None)
+
+    def fake_screen(original, candidates):
+        state["screened"].append(original)
+        return [{"passed": True, "reasons": [], "flags": [], "metrics": {}} for _ in candidates]
+
+    def fake_comparison(original, variant, key):
+        state["comparisons"].append(original)
+        return "https://bucket/compare.jpg" if original else None
+
+    monkeypatch.setattr(generation_service, "download", fake_download)
+    monkeypatch.setattr(generation_service.OPENAI.images, "edit", fake_edit)
+    monkeypatch.setattr(generation_service, "screen_candidates", fake_screen)
+    monkeypatch.setattr(generation_service, "publish_comparison", fake_comparison)
+    monkeypatch.setattr(generation_service, "upload_image", lambda key, body, mime_type="image/jpeg": f"https://bucket/{key}")
+    monkeypatch.setattr(generation_service, "get_purge_queue", lambda: None)
+    monkeypatch.setattr(generation_service.CFG.prescreen, "enabled", True)
+    return state
+
+
+def test_final_screens_against_the_original(generation):
+    deal = final_deal()
+    generation["downloads"] = {deal["image_url_pos_0"]: ORIGINAL, deal["preview_url"]: PREVIEW}
+    result = generation_service.generate_one(deal)
+    assert generation["screened"] == [ORIGINAL]
+    assert generation["comparisons"] == [ORIGINAL]
+    assert result["phase"] == "final"
+    assert result["compare_url"] == "https://bucket/compare.jpg"
+
+
+def test_final_without_original_skips_prescreen_and_comparison(generation):
+    deal = final_deal()
+    # Only the preview downloads; it must not stand in for the original
+    generation["downloads"] = {deal["preview_url"]: PREVIEW}
+    result = generation_service.generate_one(deal)
+    assert generation["screened"] == []
+    assert generation["comparisons"] == [None]
+    assert result["compare_url"] is None
+    assert result["prescreen_flags"] is None
+
+
+def test_failing_finals_are_counted_against_their_previews(monkeypatch):
+    previews = [final_deal(preview_id=11), {**final_deal(preview_id=12), "id": 2}]
+    recorded = []
+
+    def fake_generate_one(deal, ledger):
+        if deal["preview_id"] == 12:
+            raise generation_service.PrescreenRejected("deal 2: all 1 candidates rejected")
+        return {**deal, "s3_url": "https://bucket/final.jpg", "transcode": {}}
+
+    monkeypatch.setattr(generation_service, "list_approved_previews", lambda limit: previews)
+    monkeypatch.setattr(generation_service, "generate_one", fake_generate_one)
+    monkeypatch.setattr(generation_service, "insert_generation_rows", lambda rows: None)
+    monkeypatch.setattr(generation_service, "insert_cost_entries", lambda entries: None)
+    monkeypatch.setattr(generation_service, "retire_finalized_previews", lambda: 1)
+    monkeypatch.setattr(generation_service, "record_final_failures",
+                        lambda ids, max_attempts: recorded.append((ids, max_attempts)) or 0)
+    monkeypatch.setattr(generation_service.CFG.generation, "final_max_attempts", 3)
+
+    assert generation_service.finalize_previews(limit=10, budget_usd=0) == 1
+    assert recorded == [([12], 3)]
@@ -0,0 +1,149 @@
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("psycopg2")
+
+from contextlib import contextmanager
+from datetime import date
+
+from flask_app.services import approval_store
+
+
+# Deliberately not the test host's date: counters must follow Redshift's clock
+DB_TODAY = date(2001, 2, 3)
+
+
+class FakeCursor:
+    def __init__(self, fail_on=None):
+        self.statements = []
+        self.params = []
+        self.rowcount = 1
+        self.fail_on = fail_on
+
+    def execute(self, sql, params=None):
+        self.statements.append(" ".join(sql.split()))
+        self.params.append(params)
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError(f"{self.fail_on} failed")
+
+    def fetchone(self):
+        return (DB_TODAY,)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.cur = cursor
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeS3:
+    def __init__(self):
+        self.put = []
+        self.deleted = []
+
+    def put_object(self, **kwargs):
+        self.put.append(kwargs)
+
+    def delete_object(self, **kwargs):
+        self.deleted.append(kwargs)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """approval_store wired to an in-memory cursor, S3 client and execute_values recorder."""
+    state = {"cursor": FakeCursor(), "s3": FakeS3(), "execute_values": []}
+
+    @contextmanager
+    def fake_conn():
+        state["conn"] = FakeConnection(state["cursor"])
+        yield state["conn"]
+
+    def fake_execute_values(cur, sql, values, page_size=None):
+        state["execute_values"].append((" ".join(sql.split()), list(values)))
+
+    monkeypatch.setattr(approval_store, "redshift_conn", fake_conn)
+    monkeypatch.setattr(approval_store, "execute_values", fake_execute_values)
+    monkeypatch.setattr(approval_store, "_s3_client", lambda: state["s3"])
+    monkeypatch.setattr(approval_store.CFG.ingest, "copy_threshold", 3)
+    monkeypatch.setattr(approval_store.CFG.ingest, "staging_bucket", "staging")
+    return state
+
+
+def rows(n):
+    return [{"deal_voucher_id": i, "variant_s3_url": f"https://bucket/v/{i}.jpg", "vertical": "travel"} for i in range(n)]
+
+
+def copies(cursor):
+    return [s for s in cursor.statements if s.startswith("COPY temp.image_to_approve")]
+
+
+def test_small_batch_uses_execute_values(store):
+    approval_store.insert_generation_rows(rows(2))
+    inserts = [sql for sql, _ in store["execute_values"] if sql.startswith("INSERT INTO temp.image_to_approve")]
+    assert len(inserts) == 1
+    assert len(store["execute_values"][0][1]) == 2
+    assert copies(store["cursor"]) == []
+    assert store["s3"].put == []
+
+
+def test_batch_at_threshold_uses_copy(store):
+    approval_store.insert_generation_rows(rows(3))
+    assert len(copies(store["cursor"])) == 1
+    assert not any(sql.startswith("INSERT INTO temp.image_to_approve") for sql, _ in store["execute_values"])
+    put = store["s3"].put[0]
+    assert put["Bucket"] == "staging"
+    assert put["Body"].decode("utf-8").count("\n") == 3
+    assert store["s3"].deleted == [{"Bucket": "staging", "Key": put["Key"]}]
+
+
+def test_large_batch_without_staging_bucket_uses_execute_values(store, monkeypatch):
+    monkeypatch.setattr(approval_store.CFG.ingest, "staging_bucket", "")
+    monkeypatch.setattr(approval_store.CFG.aws, "bucket_name", "static.wowcher.co.uk")
+    approval_store.insert_generation_rows(rows(5))
+    # Staged CSVs must never land in the public image bucket
+    assert store["s3"].put == []
+    assert copies(store["cursor"]) == []
+    inserts = [v for sql, v in store["execute_values"] if sql.startswith("INSERT INTO temp.image_to_approve")]
+    assert [len(v) for v in inserts] == [5]
+
+
+def test_staging_object_deleted_when_copy_fails(store):
+    store["cursor"] = FakeCursor(fail_on="COPY temp.image_to_approve")
+    approval_store.insert_generation_rows(rows(3))
+    key = store["s3"].put[0]["Key"]
+    assert store["s3"].deleted == [{"Bucket": "staging", "Key": key}]
+    # The failed COPY is rolled back and the rows go in one at a time instead
+    assert store["conn"].rollbacks == 1
+    per_row = [s for s in store["cursor"].statements if s.startswith("INSERT INTO temp.image_to_approve")]
+    assert len(per_row) == 3
+
+
+def test_empty_batch_is_a_no_op(store):
+    approval_store.insert_generation_rows([])
+    assert "conn" not in store
+
+
+def test_counters_are_bucketed_on_the_redshift_date(store):
+    approval_store.insert_generation_rows(rows(2))
+    cursor = store["cursor"]
+    bumps = [p for sql, p in zip(cursor.statements, cursor.params)
+             if sql.startswith("UPDATE temp.image_approval_counters")]
+    assert len(bumps) == 1
+    assert DB_TODAY in bumps[0]
+    assert "SELECT TRUNC(SYSDATE)" in cursor.statements
@@ -0,0 +1,64 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from flask_app.services.prescreen import screen_batch, screen_candidates, describe
+from helpers import encode, noise_image, gradient_image
+
+
+def test_clean_candidate_passes():
+    result = screen_batch([encode(gradient_image())], [encode(noise_image(seed=1))])[0]
+    assert result["passed"]
+    assert result["reasons"] == []
+    assert result["flags"] == []
+    assert result["metrics"]["hash_distance"] >= 6
+
+
+def test_unreadable_and_missing_bytes_are_rejected():
+    results = screen_batch([b"not an image", None], [None, None])
+    assert [r["reasons"] for r in results] == [["unreadable"], ["unreadable"]]
+    assert not any(r["passed"] for r in results)
+
+
+def test_blank_candidate_is_rejected():
+    blank = encode(Image.new("RGB", (300, 200), (120, 120, 120)))
+    result = screen_batch([blank], [None])[0]
+    assert not result["passed"]
+    assert "blank" in result["reasons"]
+
+
+def test_copy_of_original_is_rejected():
+    original = encode(noise_image(seed=3))
+    result = screen_batch([original], [original])[0]
+    assert "near_original" in result["reasons"]
+    assert result["metrics"]["hash_distance"] == 0
+
+
+def test_missing_original_skips_hash_check():
+    result = screen_batch([encode(noise_image(seed=3))], [None])[0]
+    assert result["metrics"]["hash_distance"] is None
+    assert "near_original" not in result["reasons"]
+
+
+def test_wrong_aspect_ratio_is_rejected():
+    result = screen_batch([encode(noise_image(size=(200, 200)))], [None])[0]
+    assert "aspect_ratio" in result["reasons"]
+
+
+def test_text_in_clear_zone_is_flagged_not_rejected():
+    img = gradient_image(size=(600, 400))
+    draw = ImageDraw.Draw(img)
+    for x in range(490, 590, 6):
+        draw.line([(x, 330), (x, 390)], fill=(0, 0, 0), width=2)
+    result = screen_batch([encode(img)], [None])[0]
+    assert result["passed"]
+    assert result["flags"] == ["clear_zone"]
+    assert describe(result) == "prescreen: clear_zone"
+
+
+def test_results_keep_input_order():
+    blank = encode(Image.new("RGB", (300, 200), (0, 0, 0)))
+    good = encode(gradient_image())
+    results = screen_candidates(None, [good, b"", blank])
+    assert [r["passed"] for r in results] == [True, False, False]
+    assert results[1]["reasons"] == ["unreadable"]
+    assert results[2]["reasons"] == ["blank"]
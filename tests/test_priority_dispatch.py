@@ -0,0 +1,71 @@
+import types
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("psycopg2")
+pytest.importorskip("openai")
+
+from flask_app.services import cost_ledger, generation_service
+from flask_app.services.cost_ledger import CostLedger
+
+# One text token at $1M/M input makes every fake call cost exactly $1
+USAGE = {"input_tokens_details": {"text_tokens": 1, "image_tokens": 0}, "output_tokens": 0}
+
+
+def deals():
+    # Listed out of order; revenue ties are broken by the better (lower) rank
+    return [
+        {"id": "low", "revenue_last_7_days": 10.0, "revenue_rank": 5},
+        {"id": "top", "revenue_last_7_days": 900.0, "revenue_rank": 1},
+        {"id": "unknown", "revenue_last_7_days": None, "revenue_rank": None},
+        {"id": "mid_b", "revenue_last_7_days": 300.0, "revenue_rank": 3},
+        {"id": "mid_a", "revenue_last_7_days": 300.0, "revenue_rank": 2},
+    ]
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Order in which generate_prioritised hands deals to generate_one, with a fake clock."""
+    state = {"order": [], "clock": 0.0, "call_seconds": 10.0}
+
+    def fake_generate_one(deal, ledger):
+        state["order"].append(deal["id"])
+        reservation = ledger.reserve()
+        state["clock"] += state["call_seconds"]
+        ledger.record(deal["id"], USAGE, reservation)
+        return {"id": deal["id"]}
+
+    monkeypatch.setattr(generation_service, "generate_one", fake_generate_one)
+    monkeypatch.setattr(generation_service, "time", types.SimpleNamespace(monotonic=lambda: state["clock"]))
+    monkeypatch.setattr(cost_ledger.CFG.costs, "input_text_usd_per_m", 1_000_000.0)
+    monkeypatch.setattr(cost_ledger.CFG.costs, "estimated_call_usd", 1.0)
+    monkeypatch.setattr(cost_ledger.CFG.generation, "candidates", 1)
+    return state
+
+
+def run(ledger, deadline=None):
+    return [r["id"] for r in generation_service.generate_prioritised(deals(), ledger, max_workers=1, deadline=deadline)]
+
+
+def test_highest_revenue_deals_are_dispatched_first(dispatched):
+    results = run(CostLedger())
+    assert dispatched["order"] == ["top", "mid_a", "mid_b", "low", "unknown"]
+    assert results == dispatched["order"]
+
+
+def test_dispatch_stops_at_budget(dispatched):
+    ledger = CostLedger(budget_usd=3.5)
+    assert run(ledger) == ["top", "mid_a", "mid_b"]
+    assert ledger.spent_usd == pytest.approx(3.0)
+    assert ledger.reserved_usd == 0
+
+
+def test_dispatch_stops_at_deadline(dispatched):
+    # Each call advances the clock 10s; the third call starts at t=20 and the fourth would start at t=30
+    assert run(CostLedger(), deadline=25.0) == ["top", "mid_a", "mid_b"]
+
+
+def test_nothing_dispatched_after_deadline(dispatched):
+    dispatched["clock"] = 100.0
+    assert run(CostLedger(), deadline=50.0) == []
@@ -0,0 +1,80 @@
+import json
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("psycopg2")
+
+from flask_app.services import approval_store
+
+
+class FakeCursor:
+    """Answers the alternate lookup with row (or None) and reports rowcount for the UPDATE."""
+
+    def __init__(self, row, rowcount=1):
+        self.row = row
+        self.rowcount = rowcount
+        self.calls = []
+
+    def execute(self, sql, params=None):
+        self.calls.append((" ".join(sql.split()), params))
+
+    def fetchone(self):
+        return self.row
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def cursor(monkeypatch):
+    state = {}
+
+    class FakeConnection:
+        def cursor(self):
+            return state["cursor"]
+
+        def commit(self):
+            pass
+
+    @contextmanager
+    def fake_conn():
+        yield FakeConnection()
+
+    monkeypatch.setattr(approval_store, "redshift_conn", fake_conn)
+    return state
+
+
+LEASE_CHECK = "(lease_owner IS NULL OR lease_owner = %s OR lease_expires_ts < GETDATE())"
+
+
+def test_promote_checks_the_lease(cursor):
+    cursor["cursor"] = FakeCursor((json.dumps(["alt1", "alt2"]),))
+    assert approval_store.promote_alternate(5, "sam", "")
+    (select_sql, select_params), (update_sql, update_params) = cursor["cursor"].calls
+    assert LEASE_CHECK in select_sql and LEASE_CHECK in update_sql
+    assert select_params == (5, "sam")
+    assert update_params[0] == "alt1"
+    assert update_params[-2:] == (5, "sam")
+
+
+def test_row_leased_to_someone_else_is_not_promoted(cursor, capsys):
+    cursor["cursor"] = FakeCursor(None)
+    assert not approval_store.promote_alternate(5, "sam", "")
+    assert len(cursor["cursor"].calls) == 1
+    assert "not promoted" in capsys.readouterr().out
+
+
+def test_lost_race_is_reported(cursor, capsys):
+    cursor["cursor"] = FakeCursor((json.dumps(["alt1"]),), rowcount=0)
+    assert not approval_store.promote_alternate(5, "sam", "")
+    assert "not promoted" in capsys.readouterr().out
+
+
+def test_no_alternates_left(cursor):
+    cursor["cursor"] = FakeCursor((None,))
+    assert not approval_store.promote_alternate(5, "sam", "")
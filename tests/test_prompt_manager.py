@@ -0,0 +1,41 @@
+import os
+
+from flask_app.services.prompt_manager import PromptManager, compile_template
+
+
+def test_compile_template_splits_literals_and_names():
+    segments, names = compile_template("A {subject} at {place}.")
+    assert segments == ("A ", "subject", " at ", "place", ".")
+    assert names == frozenset({"subject", "place"})
+
+
+def test_compile_template_without_placeholders():
+    assert compile_template("plain text") == (("plain text",), frozenset())
+
+
+def test_render_substitutes_values():
+    rendered = PromptManager.render("{greeting}, {name}! {greeting} again.", {"greeting": "Hi", "name": "Sam"})
+    assert rendered == "Hi, Sam! Hi again."
+
+
+def test_render_keeps_unknown_placeholders_and_blanks_none():
+    rendered = PromptManager.render("{known}|{missing}|{empty}", {"known": "x", "empty": None})
+    assert rendered == "x|{missing}|"
+
+
+def test_render_ignores_braces_that_are_not_placeholders():
+    assert PromptManager.render("{ not one } {a-b}", {"a": "1"}) == "{ not one } {a-b}"
+
+
+def test_edited_prompt_file_is_reloaded(tmp_path):
+    path = tmp_path / "Travel Deals.txt"
+    path.write_text("Travel {email_subject}\n")
+    manager = PromptManager(prompts_folder=str(tmp_path), reload_seconds=0)
+    manager.refresh(force=True)
+    assert manager.get_template("travel_deals") == "Travel {email_subject}"
+
+    path.write_text("Holiday {email_subject}")
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 10))
+    manager.refresh(force=True)
+    assert manager.get_template("travel_deals") == "Holiday {email_subject}"
+    assert manager.get_template("missing") is None
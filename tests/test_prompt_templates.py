@@ -0,0 +1,105 @@
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("psycopg2")
+
+from flask_app.services import approval_store
+
+
+class SqliteCursor:
+    """Runs approval_store's queries on SQLite, whose temp schema stands in for Redshift's."""
+
+    def __init__(self, conn):
+        self.cur = conn.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cur.close()
+        return False
+
+    def execute(self, sql, params=()):
+        self.cur.execute(sql.replace("%s", "?"), params)
+
+    @property
+    def description(self):
+        return self.cur.description
+
+    def fetchone(self):
+        return self.cur.fetchone()
+
+    def fetchall(self):
+        return self.cur.fetchall()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(
+        """
+        CREATE TEMP TABLE image_to_approve (
+          id INTEGER, deal_voucher_id INTEGER, image_id_pos_0 INTEGER, original_url TEXT,
+          variant_s3_url TEXT, vertical TEXT, category_name TEXT, sub_category_name TEXT,
+          prompt_source TEXT, prompt TEXT, prompt_hash TEXT, prompt_vars TEXT,
+          phase TEXT, status TEXT, parent_id INTEGER, reviewed_ts TEXT
+        );
+        CREATE TEMP TABLE image_prompt_template (
+          prompt_hash TEXT, prompt_source TEXT, template TEXT, created_ts TEXT
+        );
+        """
+    )
+
+    class Connection:
+        def cursor(self):
+            return SqliteCursor(conn)
+
+        def commit(self):
+            conn.commit()
+
+    @contextmanager
+    def fake_conn():
+        yield Connection()
+
+    monkeypatch.setattr(approval_store, "redshift_conn", fake_conn)
+    return conn
+
+
+def add_preview(db, item_id, prompt_hash, prompt=None):
+    db.execute(
+        "INSERT INTO temp.image_to_approve (id, deal_voucher_id, prompt, prompt_hash, prompt_vars, phase, status, reviewed_ts)"
+        " VALUES (?, ?, ?, ?, ?, 'preview', 'approved', ?)",
+        (item_id, item_id * 10, prompt, prompt_hash, '{"style": "bright"}' if prompt_hash else None, f"2026-10-0{item_id}"),
+    )
+
+
+def add_template(db, prompt_hash, template, created_ts):
+    db.execute(
+        "INSERT INTO temp.image_prompt_template (prompt_hash, prompt_source, template, created_ts) VALUES (?, 'travel', ?, ?)",
+        (prompt_hash, template, created_ts),
+    )
+
+
+def test_duplicate_templates_do_not_duplicate_previews(db):
+    # Two batches raced past the NOT EXISTS check and both stored hash h1
+    add_template(db, "h1", "Make it {style}", "2026-10-01 10:00:00")
+    add_template(db, "h1", "Make it {style} (late)", "2026-10-01 10:00:01")
+    add_template(db, "h2", "Paint it {style}", "2026-10-01 10:00:00")
+    add_preview(db, 1, "h1")
+    add_preview(db, 2, "h2")
+    add_preview(db, 3, None, prompt="Legacy rendered prompt")
+
+    previews = approval_store.list_approved_previews()
+    assert [p["preview_id"] for p in previews] == [1, 2, 3]
+    assert [p["prompt_template"] for p in previews] == ["Make it {style}", "Paint it {style}", "Legacy rendered prompt"]
+    assert previews[2]["prompt_vars"] is None
+
+
+def test_prompt_text_uses_the_oldest_duplicate_template(db):
+    add_template(db, "h1", "Make it {style} (late)", "2026-10-01 10:00:01")
+    add_template(db, "h1", "Make it {style}", "2026-10-01 10:00:00")
+    add_preview(db, 1, "h1")
+    assert approval_store.get_prompt_text(1) == "Make it bright"
@@ -0,0 +1,50 @@
+import re
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("psycopg2")
+pytest.importorskip("openai")
+
+import pandas as pd
+
+from flask_app.services import generation_service
+
+# Words Redshift refuses as bare identifiers/aliases (subset relevant to this query)
+RESERVED = {"top", "user", "limit", "offset", "order", "group", "table", "column", "session_user", "tag"}
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    """query_deals with the connection stubbed out and read_sql recording what it was given."""
+    state = {}
+
+    @contextmanager
+    def fake_conn():
+        yield object()
+
+    def fake_read_sql(sql, conn, params=None):
+        state["sql"], state["params"] = sql, params
+        return pd.DataFrame([{"id": 1, "revenue_last_7_days": 10.0, "skipped_in_top": 2}])
+
+    monkeypatch.setattr(generation_service, "redshift_conn", fake_conn)
+    monkeypatch.setattr(generation_service.pd, "read_sql", fake_read_sql)
+    return state
+
+
+def test_query_deals_sql_binds_every_parameter(captured):
+    df = generation_service.query_deals("Travel", limit=5, cooldown_days=30)
+    assert captured["sql"].count("%s") == len(captured["params"])
+    assert captured["params"] == (30, True, "Travel", 5, 5)
+    assert "skipped_in_top" not in df.columns
+    assert df.attrs["skipped_deals"] == 2
+
+
+def test_query_deals_sql_uses_no_reserved_aliases(captured):
+    generation_service.query_deals("Travel")
+    aliases = re.findall(r"\)\s+(?:AS\s+)?(\w+)\s", captured["sql"], flags=re.IGNORECASE)
+    aliases += re.findall(r"\bAS\s+(\w+)", captured["sql"], flags=re.IGNORECASE)
+    used = {a.lower() for a in aliases} & RESERVED
+    assert not used, f"reserved words used as aliases: {used}"
+    assert "top_deals.already_processed" in captured["sql"]
@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("streamlit")
+pa = pytest.importorskip("pyarrow")
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+import review_interface
+
+
+def frame():
+    # Deliberately not a RangeIndex: decisions are addressed by position
+    return pd.DataFrame({
+        "id": range(5),
+        "s3_url": [f"https://bucket/v/{i}.jpg" for i in range(5)],
+        "review_result": [""] * 5,
+        "review_notes": [""] * 5,
+        "prompt": [f"prompt {i}" for i in range(5)],
+    }, index=[10, 3, 7, 1, 0])
+
+
+def write(path, df, chunk_rows, compression=None):
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    if str(path).endswith(".parquet"):
+        pq.write_table(table, path, row_group_size=chunk_rows)
+    else:
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=compression)) as writer:
+                writer.write_table(table, max_chunksize=chunk_rows)
+
+
+@pytest.mark.parametrize("name, compression", [("review.parquet", None), ("review.arrow", "zstd")])
+def test_lazy_columns_are_read_per_chunk(tmp_path, name, compression):
+    path = str(tmp_path / name)
+    write(path, frame(), chunk_rows=2, compression=compression)
+    assert [review_interface.load_row_details(path, i)["prompt"] for i in range(5)] == [f"prompt {i}" for i in range(5)]
+    _, lazy, starts = review_interface.open_row_chunks(path, review_interface.os.path.getmtime(path))
+    assert lazy == ["prompt"]
+    assert starts == [0, 2, 4, 5]
+
+
+@pytest.mark.parametrize("name", ["review.parquet", "review.arrow"])
+def test_written_files_use_small_chunks(tmp_path, monkeypatch, name):
+    monkeypatch.setattr(review_interface, "LAZY_CHUNK_ROWS", 2)
+    path = str(tmp_path / name)
+    write(path, frame(), chunk_rows=1000)
+    df = review_interface.read_review_frame(path)
+    assert "prompt" not in df.columns
+    review_interface.write_review_file(df, path)
+    _, _, starts = review_interface.open_row_chunks(path, review_interface.os.path.getmtime(path))
+    assert starts == [0, 2, 4, 5]
+    assert review_interface.load_row_details(path, 3)["prompt"] == "prompt 3"
+
+
+def test_decisions_are_applied_by_position():
+    df = frame()
+    index = review_interface.ReviewIndex(df)
+    index.set_result(1, "approved")
+    review_interface.set_row_values(df, 2, {"review_notes": "too dark"})
+    assert list(df["review_result"]) == ["", "approved", "", "", ""]
+    assert list(df["review_notes"]) == ["", "", "too dark", "", ""]
+    assert index.count("approved") == 1
+    assert index.count("") == 4
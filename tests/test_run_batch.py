@@ -0,0 +1,90 @@
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("psycopg2")
+pytest.importorskip("openai")
+
+import pandas as pd
+
+from flask_app.services import generation_service
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    """run_batch over fake deals with generation and Redshift replaced by recorders."""
+    state = {"inserts": []}
+    deals = pd.DataFrame([{"id": i, "revenue_last_7_days": 100 - i, "revenue_rank": i} for i in range(7)])
+
+    def fake_generate_one(deal, ledger):
+        return {"id": deal["id"], "s3_url": f"https://bucket/v/{deal['id']}.jpg", "cost_usd": 0.0,
+                "transcode": {"images": 1, "raw": 1000, "jpeg": 200}}
+
+    monkeypatch.setattr(generation_service, "query_deals", lambda **kwargs: deals)
+    monkeypatch.setattr(generation_service, "generate_one", fake_generate_one)
+    monkeypatch.setattr(generation_service, "insert_generation_rows", lambda rows: state["inserts"].append(list(rows)))
+    monkeypatch.setattr(generation_service, "insert_cost_entries", lambda entries: None)
+    monkeypatch.setattr(generation_service, "get_purge_queue", lambda: None)
+    monkeypatch.setattr(generation_service.CFG.generation, "flush_rows", 3)
+    monkeypatch.setattr(generation_service.CFG.generation, "flush_seconds", 600.0)
+    return state
+
+
+def test_run_batch_inserts_in_batches_not_per_row(batch):
+    inserted = generation_service.run_batch("travel", limit=7, budget_usd=0, deadline_seconds=0)
+    assert inserted == 7
+    sizes = [len(rows) for rows in batch["inserts"]]
+    assert sum(sizes) == 7
+    # Background flushes wait for a full micro-batch; only the final one on close may be short
+    assert all(size >= 3 for size in sizes[:-1])
+    assert len(sizes) <= 3
+    inserted_ids = sorted(row["id"] for rows in batch["inserts"] for row in rows)
+    assert inserted_ids == list(range(7))
+
+
+def test_failed_flush_is_retried_on_close(batch, monkeypatch):
+    calls = []
+
+    def flaky_insert(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("redshift unavailable")
+        batch["inserts"].append(list(rows))
+
+    monkeypatch.setattr(generation_service, "insert_generation_rows", flaky_insert)
+    assert generation_service.run_batch("travel", limit=7, budget_usd=0, deadline_seconds=0) == 7
+    assert sum(len(rows) for rows in batch["inserts"]) == 7
+
+
+def test_cost_entries_are_written_with_the_result_batches(batch, monkeypatch):
+    stored = []
+    monkeypatch.setattr(generation_service, "insert_cost_entries", lambda entries: stored.append(list(entries)))
+    ledger = generation_service.CostLedger()
+    for deal_id in (1, 2):
+        ledger.record(deal_id, None)
+    flusher = generation_service.ResultFlusher(flush_rows=10, flush_seconds=600.0, ledger=ledger)
+    flusher.add({"id": 1})
+    flusher.flush()
+    # A paid call whose image never reached the queue still gets written
+    ledger.record(3, None)
+    flusher.close()
+    assert [[e["deal_voucher_id"] for e in entries] for entries in stored] == [[1, 2], [3]]
+    assert ledger.unpersisted() == []
+
+
+def test_failed_cost_write_is_retried(batch, monkeypatch):
+    stored = []
+
+    def flaky_insert(entries):
+        if not stored:
+            stored.append(None)
+            raise RuntimeError("redshift unavailable")
+        stored.append([e["deal_voucher_id"] for e in entries])
+
+    monkeypatch.setattr(generation_service, "insert_cost_entries", flaky_insert)
+    ledger = generation_service.CostLedger()
+    ledger.record(1, None)
+    flusher = generation_service.ResultFlusher(flush_rows=10, flush_seconds=600.0, ledger=ledger)
+    flusher.flush()
+    ledger.record(2, None)
+    flusher.close()
+    assert stored == [None, [1, 2]]
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+import pandas as pd
+
+import review_interface
+from review_backend import SQLiteReviewBackend
+
+
+def test_queue_decisions_are_written_over_the_journal(tmp_path):
+    path = str(tmp_path / "review.csv")
+    pd.DataFrame({
+        "id": [1, 2, 3],
+        "s3_url": ["a", "b", "c"],
+        "review_result": ["", "", ""],
+        "review_notes": ["", "", ""],
+    }).to_csv(path, index=False)
+    # Single-reviewer decisions made before the shared queue was opened
+    review_interface.append_journal(path, 0, {"review_result": "approved"})
+    review_interface.append_journal(path, 1, {"review_result": "rejected"})
+
+    backend = SQLiteReviewBackend(str(tmp_path / "review.review.sqlite"))
+    backend.import_frame(pd.read_csv(path).fillna(""))
+    assert backend.decide(1, "sam", "approved")
+    assert backend.decide(2, "sam", "rejected", "wrong colours")
+
+    review_interface.write_queue_decisions(backend, path)
+
+    assert not os.path.exists(review_interface.journal_path(path))
+    df = pd.read_csv(path).fillna("")
+    assert list(df["review_result"]) == ["approved", "approved", "rejected"]
+    assert df.loc[2, "review_notes"] == "wrong colours"
+    # Reloading replays nothing over what was written
+    assert review_interface.replay_journal(df, path) == 0
@@ -0,0 +1,76 @@
+import pytest
+
+from flask_app.services import thumbnail_cache
+
+
+@pytest.fixture(autouse=True)
+def hosts(monkeypatch):
+    monkeypatch.setattr(thumbnail_cache.CFG.thumbnails, "allowed_hosts", "static.wowcher.co.uk, img.example.com")
+    monkeypatch.setattr(thumbnail_cache.CFG.aws, "bucket_name", "variants-bucket")
+
+
+@pytest.mark.parametrize("url", [
+    "https://static.wowcher.co.uk/images/deal/1.jpg",
+    "http://img.example.com/a.png",
+    "https://variants-bucket/generated/1.jpg",
+])
+def test_allowed_hosts(url):
+    assert thumbnail_cache._allowed(url)
+
+
+@pytest.mark.parametrize("url", [
+    "https://evil.example.org/a.jpg",
+    "https://static.wowcher.co.uk.evil.org/a.jpg",
+    "http://169.254.169.254/latest/meta-data/",
+    "file:///etc/passwd",
+    "not a url",
+])
+def test_disallowed_hosts(url):
+    assert not thumbnail_cache._allowed(url)
+
+
+def test_get_thumbnail_refuses_disallowed_host(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("disallowed URL was fetched")
+
+    monkeypatch.setattr(thumbnail_cache.requests, "get", fail)
+    with pytest.raises(ValueError):
+        thumbnail_cache.get_thumbnail("https://evil.example.org/a.jpg", 200)
+
+
+def test_version_is_part_of_the_cache_key():
+    url = "https://variants-bucket/generated/1_variant.jpg"
+    assert thumbnail_cache._cache_path(url, 240, "webp", "a") != thumbnail_cache._cache_path(url, 240, "webp", "b")
+
+
+def test_thumbnail_version_changes_with_the_row():
+    first = {"id": 1, "created_ts": "2026-10-01 10:00:00"}
+    regenerated = {"id": 7, "created_ts": "2026-10-02 09:00:00"}
+    assert thumbnail_cache.thumbnail_version(first) == thumbnail_cache.thumbnail_version(dict(first))
+    assert thumbnail_cache.thumbnail_version(first) != thumbnail_cache.thumbnail_version(regenerated)
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def test_locks_are_released_on_miss_hit_and_failure(monkeypatch, tmp_path):
+    from helpers import encode, gradient_image
+
+    monkeypatch.setattr(thumbnail_cache.CFG.thumbnails, "cache_dir", str(tmp_path))
+    monkeypatch.setattr(thumbnail_cache.requests, "get", lambda url, timeout: FakeResponse(encode(gradient_image())))
+    url = "https://variants-bucket/generated/1_variant.jpg"
+
+    miss, _ = thumbnail_cache.get_thumbnail(url, 240, "jpeg", "v1")
+    hit, _ = thumbnail_cache.get_thumbnail(url, 240, "jpeg", "v1")
+    assert miss == hit
+    assert thumbnail_cache._LOCKS == {}
+
+    monkeypatch.setattr(thumbnail_cache.requests, "get", lambda url, timeout: FakeResponse(b"not an image"))
+    with pytest.raises(Exception):
+        thumbnail_cache.get_thumbnail(url, 240, "jpeg", "v2")
+    assert thumbnail_cache._LOCKS == {}
@@ -0,0 +1,70 @@
+import io
+
+import pytest
+from PIL import Image
+
+from flask_app.services.transcode import transcode, with_extension, content_type, TranscodeStats
+from helpers import encode, noise_image, gradient_image
+
+
+def test_png_becomes_jpeg():
+    # Photographic detail is where PNG is heaviest and the JPEG saving shows
+    png = encode(noise_image())
+    out = transcode(png, "jpeg")
+    img = Image.open(io.BytesIO(out))
+    assert img.format == "JPEG"
+    assert img.size == (300, 200)
+    assert len(out) < len(png)
+
+
+def test_png_becomes_webp():
+    out = transcode(encode(gradient_image()), "webp")
+    assert Image.open(io.BytesIO(out)).format == "WEBP"
+
+
+def test_jpeg_input_is_not_recompressed():
+    jpeg = encode(gradient_image(), "JPEG", quality=70)
+    assert transcode(jpeg, "jpeg") is jpeg
+
+
+def test_transparency_is_flattened_onto_white():
+    img = Image.new("RGBA", (40, 40), (255, 0, 0, 0))
+    out = Image.open(io.BytesIO(transcode(encode(img), "jpeg")))
+    assert out.mode == "RGB"
+    r, g, b = out.getpixel((20, 20))
+    assert min(r, g, b) > 245
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        transcode(encode(gradient_image()), "gif")
+
+
+@pytest.mark.parametrize("key, fmt, expected", [
+    ("generated/123/variant.png", "jpeg", "generated/123/variant.jpg"),
+    ("generated/123/variant.jpg", "webp", "generated/123/variant.webp"),
+    ("generated/v1.2/variant", "jpeg", "generated/v1.2/variant.jpg"),
+])
+def test_with_extension(key, fmt, expected):
+    assert with_extension(key, fmt) == expected
+
+
+def test_content_type():
+    assert content_type("jpeg") == "image/jpeg"
+    assert content_type("webp") == "image/webp"
+
+
+def test_stats_summary():
+    stats = TranscodeStats()
+    stats.add({"images": 2, "raw": 4_000_000, "jpeg": 1_000_000})
+    stats.add({"images": 1, "raw": 2_000_000, "jpeg": 500_000, "webp": 300_000})
+    summary = stats.summary()
+    assert summary["images"] == 3
+    assert summary["raw_mb"] == 6.0
+    assert summary["jpeg_mb"] == 1.5
+    assert summary["jpeg_saved_pct"] == 75.0
+    assert summary["webp_mb"] == 0.3
+
+
+def test_empty_stats_summary():
+    assert TranscodeStats().summary() == {"images": 0, "raw_mb": 0.0}